@@ -1,7 +1,7 @@
 '''
 Система достижений: создание типов, назначение сотрудникам, разрешения для продюсеров.
-GET: action=types | user&email=... | allowed_for_producer
-POST: create_type | update_type | deactivate_type | set_producer_allowed | grant | revoke
+GET: action=types | user&email=... | allowed_for_producer | unseen&email=...[&mode=count]
+POST: create_type | update_type | deactivate_type | set_producer_allowed | grant | grant_many | revoke
 Returns: JSON со списком/статусом операции.
 '''
 
@@ -95,6 +95,32 @@ def _producer_team_emails(cur, producer_email: str) -> List[str]:
     return [r['email'] for r in cur.fetchall()]
 
 
+def _producer_grant_error(cur, producer_email: str, type_id: int, emails: List[str]) -> str:
+    """Одним запросом: разрешён ли тип продюсерам и все ли получатели из его команды."""
+    cur.execute(
+        f"""SELECT
+                EXISTS (SELECT 1 FROM {SCHEMA}.producer_allowed_achievements
+                        WHERE achievement_type_id = %s) AS type_allowed,
+                ARRAY(
+                    SELECT e FROM unnest(%s::text[]) AS e
+                    WHERE e NOT IN (
+                        SELECT LOWER(model_email) FROM {SCHEMA}.producer_assignments
+                        WHERE LOWER(producer_email) = LOWER(%s) AND model_email IS NOT NULL
+                        UNION
+                        SELECT LOWER(operator_email) FROM {SCHEMA}.producer_assignments
+                        WHERE LOWER(producer_email) = LOWER(%s) AND operator_email IS NOT NULL
+                    )
+                ) AS outsiders""",
+        (type_id, emails, producer_email, producer_email),
+    )
+    row = cur.fetchone()
+    if not row['type_allowed']:
+        return 'this achievement is not allowed for producers'
+    if row['outsiders']:
+        return 'Можно награждать только своих сотрудников'
+    return ''
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method = event.get('httpMethod', 'GET')
     if method == 'OPTIONS':
@@ -137,6 +163,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 email = (params.get('email') or '').strip()
                 if not email:
                     return _resp(400, {'error': 'email required'})
+                if params.get('mode') == 'count':
+                    # Для бейджа хватает числа — index-only по частичному индексу
+                    cur.execute(
+                        f"SELECT COUNT(*) AS c FROM {SCHEMA}.user_achievements WHERE LOWER(user_email) = %s AND seen_at IS NULL",
+                        (email.lower(),),
+                    )
+                    return _resp(200, {'count': cur.fetchone()['c']})
                 cur.execute(
                     f"""SELECT ua.id, ua.granted_by_email, ua.granted_by_name, ua.granted_at, ua.comment,
                                at.id AS type_id, at.title, at.description, at.emoji, at.color
@@ -233,18 +266,17 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 if not isinstance(ids, list):
                     return _resp(400, {'error': 'ids must be list'})
                 clean_ids = [int(x) for x in ids if str(x).isdigit()]
-                if clean_ids:
-                    cur.execute(
-                        f"DELETE FROM {SCHEMA}.producer_allowed_achievements WHERE achievement_type_id NOT IN %s",
-                        (tuple(clean_ids),),
-                    )
-                else:
-                    cur.execute(f"DELETE FROM {SCHEMA}.producer_allowed_achievements")
-                for tid in clean_ids:
-                    cur.execute(
-                        f"INSERT INTO {SCHEMA}.producer_allowed_achievements (achievement_type_id) VALUES (%s) ON CONFLICT DO NOTHING",
-                        (tid,),
-                    )
+                # Удаление лишних и вставка новых — один оператор
+                cur.execute(
+                    f"""WITH removed AS (
+                            DELETE FROM {SCHEMA}.producer_allowed_achievements
+                            WHERE achievement_type_id <> ALL(%s::int[])
+                        )
+                        INSERT INTO {SCHEMA}.producer_allowed_achievements (achievement_type_id)
+                        SELECT DISTINCT unnest(%s::int[])
+                        ON CONFLICT DO NOTHING""",
+                    (clean_ids, clean_ids),
+                )
                 conn.commit()
                 return _resp(200, {'success': True, 'allowed_ids': _list_allowed_ids(cur)})
 
@@ -257,12 +289,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 if not user_email or not type_id:
                     return _resp(400, {'error': 'user_email and type_id required'})
                 if is_producer:
-                    allowed = _list_allowed_ids(cur)
-                    if int(type_id) not in allowed:
-                        return _resp(403, {'error': 'this achievement is not allowed for producers'})
-                    team = _producer_team_emails(cur, actor.get('email') or '')
-                    if user_email not in team:
-                        return _resp(403, {'error': 'Можно награждать только своих сотрудников'})
+                    error = _producer_grant_error(cur, actor.get('email') or '', int(type_id), [user_email])
+                    if error:
+                        return _resp(403, {'error': error})
                 cur.execute(
                     f"INSERT INTO {SCHEMA}.user_achievements (user_email, achievement_type_id, granted_by_email, granted_by_name, comment) VALUES (%s, %s, %s, %s, %s) RETURNING id, granted_at",
                     (user_email, int(type_id), actor.get('email') or 'system', actor.get('full_name'), comment),
@@ -271,6 +300,32 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 conn.commit()
                 return _resp(200, {'success': True, 'id': row['id'], 'granted_at': row['granted_at']})
 
+            if action == 'grant_many':
+                if not (is_director or is_producer):
+                    return _resp(403, {'error': 'forbidden'})
+                emails = body.get('user_emails') or []
+                type_id = body.get('type_id')
+                comment = (body.get('comment') or '').strip() or None
+                if not isinstance(emails, list):
+                    return _resp(400, {'error': 'user_emails must be list'})
+                clean_emails = sorted({str(e).strip().lower() for e in emails if str(e).strip()})
+                if not clean_emails or not type_id:
+                    return _resp(400, {'error': 'user_emails and type_id required'})
+                if is_producer:
+                    error = _producer_grant_error(cur, actor.get('email') or '', int(type_id), clean_emails)
+                    if error:
+                        return _resp(403, {'error': error})
+                cur.execute(
+                    f"""INSERT INTO {SCHEMA}.user_achievements
+                            (user_email, achievement_type_id, granted_by_email, granted_by_name, comment)
+                        SELECT e, %s, %s, %s, %s FROM unnest(%s::text[]) AS e
+                        RETURNING id, user_email, granted_at""",
+                    (int(type_id), actor.get('email') or 'system', actor.get('full_name'), comment, clean_emails),
+                )
+                granted = [dict(r) for r in cur.fetchall()]
+                conn.commit()
+                return _resp(200, {'success': True, 'granted': granted})
+
             if action == 'mark_seen':
                 email = (body.get('user_email') or actor.get('email') or '').strip().lower()
                 ids = body.get('ids')
@@ -6,13 +6,36 @@ Returns: HTTP response with daily aggregated stats and platform summary
 import json
 import os
 from typing import Dict, Any
+from datetime import date, datetime
+from decimal import Decimal
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 SCHEMA = 't_p35405502_model_agency_website'
 ALLOWED_ROLES = ('director', 'producer')
 
 
+def json_default(value):
+    '''Decimal -> число, date/datetime -> ISO 8601; общий для orjson и stdlib json'''
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(obj) -> str:
+    '''JSON-тело ответа; orjson, если установлен, иначе stdlib json'''
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, default=json_default)
+
+
 def extract_token(headers):
     h = {k.lower(): v for k, v in headers.items()}
     token = h.get('x-auth-token', '')
@@ -189,39 +212,39 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'cb': int(row['cb_total'] or 0),
             'sp': int(row['sp_total'] or 0),
             'soda': int(row['soda_total'] or 0),
-            'cam4': float(row['cam4_total'] or 0),
-            'cbIncome': float(row['cb_income_total'] or 0),
-            'spIncome': float(row['sp_income_total'] or 0),
-            'sodaIncome': float(row['soda_income_total'] or 0),
-            'cam4Income': float(row['cam4_income_total'] or 0),
-            'transfers': float(row['transfers_total'] or 0)
+            'cam4': row['cam4_total'] or 0,
+            'cbIncome': row['cb_income_total'] or 0,
+            'spIncome': row['sp_income_total'] or 0,
+            'sodaIncome': row['soda_income_total'] or 0,
+            'cam4Income': row['cam4_income_total'] or 0,
+            'transfers': row['transfers_total'] or 0
         })
     
     platform_summary = [
         {
             'platform': 'Chaturbate',
-            'tokens': float(summary_row['cb_tokens'] or 0),
-            'income': float(summary_row['cb_income'] or 0)
+            'tokens': summary_row['cb_tokens'] or 0,
+            'income': summary_row['cb_income'] or 0
         },
         {
             'platform': 'Stripchat',
-            'tokens': float(summary_row['sp_tokens'] or 0),
-            'income': float(summary_row['sp_income'] or 0)
+            'tokens': summary_row['sp_tokens'] or 0,
+            'income': summary_row['sp_income'] or 0
         },
         {
             'platform': 'CamSoda',
-            'tokens': float(summary_row['soda_tokens'] or 0),
-            'income': float(summary_row['soda_income'] or 0)
+            'tokens': summary_row['soda_tokens'] or 0,
+            'income': summary_row['soda_income'] or 0
         },
         {
             'platform': 'Cam4',
-            'tokens': float(summary_row['cam4_tokens'] or 0),
-            'income': float(summary_row['cam4_income'] or 0)
+            'tokens': summary_row['cam4_tokens'] or 0,
+            'income': summary_row['cam4_income'] or 0
         },
         {
             'platform': 'Transfers',
             'tokens': 0,
-            'income': float(summary_row['transfers'] or 0)
+            'income': summary_row['transfers'] or 0
         }
     ]
     
@@ -244,6 +267,6 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'Access-Control-Allow-Origin': origin,
             'Access-Control-Allow-Credentials': 'true'
         },
-        'body': json.dumps(result),
+        'body': dumps(result),
         'isBase64Encoded': False
     }
\ No newline at end of file
@@ -1,15 +1,17 @@
 '''
 Аутентификация и управление пользователями с защитой через bcrypt и токены сессий
 Args: event с httpMethod (GET/POST/PUT/DELETE), headers с X-Auth-Token
+      DELETE ?id=N — удаление пользователя и всех его данных одним оператором;
+      DELETE ?id=N&mode=soft — мягкое удаление (скрыть сейчас, вычистить позже);
+      DELETE ?purge=1[&older_than_days=30] — дочистка мягко удалённых пачкой
 Returns: HTTP response с данными пользователя или статусом авторизации
 '''
 
 import json
 import os
 import secrets
-import bcrypt
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, FrozenSet
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
@@ -18,15 +20,48 @@ def get_db_connection():
     return psycopg2.connect(dsn, cursor_factory=RealDictCursor)
 
 def hash_password(password: str) -> str:
+    # bcrypt нужен только логину и смене пароля; GET/OPTIONS его не грузят
+    import bcrypt
     salt = bcrypt.gensalt()
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 def verify_password(password: str, password_hash: str) -> bool:
+    import bcrypt
     return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
 
 def generate_token() -> str:
     return secrets.token_urlsafe(32)
 
+PURGE_BATCH = 20
+
+# Все связанные данные и сам пользователь удаляются одним оператором (одна транзакция).
+# Принимает массивы, поэтому годится и для одного пользователя, и для пачки мягко удалённых.
+PURGE_USERS_SQL = """
+    WITH
+    d_tokens AS (DELETE FROM t_p35405502_model_agency_website.auth_tokens WHERE user_id = ANY(%(ids)s)),
+    d_sessions AS (DELETE FROM t_p35405502_model_agency_website.sessions WHERE user_id = ANY(%(ids)s)),
+    d_logins AS (DELETE FROM t_p35405502_model_agency_website.login_history WHERE user_id = ANY(%(ids)s)),
+    d_finances AS (DELETE FROM t_p35405502_model_agency_website.model_finances WHERE model_id = ANY(%(ids)s)),
+    d_accounts AS (DELETE FROM t_p35405502_model_agency_website.model_accounts WHERE model_id = ANY(%(ids)s)),
+    d_adjustments AS (DELETE FROM t_p35405502_model_agency_website.salary_adjustments WHERE email = ANY(%(emails)s)),
+    d_blocked AS (DELETE FROM t_p35405502_model_agency_website.blocked_dates WHERE created_by = ANY(%(emails)s)),
+    d_producer AS (
+        DELETE FROM t_p35405502_model_agency_website.producer_assignments
+        WHERE producer_email = ANY(%(emails)s) OR model_email = ANY(%(emails)s) OR operator_email = ANY(%(emails)s)
+    ),
+    d_operator AS (
+        DELETE FROM t_p35405502_model_agency_website.operator_model_assignments
+        WHERE operator_email = ANY(%(emails)s) OR model_email = ANY(%(emails)s)
+    ),
+    d_comments AS (DELETE FROM t_p35405502_model_agency_website.task_comments WHERE author_email = ANY(%(emails)s)),
+    d_tasks AS (
+        DELETE FROM t_p35405502_model_agency_website.tasks
+        WHERE assigned_to_email = ANY(%(emails)s) OR assigned_by_email = ANY(%(emails)s)
+    )
+    DELETE FROM t_p35405502_model_agency_website.users WHERE id = ANY(%(ids)s)
+    RETURNING id, email
+"""
+
 def parse_user_agent(ua: str) -> tuple:
     """Определяет устройство и браузер по User-Agent"""
     ua_low = (ua or '').lower()
@@ -78,6 +113,14 @@ def log_login(conn, event: Dict[str, Any], user_id: int, email: str, success: bo
     finally:
         cur.close()
 
+def compile_permissions(user: Dict[str, Any]) -> FrozenSet[str]:
+    """Собирает права пользователя (TEXT[]) в frozenset один раз на проверку токена"""
+    return frozenset(user.get('permissions') or ())
+
+def has_permissions(user: Dict[str, Any], *names: str) -> bool:
+    """Директор имеет все права; остальным нужны все перечисленные"""
+    return user['role'] == 'director' or user['permission_set'].issuperset(names)
+
 def verify_token(conn, token: str) -> Optional[Dict[str, Any]]:
     """Проверяет токен и возвращает данные пользователя"""
     if not token:
@@ -104,7 +147,11 @@ def verify_token(conn, token: str) -> Optional[Dict[str, Any]]:
             conn.rollback()
 
     cur.close()
-    return dict(user) if user else None
+    if not user:
+        return None
+    user = dict(user)
+    user['permission_set'] = compile_permissions(user)
+    return user
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
@@ -185,7 +232,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     }
                 
                 token = generate_token()
-                permissions = json.loads(user['permissions']) if user['permissions'] else []
+                permissions = list(user['permissions'] or [])
                 
                 # Сохраняем токен в базу
                 expires_at = datetime.now() + timedelta(days=7)
@@ -233,12 +280,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 role = body_data.get('role', 'content')
                 full_name = body_data.get('fullName', '')
                 
-                permissions = body_data.get('permissions', [])
-                permissions_json = json.dumps(permissions)
+                permissions = sorted({str(p) for p in body_data.get('permissions') or []})
                 
                 cur.execute(
                     "INSERT INTO users (email, password_hash, role, full_name, permissions) VALUES (%s, %s, %s, %s, %s) RETURNING id, email, role, full_name, is_active, permissions",
-                    (email, hash_password(password), role, full_name, permissions_json)
+                    (email, hash_password(password), role, full_name, permissions)
                 )
                 new_user = cur.fetchone()
                 conn.commit()
@@ -256,7 +302,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'role': new_user['role'],
                         'fullName': new_user['full_name'],
                         'isActive': new_user['is_active'],
-                        'permissions': json.loads(new_user['permissions']) if new_user['permissions'] else []
+                        'permissions': list(new_user['permissions'] or [])
                     })
                 }
         
@@ -279,18 +325,17 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             
             # Директор или пользователь с manage_users видит весь список
             # Обычные пользователи видят только свои данные + всех content_maker для работы
-            permissions = json.loads(user_data.get('permissions', '[]')) if user_data.get('permissions') else []
-            is_admin = user_data['role'] == 'director' or 'manage_users' in permissions
+            is_admin = has_permissions(user_data, 'manage_users')
             
             if is_admin:
                 # Директор и администраторы видят всех
-                cur.execute("SELECT id, email, role, full_name, is_active, permissions, created_at, photo_url, solo_percentage FROM users ORDER BY created_at DESC")
+                cur.execute("SELECT id, email, role, full_name, is_active, permissions, created_at, photo_url, solo_percentage FROM users WHERE deleted_at IS NULL ORDER BY created_at DESC")
             else:
                 # Обычные пользователи видят себя + всех content_maker/solo_maker для списка моделей + всех producer для отображения имени продюсера + всех operator для продюсера
                 cur.execute("""
                     SELECT id, email, role, full_name, is_active, permissions, created_at, photo_url, solo_percentage 
                     FROM users 
-                    WHERE email = %s OR role IN ('content_maker', 'solo_maker', 'producer', 'operator')
+                    WHERE deleted_at IS NULL AND (email = %s OR role IN ('content_maker', 'solo_maker', 'producer', 'operator'))
                     ORDER BY created_at DESC
                 """, (user_data['email'],))
             
@@ -309,7 +354,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'role': u['role'],
                     'fullName': u['full_name'],
                     'isActive': u['is_active'],
-                    'permissions': json.loads(u['permissions']) if u['permissions'] else [],
+                    'permissions': list(u['permissions'] or []),
                     'createdAt': u['created_at'].isoformat(),
                     'photoUrl': u.get('photo_url'),
                     'soloPercentage': u.get('solo_percentage')
@@ -336,9 +381,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'body': json.dumps({'error': 'Требуется авторизация'})
                 }
             
-            requesting_permissions = json.loads(user_data.get('permissions', '[]')) if user_data.get('permissions') else []
             is_director = user_data['role'] == 'director'
-            has_manage_users = 'manage_users' in requesting_permissions or is_director
+            has_manage_users = has_permissions(user_data, 'manage_users')
             
             if not has_manage_users:
                 return {
@@ -382,6 +426,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             if 'isActive' in body_data:
                 updates.append("is_active = %s")
                 params.append(body_data['isActive'])
+                # Повторная активация отменяет мягкое удаление: иначе пользователь скрыт из списка и попадёт под purge
+                if body_data['isActive']:
+                    updates.append("deleted_at = NULL")
             
             if 'photoUrl' in body_data:
                 updates.append("photo_url = %s")
@@ -405,7 +452,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     }
                 
                 updates.append("permissions = %s")
-                params.append(json.dumps(new_permissions))
+                params.append(sorted({str(p) for p in new_permissions}))
             
             if updates:
                 params.append(user_id)
@@ -427,7 +474,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'role': updated_user['role'],
                         'fullName': updated_user['full_name'],
                         'isActive': updated_user['is_active'],
-                        'permissions': json.loads(updated_user['permissions']) if updated_user['permissions'] else [],
+                        'permissions': list(updated_user['permissions'] or []),
                         'photoUrl': updated_user.get('photo_url'),
                         'soloPercentage': updated_user.get('solo_percentage')
                     })
@@ -436,8 +483,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         elif method == 'DELETE':
             query_params = event.get('queryStringParameters', {}) or {}
             user_id = query_params.get('id')
+            purge = query_params.get('purge') == '1'
             
-            if not user_id:
+            if not user_id and not purge:
                 return {
                     'statusCode': 400,
                     'headers': {
@@ -464,9 +512,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'body': json.dumps({'error': 'Требуется авторизация'})
                 }
             
-            requesting_permissions = json.loads(user_data.get('permissions', '[]')) if user_data.get('permissions') else []
             is_director = user_data['role'] == 'director'
-            has_manage_users = 'manage_users' in requesting_permissions or is_director
+            has_manage_users = has_permissions(user_data, 'manage_users')
             
             if not has_manage_users:
                 return {
@@ -479,6 +526,52 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'body': json.dumps({'error': 'Недостаточно прав для управления пользователями'})
                 }
             
+            if purge:
+                if not is_director:
+                    return {
+                        'statusCode': 403,
+                        'headers': {
+                            'Content-Type': 'application/json', 
+                            'Access-Control-Allow-Origin': origin,
+                            'Access-Control-Allow-Credentials': 'true'
+                        },
+                        'body': json.dumps({'error': 'Дочистку запускает только директор'})
+                    }
+                try:
+                    older_than_days = max(int(query_params.get('older_than_days') or 30), 0)
+                except ValueError:
+                    return {
+                        'statusCode': 400,
+                        'headers': {
+                            'Content-Type': 'application/json', 
+                            'Access-Control-Allow-Origin': origin,
+                            'Access-Control-Allow-Credentials': 'true'
+                        },
+                        'body': json.dumps({'error': 'older_than_days должен быть числом'})
+                    }
+                cur.execute(
+                    """SELECT id, email FROM t_p35405502_model_agency_website.users
+                       WHERE deleted_at IS NOT NULL AND deleted_at < NOW() - make_interval(days => %s)
+                         AND role <> 'director'
+                       ORDER BY id LIMIT %s""",
+                    (older_than_days, PURGE_BATCH)
+                )
+                batch = cur.fetchall()
+                purged = []
+                if batch:
+                    cur.execute(PURGE_USERS_SQL, {'ids': [u['id'] for u in batch], 'emails': [u['email'] for u in batch]})
+                    purged = [u['email'] for u in cur.fetchall()]
+                    conn.commit()
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json', 
+                        'Access-Control-Allow-Origin': origin,
+                        'Access-Control-Allow-Credentials': 'true'
+                    },
+                    'body': json.dumps({'success': True, 'purged': purged, 'has_more': len(batch) == PURGE_BATCH})
+                }
+            
             cur.execute("SELECT role, email FROM users WHERE id = %s", (int(user_id),))
             user = cur.fetchone()
             if not user:
@@ -505,25 +598,28 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             
             user_email = user['email']
             
-            # Удаляем все связанные данные пользователя (с указанием схемы)
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.auth_tokens WHERE user_id = %s", (user_id,))
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.model_finances WHERE model_id = %s", (user_id,))
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.salary_adjustments WHERE email = %s", (user_email,))
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.model_accounts WHERE model_id = %s", (user_id,))
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.blocked_dates WHERE created_by = %s", (user_email,))
-            
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.producer_assignments WHERE producer_email = %s", (user_email,))
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.producer_assignments WHERE model_email = %s", (user_email,))
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.producer_assignments WHERE operator_email = %s", (user_email,))
-            
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.operator_model_assignments WHERE operator_email = %s", (user_email,))
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.operator_model_assignments WHERE model_email = %s", (user_email,))
-            
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.sessions WHERE user_id = %s", (user_id,))
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.task_comments WHERE author_email = %s", (user_email,))
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.tasks WHERE assigned_to_email = %s OR assigned_by_email = %s", (user_email, user_email))
+            if query_params.get('mode') == 'soft':
+                # Пользователь сразу исчезает из списков и теряет доступ; данные дочищает purge
+                cur.execute(
+                    "UPDATE t_p35405502_model_agency_website.users SET is_active = false, deleted_at = CURRENT_TIMESTAMP WHERE id = %s",
+                    (int(user_id),)
+                )
+                cur.execute(
+                    "UPDATE t_p35405502_model_agency_website.auth_tokens SET is_active = false WHERE user_id = %s",
+                    (int(user_id),)
+                )
+                conn.commit()
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json', 
+                        'Access-Control-Allow-Origin': origin,
+                        'Access-Control-Allow-Credentials': 'true'
+                    },
+                    'body': json.dumps({'success': True, 'soft': True, 'message': f'Пользователь {user_email} отключён, данные будут удалены позже'})
+                }
             
-            cur.execute("DELETE FROM t_p35405502_model_agency_website.users WHERE id = %s", (user_id,))
+            cur.execute(PURGE_USERS_SQL, {'ids': [int(user_id)], 'emails': [user_email]})
             conn.commit()
             
             return {
@@ -1,12 +1,16 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, FrozenSet
 import os
 
 def get_db_connection():
     dsn = os.environ.get('DATABASE_URL')
     return psycopg2.connect(dsn, cursor_factory=RealDictCursor)
 
+def compile_permissions(user: Dict[str, Any]) -> FrozenSet[str]:
+    """Собирает права пользователя (TEXT[]) в frozenset один раз на проверку токена"""
+    return frozenset(user.get('permissions') or ())
+
 def verify_token(token: str) -> Optional[Dict[str, Any]]:
     """Проверяет токен и возвращает данные пользователя"""
     if not token:
@@ -36,7 +40,7 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
             'email': user['email'],
             'role': user['role'],
             'fullName': user['full_name'],
-            'permissions': user['permissions'],
+            'permissions': compile_permissions(user),
             'isActive': user['is_active']
         }
     finally:
@@ -75,16 +79,13 @@ def require_auth(event: Dict[str, Any]) -> Dict[str, Any]:
     
     return user
 
-def require_permission(user: Dict[str, Any], permission: str) -> Optional[Dict[str, Any]]:
+def has_permissions(user: Dict[str, Any], *permissions: str) -> bool:
+    """Директор имеет все права; остальным нужны все перечисленные"""
+    return user['role'] == 'director' or user['permissions'].issuperset(permissions)
+
+def require_permission(user: Dict[str, Any], *permissions: str) -> Optional[Dict[str, Any]]:
     """Проверяет наличие прав у пользователя"""
-    import json
-    
-    if user['role'] == 'director':
-        return None
-    
-    permissions = json.loads(user['permissions']) if user['permissions'] else []
-    
-    if permission not in permissions:
+    if not has_permissions(user, *permissions):
         return {
             'statusCode': 403,
             'headers': {
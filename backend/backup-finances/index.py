@@ -94,7 +94,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     operator_name, has_shift, created_at, updated_at,
                     transfers, stripchat_tokens,
                     cb_online, sp_online, soda_online,
-                    cam4_tokens, cam4_income
+                    cam4_tokens, cam4_income, operator_user_id
                 )
                 SELECT
                     id, model_id, date,
@@ -103,12 +103,21 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     operator_name, has_shift, created_at, updated_at,
                     transfers, stripchat_tokens,
                     cb_online, sp_online, soda_online,
-                    cam4_tokens, cam4_income
-                FROM t_p35405502_model_agency_website.model_finances_archive
+                    cam4_tokens, cam4_income,
+                    -- пользователь мог быть удалён после снимка: такая ссылка нарушила бы FK
+                    (SELECT u.id FROM t_p35405502_model_agency_website.users u WHERE u.id = a.operator_user_id)
+                FROM t_p35405502_model_agency_website.model_finances_archive a
                 WHERE snapshot_date = '{safe_date}'
             ''')
             restored = cur.rowcount
 
+            # Снимки до появления operator_user_id хранят только operator_name — ссылку восстанавливаем по нему
+            cur.execute('SELECT t_p35405502_model_agency_website.resolve_model_finances_operators()')
+
+            # model_earnings_totals пересобран триггерами (TRUNCATE обнулил, INSERT набрал заново);
+            # кэш дашборда statistics считался по прежним данным
+            cur.execute('DELETE FROM t_p35405502_model_agency_website.statistics_cache')
+
             cur.execute('''
                 SELECT setval(
                     pg_get_serial_sequence('t_p35405502_model_agency_website.model_finances','id'),
@@ -163,7 +172,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 operator_name, has_shift, created_at, updated_at,
                 transfers, stripchat_tokens,
                 cb_online, sp_online, soda_online,
-                cam4_tokens, cam4_income
+                cam4_tokens, cam4_income, operator_user_id
             )
             SELECT
                 CURRENT_DATE, CURRENT_TIMESTAMP, id, model_id, date,
@@ -172,7 +181,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 operator_name, has_shift, created_at, updated_at,
                 transfers, stripchat_tokens,
                 cb_online, sp_online, soda_online,
-                cam4_tokens, cam4_income
+                cam4_tokens, cam4_income, operator_user_id
             FROM t_p35405502_model_agency_website.model_finances
         ''')
         copied = cur.rowcount
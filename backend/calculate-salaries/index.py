@@ -1,11 +1,77 @@
+import base64
+import gzip
 import json
 import os
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from typing import Dict, Any, List
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 MAX_COMBINED_PCT = 35.0
+COMPRESS_MIN_BYTES = 1024
+FINANCE_AMOUNT_COLUMNS = ('cb_tokens', 'sp_tokens', 'soda_tokens', 'cam4_tokens',
+                          'cb_income', 'sp_income', 'soda_income', 'cam4_income', 'transfers')
+
+def json_default(value):
+    '''Decimal -> число, date/datetime -> ISO 8601; общий для orjson и stdlib json'''
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(obj) -> str:
+    '''JSON-тело ответа; orjson, если установлен, иначе stdlib json'''
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, default=json_default)
+
+
+def accepted_encodings(event) -> set:
+    '''Кодировки из Accept-Encoding, кроме явно запрещённых через q=0'''
+    headers = event.get('headers') or {}
+    value = next((v for k, v in headers.items() if k.lower() == 'accept-encoding'), '') or ''
+    accepted = set()
+    for part in value.split(','):
+        name, _, params = part.partition(';')
+        try:
+            q = float(params.split('=', 1)[1]) if '=' in params else 1.0
+        except ValueError:
+            q = 1.0
+        if name.strip() and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress_response(event, response):
+    '''Сжимает тело больше COMPRESS_MIN_BYTES в br или gzip, если клиент их принимает'''
+    body = response.get('body') or ''
+    if response.get('isBase64Encoded') or len(body) < COMPRESS_MIN_BYTES:
+        return response
+    accepted = accepted_encodings(event)
+    raw = body.encode('utf-8')
+    encoding, payload = None, None
+    if 'br' in accepted:
+        try:
+            import brotli
+            encoding, payload = 'br', brotli.compress(raw, quality=4)
+        except ImportError:
+            pass
+    if encoding is None and ('gzip' in accepted or '*' in accepted):
+        encoding, payload = 'gzip', gzip.compress(raw, compresslevel=5, mtime=0)
+    if encoding is None:
+        return response
+    headers = dict(response.get('headers') or {})
+    headers['Content-Encoding'] = encoding
+    headers['Vary'] = 'Accept-Encoding'
+    return {**response, 'headers': headers, 'body': base64.b64encode(payload).decode('ascii'), 'isBase64Encoded': True}
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
@@ -75,6 +141,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             WHERE u.role IN ('operator', 'content_maker', 'producer', 'solo_maker', 'director')
         """)
         users = cur.fetchall()
+        users_by_id = {u['user_id']: u for u in users}
         
         cur.execute(f"""
             SELECT 
@@ -84,7 +151,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 oma.operator_percentage,
                 u.id as model_user_id
             FROM {schema}.operator_model_assignments oma
-            JOIN {schema}.users u ON u.email = oma.model_email
+            JOIN {schema}.users u ON u.id = oma.model_user_id
         """)
         assignments = cur.fetchall()
         
@@ -110,8 +177,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 u1.id as model1_id,
                 u2.id as model2_id
             FROM {schema}.model_pairs mp
-            JOIN {schema}.users u1 ON u1.email = mp.model1_email
-            JOIN {schema}.users u2 ON u2.email = mp.model2_email
+            JOIN {schema}.users u1 ON u1.id = mp.model1_user_id
+            JOIN {schema}.users u2 ON u2.id = mp.model2_user_id
             WHERE mp.is_active = true
         """)
         model_pairs = cur.fetchall()
@@ -138,23 +205,14 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 mf.soda_income,
                 mf.cam4_income,
                 mf.transfers,
-                mf.operator_name
+                mf.operator_name,
+                mf.operator_user_id
             FROM {schema}.model_finances mf
             WHERE mf.date BETWEEN %s AND %s
         """, (period_start, period_end))
         all_finances = cur.fetchall()
         
-        finances = [f for f in all_finances if (
-            (float(f['cb_tokens'] or 0) > 0) or
-            (float(f['sp_tokens'] or 0) > 0) or
-            (float(f['soda_tokens'] or 0) > 0) or
-            (float(f['cam4_tokens'] or 0) > 0) or
-            (float(f['cb_income'] or 0) > 0) or
-            (float(f['sp_income'] or 0) > 0) or
-            (float(f['soda_income'] or 0) > 0) or
-            (float(f['cam4_income'] or 0) > 0) or
-            (float(f['transfers'] or 0) > 0)
-        )]
+        finances = [f for f in all_finances if any((f[c] or 0) > 0 for c in FINANCE_AMOUNT_COLUMNS)]
         
         print(f"DEBUG: period={period_start} to {period_end}, finances_count={len(finances)}")
         
@@ -169,7 +227,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         for finance in finances:
             model_id = finance['model_id']
-            operator_name = finance.get('operator_name', '').strip()
+            operator_name = (finance.get('operator_name') or '').strip()
+            operator_row_user = users_by_id.get(finance['operator_user_id'])
             
             pair_check = get_pair_for_model(model_id)
             print(f"DEBUG: Processing finance for model_id={model_id}, operator_name='{operator_name}', in_pair={pair_check is not None}")
@@ -212,13 +271,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
             # Продюсер сам сидит оператором на этой модели?
             producer_works_as_operator = False
-            if operator_name:
-                op_user_early = next(
-                    (u for u in users if u['email'] == operator_name or u['full_name'] == operator_name),
-                    None
-                )
-                if op_user_early and op_user_early['role'] == 'producer':
-                    producer_works_as_operator = True
+            if operator_row_user and operator_row_user['role'] == 'producer':
+                producer_works_as_operator = True
 
             # Итоговый процент продюсера с учётом лимита 35% на связку оператор+продюсер
             effective_producer_pct = None
@@ -279,7 +333,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                             producer_salaries[pair_producer_email_val] = {'email': pair_producer_email_val, 'total': 0, 'details': []}
                         producer_salaries[pair_producer_email_val]['total'] += pair_prod_salary
                         producer_salaries[pair_producer_email_val]['details'].append({
-                            'date': finance['date'].isoformat(),
+                            'date': finance['date'],
                             'model_id': model_id,
                             'model_email': model_email,
                             'amount': pair_prod_salary,
@@ -295,7 +349,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                                 operator_salaries[pair_operator_email] = {'email': pair_operator_email, 'total': 0, 'details': []}
                             operator_salaries[pair_operator_email]['total'] += pair_op_salary
                             operator_salaries[pair_operator_email]['details'].append({
-                                'date': finance['date'].isoformat(),
+                                'date': finance['date'],
                                 'model_id': model_id,
                                 'model_email': model_email,
                                 'amount': pair_op_salary,
@@ -307,7 +361,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                                 producer_salaries[pair_operator_email] = {'email': pair_operator_email, 'total': 0, 'details': []}
                             producer_salaries[pair_operator_email]['total'] += pair_op_salary
                             producer_salaries[pair_operator_email]['details'].append({
-                                'date': finance['date'].isoformat(),
+                                'date': finance['date'],
                                 'model_id': model_id,
                                 'model_email': model_email,
                                 'amount': pair_op_salary,
@@ -335,7 +389,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             
             director_pool += director_amount
             director_pool_details.append({
-                'date': finance['date'].isoformat(),
+                'date': finance['date'],
                 'model_id': model_id,
                 'model_email': model_email,
                 'amount': director_amount,
@@ -351,7 +405,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 # OLD LOGIC: resolve operator from finance row operator_name
                 if operator_name:
                     print(f"DEBUG: operator_name '{operator_name}' found in finance row for model_id={model_id}")
-                    operator_user = next((u for u in users if u['email'] == operator_name or u['full_name'] == operator_name), None)
+                    operator_user = operator_row_user
                     if operator_user:
                         assigned_operator_email = operator_user['email']
                         print(f"DEBUG: Found operator user {assigned_operator_email} with role {operator_user['role']}")
@@ -378,7 +432,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         producer_salaries[producer_operator_email] = {'email': producer_operator_email, 'total': 0, 'details': []}
                     producer_salaries[producer_operator_email]['total'] += combined_salary
                     producer_salaries[producer_operator_email]['details'].append({
-                        'date': finance['date'].isoformat(),
+                        'date': finance['date'],
                         'model_id': model_id,
                         'model_email': model_email,
                         'amount': combined_salary,
@@ -391,7 +445,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         operator_salaries[operator_email] = {'email': operator_email, 'total': 0, 'details': []}
                     operator_salaries[operator_email]['total'] += op_sal
                     operator_salaries[operator_email]['details'].append({
-                        'date': finance['date'].isoformat(),
+                        'date': finance['date'],
                         'model_id': model_id,
                         'amount': op_sal,
                         'check': total_check
@@ -408,7 +462,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     }
                 model_salaries[model_email]['total'] += model_salary
                 model_salaries[model_email]['details'].append({
-                    'date': finance['date'].isoformat(),
+                    'date': finance['date'],
                     'amount': model_salary,
                     'check': total_check
                 })
@@ -440,7 +494,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         if producer_email == producer_operator_email:
                             print(f"DEBUG: Producer {producer_email} already paid as operator, adding to details with 0 amount")
                             producer_salaries[producer_email]['details'].append({
-                                'date': finance['date'].isoformat(),
+                                'date': finance['date'],
                                 'model_id': model_id,
                                 'model_email': model_email,
                                 'amount': 0,
@@ -451,7 +505,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                             print(f"DEBUG: Adding salary for producer {producer_email}, amount={producer_salary_amount}, percentage={producer_percentage}%")
                             producer_salaries[producer_email]['total'] += producer_salary_amount
                             producer_salaries[producer_email]['details'].append({
-                                'date': finance['date'].isoformat(),
+                                'date': finance['date'],
                                 'model_id': model_id,
                                 'model_email': model_email,
                                 'amount': producer_salary_amount,
@@ -480,12 +534,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         print(f"DEBUG FINAL: operators={len(operator_salaries)}, models={len(model_salaries)}, producers={len(producer_salaries)}")
         print(f"DEBUG FINAL: producer_emails={list(producer_salaries.keys())}")
         
-        return {
+        return compress_response(event, {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
             'isBase64Encoded': False,
-            'body': json.dumps(result, default=str)
-        }
+            'body': dumps(result)
+        })
         
     except Exception as e:
         import traceback
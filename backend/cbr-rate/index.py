@@ -1,8 +1,6 @@
 # updated
 import json
 import time
-import urllib.request
-import xml.etree.ElementTree as ET
 from typing import Dict, Any, Optional, Tuple
 
 CACHE_TTL_SECONDS = 3600
@@ -80,6 +78,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             })
         }
 
+    # Сеть и XML-парсер нужны только при промахе кэша
+    import urllib.error
+    import urllib.request
+    import xml.etree.ElementTree as ET
+
     try:
         url = 'http://www.cbr.ru/scripts/XML_daily.asp'
         
@@ -1,7 +1,8 @@
 '''
 Business: CRUD-операции с графиком уборки + список новых назначений для оператора.
          GET без параметров — список всех записей.
-         GET ?pending_for=email — список ещё не показанных оператору назначений (для toast-уведомления).
+         GET ?pending_for=email — список ещё не показанных оператору назначений (для toast-уведомления);
+             читается из cleaning_assignees по индексу (LOWER(email), notified_at).
          GET ?operators_for=producer_email — список email'ов операторов, закреплённых за продюсером.
          POST {action: 'create'|'update'|'delete'|'mark_notified', ...}
 Args: event с httpMethod, body (JSON), queryStringParameters
@@ -44,6 +45,34 @@ def _list_to_emails(lst: List[str]) -> str:
     return ','.join([str(e).strip() for e in lst if str(e).strip()])
 
 
+def _sync_assignees(cur, rec_id: int, operators: List[str], producers: List[str]) -> List[str]:
+    '''Приводит cleaning_assignees к новым спискам; у оставшихся сохраняется notified_at.
+    Возвращает email'ы, которым уведомление уже показано'''
+    pairs = sorted(set(
+        [(e.lower(), 'operator') for e in operators] + [(e.lower(), 'producer') for e in producers]
+    ))
+    values = ', '.join(f"({rec_id}, '{_esc(email)}', '{role}')" for email, role in pairs)
+    if values:
+        cur.execute(f'''
+            DELETE FROM {SCHEMA}.cleaning_assignees
+            WHERE cleaning_id = {rec_id}
+              AND (email, role) NOT IN (SELECT email, role FROM (VALUES {values}) v(cleaning_id, email, role))
+        ''')
+        cur.execute(f'''
+            INSERT INTO {SCHEMA}.cleaning_assignees (cleaning_id, email, role)
+            VALUES {values}
+            ON CONFLICT (cleaning_id, email, role) DO NOTHING
+        ''')
+    else:
+        cur.execute(f'DELETE FROM {SCHEMA}.cleaning_assignees WHERE cleaning_id = {rec_id}')
+    cur.execute(f'''
+        SELECT DISTINCT email FROM {SCHEMA}.cleaning_assignees
+        WHERE cleaning_id = {rec_id} AND notified_at IS NOT NULL
+        ORDER BY email
+    ''')
+    return [r[0] for r in cur.fetchall()]
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method = event.get('httpMethod', 'GET')
 
@@ -90,27 +119,20 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             if pending_for:
                 safe_email = _esc(pending_for)
                 cur.execute(f'''
-                    SELECT id, cleaning_date::text AS cleaning_date,
-                           apartment_name, comment, operator_emails,
-                           created_by_email, notified_emails,
-                           is_general, producer_emails
-                    FROM {SCHEMA}.cleaning_schedule
-                    WHERE cleaning_date >= CURRENT_DATE
-                      AND (LOWER(operator_emails) LIKE '%{safe_email}%'
-                           OR LOWER(producer_emails) LIKE '%{safe_email}%')
-                      AND (notified_emails IS NULL OR LOWER(notified_emails) NOT LIKE '%{safe_email}%')
-                    ORDER BY cleaning_date ASC
+                    SELECT cs.id, cs.cleaning_date::text AS cleaning_date,
+                           cs.apartment_name, cs.comment, cs.operator_emails,
+                           cs.created_by_email, cs.notified_emails,
+                           cs.is_general, cs.producer_emails,
+                           CASE WHEN BOOL_OR(a.role = 'operator') THEN 'operator' ELSE 'producer' END AS role_match
+                    FROM {SCHEMA}.cleaning_assignees a
+                    JOIN {SCHEMA}.cleaning_schedule cs ON cs.id = a.cleaning_id
+                    WHERE LOWER(a.email) = '{safe_email}'
+                      AND a.notified_at IS NULL
+                      AND cs.cleaning_date >= CURRENT_DATE
+                    GROUP BY cs.id
+                    ORDER BY cs.cleaning_date ASC
                 ''')
-                rows = cur.fetchall()
-                pending = []
-                for r in rows:
-                    ops = [e.lower() for e in _emails_to_list(r['operator_emails'])]
-                    prods = [e.lower() for e in _emails_to_list(r.get('producer_emails') or '')]
-                    notified = [e.lower() for e in _emails_to_list(r.get('notified_emails') or '')]
-                    if (pending_for in ops or pending_for in prods) and pending_for not in notified:
-                        item = dict(r)
-                        item['role_match'] = 'producer' if pending_for in prods and pending_for not in ops else 'operator'
-                        pending.append(item)
+                pending = [dict(r) for r in cur.fetchall()]
                 cur.close()
                 return _resp(200, {'pending': pending})
 
@@ -165,6 +187,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 RETURNING id
             ''')
             new_id = cur.fetchone()[0]
+            _sync_assignees(cur, new_id, _emails_to_list(emails_str), _emails_to_list(producers_str))
 
             prefix = 'Генеральная уборка' if is_general else 'Уборка'
             for email in _emails_to_list(emails_str):
@@ -210,22 +233,21 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             producers_str = _list_to_emails(producer_emails)
 
             cur.execute(f'''
-                SELECT operator_emails, notified_emails, created_by_email, producer_emails
+                SELECT operator_emails, created_by_email, producer_emails
                 FROM {SCHEMA}.cleaning_schedule WHERE id = {int(rec_id)}
             ''')
             row = cur.fetchone()
             if not row:
                 return _resp(404, {'error': 'not found'})
             old_emails = set([e.lower() for e in _emails_to_list(row[0] or '')])
-            notified = set([e.lower() for e in _emails_to_list(row[1] or '')])
-            created_by = row[2] or ''
-            old_producers = set([e.lower() for e in _emails_to_list(row[3] or '')])
+            created_by = row[1] or ''
+            old_producers = set([e.lower() for e in _emails_to_list(row[2] or '')])
 
             new_set = set([e.lower() for e in _emails_to_list(emails_str)])
             added = new_set - old_emails
-            removed_notified = notified - new_set
-            kept_notified = notified - removed_notified
-            notified_str = _list_to_emails(sorted(kept_notified))
+            notified_str = _list_to_emails(
+                _sync_assignees(cur, int(rec_id), _emails_to_list(emails_str), _emails_to_list(producers_str))
+            )
 
             cur.execute(f'''
                 UPDATE {SCHEMA}.cleaning_schedule
@@ -282,6 +304,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             if not rec_id or not email:
                 return _resp(400, {'error': 'id and email required'})
 
+            cur.execute(f'''
+                UPDATE {SCHEMA}.cleaning_assignees
+                SET notified_at = CURRENT_TIMESTAMP
+                WHERE cleaning_id = {int(rec_id)} AND LOWER(email) = '{_esc(email)}' AND notified_at IS NULL
+            ''')
             cur.execute(f'''
                 SELECT notified_emails FROM {SCHEMA}.cleaning_schedule WHERE id = {int(rec_id)}
             ''')
@@ -1,9 +1,32 @@
 import json
 import os
 from typing import Dict, Any
+from datetime import date, datetime
+from decimal import Decimal
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_default(value):
+    '''Decimal -> число, date/datetime -> ISO 8601; общий для orjson и stdlib json'''
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(obj) -> str:
+    '''JSON-тело ответа; orjson, если установлен, иначе stdlib json'''
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, default=json_default)
+
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
@@ -58,26 +81,22 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 )
 
             rows = cur.fetchall()
-            result = []
-            total = 0.0
-            for row in rows:
-                amount = float(row['amount'])
-                total += amount
-                result.append({
-                    'id': row['id'],
-                    'user_email': row['user_email'],
-                    'user_role': row['user_role'],
-                    'period_start': row['period_start'].isoformat() if row['period_start'] else None,
-                    'period_end': row['period_end'].isoformat() if row['period_end'] else None,
-                    'amount': amount,
-                    'reason': row['reason'],
-                    'earned_at': row['earned_at'].isoformat() if row['earned_at'] else None,
-                })
+            result = [{
+                'id': row['id'],
+                'user_email': row['user_email'],
+                'user_role': row['user_role'],
+                'period_start': row['period_start'],
+                'period_end': row['period_end'],
+                'amount': row['amount'],
+                'reason': row['reason'],
+                'earned_at': row['earned_at'],
+            } for row in rows]
+            total = sum((row['amount'] for row in rows), Decimal(0))
 
             return {
                 'statusCode': 200,
                 'headers': cors_headers,
-                'body': json.dumps({'bonuses': result, 'total': total})
+                'body': dumps({'bonuses': result, 'total': total})
             }
 
         if method == 'POST':
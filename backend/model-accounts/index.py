@@ -1,16 +1,37 @@
 # updated
 import json
 import os
-import base64
+import hmac
+import hashlib
+import time
 import psycopg2
-from typing import Dict, Any
-from cryptography.fernet import Fernet
+from typing import Dict, Any, List, Tuple
 
-def get_cipher():
-    key = os.environ.get('ENCRYPTION_KEY', '')
-    if not key:
+ROTATION_BATCH = 200
+ROTATION_TIME_BUDGET = 20.0
+
+_ciphers: Dict[Tuple[str, ...], Any] = {}
+
+def get_keys() -> List[str]:
+    """ENCRYPTION_KEYS — ключи через запятую, первый основной; остальные только для чтения старых записей"""
+    raw = os.environ.get('ENCRYPTION_KEYS') or os.environ.get('ENCRYPTION_KEY', '')
+    keys = [k.strip() for k in raw.split(',') if k.strip()]
+    if not keys:
         raise ValueError('ENCRYPTION_KEY environment variable not set')
-    return Fernet(key.encode())
+    return keys
+
+def get_cipher():
+    keys = tuple(get_keys())
+    # Один экземпляр на набор ключей живёт, пока контейнер тёплый
+    cipher = _ciphers.get(keys)
+    if cipher is None:
+        # cryptography грузится лениво: OPTIONS и masked-список пароли не трогают
+        from cryptography.fernet import Fernet, MultiFernet
+        cipher = _ciphers[keys] = MultiFernet([Fernet(k.encode()) for k in keys])
+    return cipher
+
+def key_fingerprint() -> str:
+    return hashlib.sha256(get_keys()[0].encode()).hexdigest()[:16]
 
 def encrypt_password(password: str) -> str:
     if not password:
@@ -24,10 +45,60 @@ def decrypt_password(encrypted: str) -> str:
     cipher = get_cipher()
     return cipher.decrypt(encrypted.encode()).decode()
 
+def password_digest(password: str) -> str:
+    """HMAC пароля для сравнения без расшифровки; ключ секретный, поэтому перебор по базе бесполезен"""
+    if not password:
+        return ''
+    key = get_keys()[0]
+    return hmac.new(key.encode(), password.encode(), hashlib.sha256).hexdigest()
+
+def rotate_batch(conn, cur, after_id: int, limit: int) -> Tuple[int, int, int, int]:
+    """Перешифровывает одну пачку по id основным ключом; пачка и прогресс коммитятся вместе.
+    Строки пачки блокируются до коммита, чтобы параллельный PUT не был перезаписан старым паролем.
+    Возвращает (last_id, rotated, failed, fetched)"""
+    from cryptography.fernet import InvalidToken
+    cipher = get_cipher()
+    cur.execute(
+        "SELECT id, password FROM model_accounts WHERE id > %s ORDER BY id LIMIT %s FOR UPDATE",
+        (after_id, limit)
+    )
+    rows = cur.fetchall()
+    rotated = failed = 0
+    last_id = after_id
+    for row_id, encrypted_password in rows:
+        last_id = row_id
+        if not encrypted_password:
+            continue
+        try:
+            token = cipher.rotate(encrypted_password.encode()).decode()
+            digest = password_digest(cipher.decrypt(token.encode()).decode())
+        except InvalidToken:
+            failed += 1
+            continue
+        cur.execute(
+            "UPDATE model_accounts SET password = %s, password_digest = %s WHERE id = %s",
+            (token, digest, row_id)
+        )
+        rotated += 1
+    cur.execute("""
+        UPDATE model_accounts_key_rotation
+        SET last_id = %s, rotated_count = rotated_count + %s, failed_count = failed_count + %s,
+            updated_at = CURRENT_TIMESTAMP,
+            finished_at = CASE WHEN %s THEN CURRENT_TIMESTAMP ELSE NULL END
+        WHERE key_fingerprint = %s
+    """, (last_id, rotated, failed, len(rows) < limit, key_fingerprint()))
+    conn.commit()
+    return last_id, rotated, failed, len(rows)
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Manage model platform accounts (CRUD operations)
     Args: event with httpMethod, body, queryStringParameters
+          GET ?model_id=N[&mode=masked] — masked отдаёт логины без паролей (только has_password)
+          GET ?model_id=N&reveal=<platform> — расшифровывает пароль одной платформы
+          PUT: пароль без ключа "password" (или null) остаётся прежним
+          POST {"action": "rotate_keys"} — директор; перешифровка основным ключом пачками по id,
+          повторный вызов продолжает с места остановки
     Returns: HTTP response with account data
     '''
     method: str = event.get('httpMethod', 'GET')
@@ -73,6 +144,30 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'body': json.dumps({'error': 'model_id is required'})
                 }
             
+            reveal = params.get('reveal')
+            if reveal:
+                cur.execute(
+                    "SELECT login, password FROM model_accounts WHERE model_id = %s AND platform = %s",
+                    (int(model_id), reveal)
+                )
+                row = cur.fetchone()
+                if not row:
+                    return {
+                        'statusCode': 404,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
+                        'body': json.dumps({'error': 'Account not found'})
+                    }
+                login, encrypted_password = row
+                try:
+                    decrypted_password = decrypt_password(encrypted_password) if encrypted_password else ''
+                except:
+                    decrypted_password = encrypted_password or ''
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
+                    'body': json.dumps({'platform': reveal, 'login': login or '', 'password': decrypted_password})
+                }
+            
             cur.execute(
                 "SELECT platform, login, password FROM model_accounts WHERE model_id = %s",
                 (int(model_id),)
@@ -80,12 +175,16 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             
             rows = cur.fetchall()
             accounts = {}
-            for platform, login, encrypted_password in rows:
-                try:
-                    decrypted_password = decrypt_password(encrypted_password) if encrypted_password else ''
-                except:
-                    decrypted_password = encrypted_password or ''
-                accounts[platform] = {'login': login or '', 'password': decrypted_password}
+            if params.get('mode') == 'masked':
+                for platform, login, encrypted_password in rows:
+                    accounts[platform] = {'login': login or '', 'password': '', 'has_password': bool(encrypted_password)}
+            else:
+                for platform, login, encrypted_password in rows:
+                    try:
+                        decrypted_password = decrypt_password(encrypted_password) if encrypted_password else ''
+                    except:
+                        decrypted_password = encrypted_password or ''
+                    accounts[platform] = {'login': login or '', 'password': decrypted_password}
             
             return {
                 'statusCode': 200,
@@ -115,42 +214,38 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             
             for platform, credentials in accounts.items():
                 login = credentials.get('login', '')
-                password = credentials.get('password', '')
+                password = credentials.get('password')
                 
                 cur.execute(
-                    "SELECT login, password FROM model_accounts WHERE model_id = %s AND platform = %s",
+                    "SELECT login, password, password_digest FROM model_accounts WHERE model_id = %s AND platform = %s",
                     (int(model_id), platform)
                 )
                 result = cur.fetchone()
                 old_login = result[0] if result else None
                 old_encrypted_password = result[1] if result else None
+                old_digest = result[2] if result else None
                 
-                # Проверяем, изменился ли пароль
-                if old_encrypted_password:
-                    try:
-                        old_decrypted = decrypt_password(old_encrypted_password)
-                        # Если пароль не изменился, используем старый зашифрованный
-                        if password == old_decrypted:
-                            encrypted_password = old_encrypted_password
-                        else:
-                            # Пароль изменился, шифруем новый
-                            encrypted_password = encrypt_password(password) if password else ''
-                    except:
-                        # Если не удалось расшифровать старый, шифруем новый
-                        encrypted_password = encrypt_password(password) if password else ''
+                # Пароль сравниваем по HMAC, не расшифровывая старый; null — «не трогать»
+                if password is None:
+                    encrypted_password = old_encrypted_password or ''
+                    digest = old_digest
+                elif old_encrypted_password and old_digest and hmac.compare_digest(old_digest, password_digest(password)):
+                    encrypted_password = old_encrypted_password
+                    digest = old_digest
                 else:
-                    # Новая запись, шифруем пароль
                     encrypted_password = encrypt_password(password) if password else ''
+                    digest = password_digest(password) or None
                 
                 cur.execute("""
-                    INSERT INTO model_accounts (model_id, model_name, platform, login, password, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                    INSERT INTO model_accounts (model_id, model_name, platform, login, password, password_digest, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
                     ON CONFLICT (model_id, platform) 
                     DO UPDATE SET 
                         login = EXCLUDED.login,
                         password = EXCLUDED.password,
+                        password_digest = EXCLUDED.password_digest,
                         updated_at = CURRENT_TIMESTAMP
-                """, (int(model_id), model_name, platform, login, encrypted_password))
+                """, (int(model_id), model_name, platform, login, encrypted_password, digest))
                 
                 action = 'update' if old_login else 'create'
                 cur.execute("""
@@ -165,6 +260,68 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'body': json.dumps({'success': True, 'message': 'Accounts updated successfully'})
             }
         
+        elif method == 'POST':
+            body_data = json.loads(event.get('body') or '{}')
+            if body_data.get('action') != 'rotate_keys':
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
+                    'body': json.dumps({'error': 'Unknown action'})
+                }
+            if user_role != 'director':
+                return {
+                    'statusCode': 403,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
+                    'body': json.dumps({'error': 'Only director can rotate keys'})
+                }
+            
+            try:
+                batch_size = max(1, min(int(body_data.get('batch_size') or ROTATION_BATCH), 1000))
+            except (TypeError, ValueError):
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
+                    'body': json.dumps({'error': 'batch_size must be an integer'})
+                }
+            
+            # Каждая пачка — отдельная короткая транзакция, без долгих блокировок
+            conn.autocommit = False
+            fingerprint = key_fingerprint()
+            cur.execute(
+                "INSERT INTO model_accounts_key_rotation (key_fingerprint) VALUES (%s) ON CONFLICT (key_fingerprint) DO NOTHING",
+                (fingerprint,)
+            )
+            cur.execute(
+                "SELECT last_id, finished_at FROM model_accounts_key_rotation WHERE key_fingerprint = %s",
+                (fingerprint,)
+            )
+            last_id, finished_at = cur.fetchone()
+            conn.commit()
+            if body_data.get('restart'):
+                last_id, finished_at = 0, None
+            
+            started = time.monotonic()
+            rotated_total = failed_total = 0
+            has_more = finished_at is None
+            while has_more and time.monotonic() - started < ROTATION_TIME_BUDGET:
+                last_id, rotated, failed, fetched = rotate_batch(conn, cur, last_id, batch_size)
+                rotated_total += rotated
+                failed_total += failed
+                has_more = fetched == batch_size
+            
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
+                'body': json.dumps({
+                    'success': True,
+                    'key_fingerprint': fingerprint,
+                    'last_id': last_id,
+                    'rotated': rotated_total,
+                    'failed': failed_total,
+                    'has_more': has_more
+                })
+            }
+        
         return {
             'statusCode': 405,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
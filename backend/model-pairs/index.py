@@ -65,9 +65,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     mp.operator_email,
                     uop.full_name AS operator_name
                 FROM {SCHEMA}.model_pairs mp
-                LEFT JOIN {SCHEMA}.users u1 ON u1.email = mp.model1_email
-                LEFT JOIN {SCHEMA}.users u2 ON u2.email = mp.model2_email
-                LEFT JOIN {SCHEMA}.users uop ON uop.email = mp.operator_email
+                LEFT JOIN {SCHEMA}.users u1 ON u1.id = mp.model1_user_id
+                LEFT JOIN {SCHEMA}.users u2 ON u2.id = mp.model2_user_id
+                LEFT JOIN {SCHEMA}.users uop ON uop.id = mp.operator_user_id
                 WHERE mp.is_active = true
                 ORDER BY mp.created_at DESC
             """)
@@ -79,7 +79,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                                p.plan_type, p.plan_amount, p.bonus_amount
                         FROM {SCHEMA}.users u
                         LEFT JOIN {SCHEMA}.employee_plans p
-                          ON p.user_email = u.email
+                          ON p.user_id = u.id
                          AND p.period_start = %s AND p.period_end = %s
                         WHERE u.is_active = true AND u.role = ANY(%s)
                         ORDER BY u.role, u.full_name""",
@@ -68,15 +68,15 @@ def get_producer_stats(cursor, schema: str, producer_email: str, period_start: s
     cursor.execute(f'''
         SELECT DISTINCT u.email, u.full_name
         FROM {schema}.producer_assignments pa
-        JOIN {schema}.users u ON pa.model_email = u.email
+        JOIN {schema}.users u ON u.id = pa.model_user_id
         WHERE pa.producer_email = %s AND pa.assignment_type = 'model'
     ''', (producer_email,))
     models = cursor.fetchall()
     
     cursor.execute(f'''
-        SELECT DISTINCT u.email, u.full_name
+        SELECT DISTINCT u.id, u.email, u.full_name
         FROM {schema}.producer_assignments pa
-        JOIN {schema}.users u ON pa.operator_email = u.email
+        JOIN {schema}.users u ON u.id = pa.operator_user_id
         WHERE pa.producer_email = %s AND pa.assignment_type = 'operator'
     ''', (producer_email,))
     operators = cursor.fetchall()
@@ -93,7 +93,7 @@ def get_producer_stats(cursor, schema: str, producer_email: str, period_start: s
     
     operator_stats = []
     for operator in operators:
-        stats = get_operator_stats(cursor, schema, operator['email'], period_start, period_end)
+        stats = get_operator_stats(cursor, schema, operator['id'], period_start, period_end)
         stats['name'] = operator['full_name']
         stats['email'] = operator['email']
         operator_stats.append(stats)
@@ -111,7 +111,7 @@ def get_all_production_stats(cursor, schema: str, period_start: str, period_end:
     cursor.execute(f'''
         SELECT DISTINCT pa.producer_email, u.full_name
         FROM {schema}.producer_assignments pa
-        JOIN {schema}.users u ON pa.producer_email = u.email
+        JOIN {schema}.users u ON u.id = pa.producer_user_id
     ''')
     producers = cursor.fetchall()
     
@@ -223,20 +223,20 @@ def get_model_finance_stats(cursor, schema: str, model_email: str, period_start:
         'solo_percentage': solo_percentage
     }
 
-def get_operator_stats(cursor, schema: str, operator_email: str, period_start: str, period_end: str) -> Dict[str, Any]:
+def get_operator_stats(cursor, schema: str, operator_id: int, period_start: str, period_end: str) -> Dict[str, Any]:
     cursor.execute(f'''
         SELECT COUNT(DISTINCT date) as shift_count
         FROM {schema}.model_finances
-        WHERE operator_name = %s AND has_shift = true AND date >= %s AND date <= %s
-    ''', (operator_email, period_start, period_end))
+        WHERE operator_user_id = %s AND has_shift = true AND date >= %s AND date <= %s
+    ''', (operator_id, period_start, period_end))
     current = cursor.fetchone()
     
     prev_start, prev_end = get_previous_period_dates(period_start, period_end)
     cursor.execute(f'''
         SELECT COUNT(DISTINCT date) as shift_count
         FROM {schema}.model_finances
-        WHERE operator_name = %s AND has_shift = true AND date >= %s AND date <= %s
-    ''', (operator_email, prev_start, prev_end))
+        WHERE operator_user_id = %s AND has_shift = true AND date >= %s AND date <= %s
+    ''', (operator_id, prev_start, prev_end))
     previous = cursor.fetchone()
     
     return {
@@ -1,18 +1,34 @@
 '''
 Управление профилем пользователя: загрузка аватара в S3 и смена пароля с проверкой старого.
-Args: event с httpMethod (POST), body содержащим action ("upload_avatar" | "change_password") и нужные поля.
+Args: event с httpMethod (POST), body содержащим action ("upload_avatar" | "upload_cover" | "presign" | "confirm" | "change_password" | "backfill_variants") и нужные поля.
+      "presign" / "confirm" с kind ("avatar" | "cover") — прямая загрузка в хранилище по подписанному PUT-URL.
+      Файлы хранятся по SHA-256 содержимого, общие с галереей (image_blobs, ref_count).
 Returns: HTTP response с обновлёнными данными или ошибкой.
 '''
 
+import io
 import json
 import os
 import base64
-import uuid
-from typing import Dict, Any
+import hashlib
+import re
+from typing import Dict, Any, List, Optional, Tuple
 import psycopg2
 from psycopg2.extras import RealDictCursor
-import bcrypt
-import boto3
+
+
+VARIANT_SIZES = (64, 256, 1024)
+BACKFILL_BATCH = 20
+# kind -> префикс колонок users: photo_url / photo_variants / photo_hash
+UPLOAD_KINDS = {'avatar': 'photo', 'cover': 'cover'}
+
+# Endpoint и bucket переопределяются для локального S3 (MinIO, moto server)
+S3_ENDPOINT = os.environ.get('S3_ENDPOINT_URL', 'https://bucket.poehali.dev')
+S3_BUCKET = os.environ.get('S3_BUCKET', 'files')
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+PRESIGN_TTL = 600
+ALLOWED_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp'}
+BLOB_KEY_RE = re.compile(r'^images/([0-9a-f]{64})\.(jpg|png|webp)$')
 
 
 CORS_HEADERS = {
@@ -32,6 +48,7 @@ def _resp(status: int, body: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def _verify_password(plain: str, hashed: str) -> bool:
+    import bcrypt
     try:
         return bcrypt.checkpw(plain.encode('utf-8'), hashed.encode('utf-8'))
     except Exception:
@@ -39,6 +56,7 @@ def _verify_password(plain: str, hashed: str) -> bool:
 
 
 def _hash_password(password: str) -> str:
+    import bcrypt
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 
@@ -60,7 +78,8 @@ def _get_user_by_token(cur, headers: Dict[str, str]):
         return None
 
     cur.execute(
-        """SELECT u.id, u.email, u.password_hash, u.photo_url, u.cover_url
+        """SELECT u.id, u.email, u.role, u.password_hash, u.photo_url, u.cover_url,
+                  u.photo_variants, u.cover_variants, u.photo_hash, u.cover_hash
            FROM t_p35405502_model_agency_website.auth_tokens at
            JOIN t_p35405502_model_agency_website.users u ON at.user_id = u.id
            WHERE at.token = %s
@@ -72,34 +91,334 @@ def _get_user_by_token(cur, headers: Dict[str, str]):
     return cur.fetchone()
 
 
-def _upload_image_to_s3(image_b64: str, folder: str, user_id: int) -> str:
+_s3 = None
+
+
+def _s3_client():
+    '''Клиент создаётся один раз и переиспользуется тёплыми вызовами'''
+    global _s3
+    if _s3 is None:
+        # boto3 тяжёлый: импортируем только на путях, которые реально ходят в S3
+        import boto3
+        from botocore.config import Config
+        _s3 = boto3.client(
+            's3',
+            endpoint_url=S3_ENDPOINT,
+            aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
+            aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
+            config=Config(signature_version='s3v4'),
+        )
+    return _s3
+
+
+def _cdn_base() -> str:
+    return os.environ.get('S3_PUBLIC_URL') or f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket"
+
+
+def _cdn_url(key: str) -> str:
+    return f"{_cdn_base()}/{key}"
+
+
+def _key_from_url(url: str) -> Optional[str]:
+    base = _cdn_base() + '/'
+    if url and url.startswith(base):
+        return url[len(base):]
+    if not url or '/bucket/' not in url:
+        return None
+    return url.split('/bucket/', 1)[1]
+
+
+def _presign_put(s3, key: str, content_type: str, size: int) -> Dict[str, Any]:
+    '''Подписанный PUT: тип и точный размер входят в подпись, иначе хранилище отклонит запрос'''
+    url = s3.generate_presigned_url(
+        'put_object',
+        Params={'Bucket': S3_BUCKET, 'Key': key, 'ContentType': content_type, 'ContentLength': size},
+        ExpiresIn=PRESIGN_TTL,
+    )
+    return {
+        'upload_url': url,
+        'key': key,
+        'method': 'PUT',
+        'headers': {'Content-Type': content_type},
+        'expires_in': PRESIGN_TTL,
+        'max_bytes': MAX_UPLOAD_BYTES,
+    }
+
+
+def _validate_upload_request(body: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], int]:
+    '''Возвращает (ошибка, content_type, size) для запроса на подписанную ссылку'''
+    content_type = (body.get('content_type') or '').strip().lower()
+    try:
+        size = int(body.get('size') or 0)
+    except (TypeError, ValueError):
+        size = 0
+    if content_type not in ALLOWED_TYPES:
+        return 'Допустимы только JPEG, PNG и WebP', None, 0
+    if size <= 0 or size > MAX_UPLOAD_BYTES:
+        return f'Размер файла должен быть от 1 байта до {MAX_UPLOAD_BYTES // (1024 * 1024)} МБ', None, 0
+    return None, content_type, size
+
+
+def _read_uploaded(s3, key: str) -> bytes:
+    '''Проверяет загруженный по ссылке объект и читает его для генерации вариантов'''
+    head = s3.head_object(Bucket=S3_BUCKET, Key=key)
+    if head.get('ContentLength', 0) > MAX_UPLOAD_BYTES:
+        raise ValueError('Файл превышает допустимый размер')
+    if (head.get('ContentType') or '').lower() not in ALLOWED_TYPES:
+        raise ValueError('Недопустимый тип файла')
+    return s3.get_object(Bucket=S3_BUCKET, Key=key)['Body'].read()
+
+
+def _render_variants(data: bytes) -> Dict[int, bytes]:
+    '''Уменьшенные копии в WebP по длинной стороне; больше оригинала не растягиваем'''
+    from PIL import Image, ImageOps
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+
+    result: Dict[int, bytes] = {}
+    longest = max(img.size)
+    for size in VARIANT_SIZES:
+        if size > longest and size != VARIANT_SIZES[0]:
+            break
+        copy = img.copy()
+        copy.thumbnail((size, size), Image.LANCZOS)
+        buf = io.BytesIO()
+        copy.save(buf, 'WEBP', quality=82, method=4)
+        result[size] = buf.getvalue()
+    return result
+
+
+def _store_variants(s3, data: bytes, key: str) -> Dict[str, str]:
+    '''Кладёт варианты рядом с оригиналом: avatars/x.jpg -> avatars/x_w256.webp'''
+    base = key.rsplit('.', 1)[0]
+    variants: Dict[str, str] = {}
+    for size, blob in _render_variants(data).items():
+        variant_key = f'{base}_w{size}.webp'
+        s3.put_object(Bucket=S3_BUCKET, Key=variant_key, Body=blob, ContentType='image/webp')
+        variants[str(size)] = _cdn_url(variant_key)
+    return variants
+
+
+def _srcset(variants: Optional[Dict[str, str]]) -> str:
+    if not variants:
+        return ''
+    return ', '.join(f'{url} {size}w' for size, url in sorted(variants.items(), key=lambda kv: int(kv[0])))
+
+
+def _blob_key(sha: str, ext: str) -> str:
+    return f'images/{sha}.{ext}'
+
+
+def _detect_ext(data: bytes) -> str:
+    if data[:3] == b'\xff\xd8\xff':
+        return 'jpg'
+    if data[:4] == b'RIFF':
+        return 'webp'
+    return 'png'
+
+
+def _lock_blob(cur, sha: str) -> None:
+    '''Захват, освобождение и удаление объектов одного хэша идут по очереди до конца транзакции'''
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (sha,))
+
+
+def _reuse_blob(cur, sha: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    '''ref_count + 1 у существующего изображения; None, если строки нет'''
+    cur.execute(
+        "UPDATE t_p35405502_model_agency_website.image_blobs SET ref_count = ref_count + 1 "
+        "WHERE sha256 = %s RETURNING object_key, variants",
+        (sha,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    return _cdn_url(row['object_key']), row['variants'] or {}
+
+
+def _acquire_blob(cur, s3, sha: str, key: str, data: bytes, content_type: str,
+                  uploaded: bool) -> Tuple[str, Dict[str, str]]:
+    '''Берёт ссылку на изображение по хэшу: существующее — только ref_count + 1, новое — кладёт в хранилище'''
+    _lock_blob(cur, sha)
+    reused = _reuse_blob(cur, sha)
+    if reused:
+        return reused
+
+    if not uploaded:
+        s3.put_object(Bucket=S3_BUCKET, Key=key, Body=data, ContentType=content_type)
+    # Без вариантов изображение всё равно доступно — фронт откатится на оригинал
+    try:
+        variants = _store_variants(s3, data, key)
+    except Exception:
+        variants = {}
+
+    cur.execute(
+        "INSERT INTO t_p35405502_model_agency_website.image_blobs (sha256, object_key, content_type, size_bytes, variants, ref_count) "
+        "VALUES (%s, %s, %s, %s, %s, 1) "
+        "ON CONFLICT (sha256) DO UPDATE SET ref_count = t_p35405502_model_agency_website.image_blobs.ref_count + 1 "
+        "RETURNING object_key, variants",
+        (sha, key, content_type, len(data), json.dumps(variants)),
+    )
+    row = cur.fetchone()
+    return _cdn_url(row['object_key']), row['variants'] or {}
+
+
+def _release_blob(cur, sha: Optional[str]) -> List[str]:
+    '''Снимает ссылку; возвращает ключи объектов, которые можно удалить после коммита'''
+    if not sha:
+        return []
+    _lock_blob(cur, sha)
+    cur.execute(
+        "UPDATE t_p35405502_model_agency_website.image_blobs SET ref_count = ref_count - 1 WHERE sha256 = %s",
+        (sha,),
+    )
+    cur.execute(
+        "DELETE FROM t_p35405502_model_agency_website.image_blobs WHERE sha256 = %s AND ref_count <= 0 "
+        "RETURNING object_key, variants",
+        (sha,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return []
+    keys = [row['object_key']]
+    keys.extend(k for k in (_key_from_url(u) for u in (row['variants'] or {}).values()) if k)
+    return keys
+
+
+def _delete_objects(cur, conn, sha: Optional[str], keys: List[str]) -> None:
+    '''Удаляет объекты после коммита, если за это время тот же хэш не был загружен заново'''
+    if not keys:
+        return
+    # Блокировка держится до конца удаления: параллельный захват хэша дождётся его и загрузит файл снова
+    _lock_blob(cur, sha)
+    cur.execute("SELECT 1 FROM t_p35405502_model_agency_website.image_blobs WHERE sha256 = %s", (sha,))
+    if not cur.fetchone():
+        try:
+            _s3_client().delete_objects(
+                Bucket=S3_BUCKET,
+                Delete={'Objects': [{'Key': k} for k in keys], 'Quiet': True},
+            )
+        except Exception:
+            pass
+    conn.commit()
+
+
+def _store_image(cur, image_b64: str) -> Tuple[str, str, Dict[str, str]]:
+    '''Загрузка из base64: (sha256, url, variants)'''
     if ',' in image_b64:
         image_b64 = image_b64.split(',', 1)[1]
     data = base64.b64decode(image_b64)
+    ext = _detect_ext(data)
+    content_type = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp'}[ext]
+    sha = hashlib.sha256(data).hexdigest()
+    url, variants = _acquire_blob(cur, _s3_client(), sha, _blob_key(sha, ext), data, content_type, False)
+    return sha, url, variants
 
-    ext = 'png'
-    if data[:3] == b'\xff\xd8\xff':
-        ext = 'jpg'
-    elif data[:4] == b'\x89PNG':
-        ext = 'png'
-    elif data[:4] == b'RIFF':
-        ext = 'webp'
-
-    key = f'{folder}/{user_id}_{uuid.uuid4().hex}.{ext}'
-
-    s3 = boto3.client(
-        's3',
-        endpoint_url='https://bucket.poehali.dev',
-        aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-    )
+
+def _confirm_uploaded(cur, key: str) -> Tuple[str, str, Dict[str, str]]:
+    '''Фиксирует объект, загруженный по подписанной ссылке; содержимое обязано совпасть с хэшем в ключе'''
+    m = BLOB_KEY_RE.match(key)
+    if not m:
+        raise ValueError('Invalid key')
+    sha, ext = m.group(1), m.group(2)
     content_type = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp'}[ext]
-    s3.put_object(Bucket='files', Key=key, Body=data, ContentType=content_type)
-    return f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{key}"
+    s3 = _s3_client()
 
+    # Проверка и захват под одной блокировкой: строку не удалят между ними
+    _lock_blob(cur, sha)
+    reused = _reuse_blob(cur, sha)
+    if reused:
+        url, variants = reused
+        return sha, url, variants
 
-def _upload_avatar_to_s3(image_b64: str, user_id: int) -> str:
-    return _upload_image_to_s3(image_b64, 'avatars', user_id)
+    try:
+        data = _read_uploaded(s3, key)
+    except ValueError:
+        s3.delete_object(Bucket=S3_BUCKET, Key=key)
+        raise
+    except Exception:
+        # Файл мог быть удалён вместе с последней ссылкой после presign — клиент загрузит его заново
+        raise LookupError('Файл не найден, загрузите его заново')
+    if hashlib.sha256(data).hexdigest() != sha:
+        s3.delete_object(Bucket=S3_BUCKET, Key=key)
+        raise ValueError('Содержимое не совпадает с хэшем')
+    url, variants = _acquire_blob(cur, s3, sha, key, data, content_type, True)
+    return sha, url, variants
+
+
+def _presign_blob(cur, body: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+    '''Подписанная ссылка на images/<sha256>.<ext>; если такой файл уже есть — загрузка не нужна'''
+    error, content_type, size = _validate_upload_request(body)
+    if error:
+        return error, {}
+    sha = (body.get('sha256') or '').strip().lower()
+    if not re.fullmatch(r'[0-9a-f]{64}', sha):
+        return 'sha256 is required', {}
+
+    cur.execute("SELECT object_key FROM t_p35405502_model_agency_website.image_blobs WHERE sha256 = %s", (sha,))
+    row = cur.fetchone()
+    if row:
+        return None, {'exists': True, 'key': row['object_key']}
+    key = _blob_key(sha, ALLOWED_TYPES[content_type])
+    return None, {'exists': False, **_presign_put(_s3_client(), key, content_type, size)}
+
+
+def _backfill_variants(cur, conn, after_id: int, limit: int) -> Dict[str, Any]:
+    '''Догенерация вариантов аватаров и обложек пачками по id; ошибки помечаются пустым {} и
+    подбираются следующим проходом с after_id = 0. Готовые варианты берутся из image_blobs,
+    новые пишутся и туда'''
+    cur.execute(
+        """SELECT u.id, u.photo_url, u.cover_url, u.photo_variants, u.cover_variants,
+                  u.photo_hash, u.cover_hash,
+                  pb.variants AS photo_blob_variants, cb.variants AS cover_blob_variants
+           FROM t_p35405502_model_agency_website.users u
+           LEFT JOIN t_p35405502_model_agency_website.image_blobs pb ON pb.sha256 = u.photo_hash
+           LEFT JOIN t_p35405502_model_agency_website.image_blobs cb ON cb.sha256 = u.cover_hash
+           WHERE u.id > %s
+             AND ((u.photo_url IS NOT NULL AND (u.photo_variants IS NULL OR u.photo_variants = '{}'::jsonb))
+               OR (u.cover_url IS NOT NULL AND (u.cover_variants IS NULL OR u.cover_variants = '{}'::jsonb)))
+           ORDER BY u.id LIMIT %s""",
+        (after_id, limit),
+    )
+    rows = cur.fetchall()
+    s3 = _s3_client() if rows else None
+    done = failed = 0
+    last_id = after_id
+    for r in rows:
+        last_id = r['id']
+        for col in UPLOAD_KINDS.values():
+            if not r[f'{col}_url'] or r[f'{col}_variants']:
+                continue
+            variants = r[f'{col}_blob_variants']
+            if variants:
+                done += 1
+            else:
+                key = _key_from_url(r[f'{col}_url'])
+                try:
+                    data = s3.get_object(Bucket=S3_BUCKET, Key=key)['Body'].read()
+                    variants = _store_variants(s3, data, key)
+                    done += 1
+                except Exception:
+                    variants = {}
+                    failed += 1
+                # Иначе повторное использование блоба через _acquire_blob вернёт картинку без вариантов
+                if variants and r[f'{col}_hash']:
+                    cur.execute(
+                        "UPDATE t_p35405502_model_agency_website.image_blobs SET variants = %s WHERE sha256 = %s",
+                        (json.dumps(variants), r[f'{col}_hash']),
+                    )
+            cur.execute(
+                f"UPDATE t_p35405502_model_agency_website.users SET {col}_variants = %s WHERE id = %s",
+                (json.dumps(variants), r['id']),
+            )
+        conn.commit()
+    return {
+        'success': True,
+        'processed': done,
+        'failed': failed,
+        'last_id': last_id,
+        'has_more': len(rows) == limit,
+    }
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -129,7 +448,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             target_email = (body.get('email') or '').strip()
             if target_email and target_email.lower() != user['email'].lower():
                 cur.execute(
-                    """SELECT email, full_name, role, photo_url, cover_url, created_at, joined_at
+                    """SELECT email, full_name, role, photo_url, cover_url, photo_variants, cover_variants,
+                              created_at, joined_at
                        FROM t_p35405502_model_agency_website.users
                        WHERE LOWER(email) = LOWER(%s) AND is_active = true""",
                     (target_email,),
@@ -143,7 +463,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'full_name': target['full_name'],
                     'role': target['role'],
                     'photo_url': target['photo_url'],
+                    'photo_variants': target['photo_variants'] or {},
+                    'photo_srcset': _srcset(target['photo_variants']),
                     'cover_url': target['cover_url'],
+                    'cover_variants': target['cover_variants'] or {},
+                    'cover_srcset': _srcset(target['cover_variants']),
                     'created_at': target['created_at'].isoformat() if target['created_at'] else None,
                     'joined_at': target['joined_at'].isoformat() if target['joined_at'] else None,
                 })
@@ -160,7 +484,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'full_name': me.get('full_name'),
                 'role': me.get('role'),
                 'photo_url': user['photo_url'],
+                'photo_variants': user['photo_variants'] or {},
+                'photo_srcset': _srcset(user['photo_variants']),
                 'cover_url': user['cover_url'],
+                'cover_variants': user['cover_variants'] or {},
+                'cover_srcset': _srcset(user['cover_variants']),
                 'created_at': me['created_at'].isoformat() if me.get('created_at') else None,
                 'joined_at': me['joined_at'].isoformat() if me.get('joined_at') else None,
             })
@@ -210,37 +538,70 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             conn.commit()
             return _resp(200, {'success': True, 'joined_at': row['joined_at'].isoformat()})
 
-        if action == 'upload_cover':
+        if action in ('upload_avatar', 'upload_cover', 'confirm'):
+            if action == 'confirm':
+                kind = body.get('kind') or 'avatar'
+            else:
+                kind = 'avatar' if action == 'upload_avatar' else 'cover'
+            if kind not in UPLOAD_KINDS:
+                return _resp(400, {'error': 'Unknown kind'})
+            col = UPLOAD_KINDS[kind]
+
             image_b64 = body.get('image')
-            if not image_b64:
+            key = (body.get('key') or '').strip()
+            if action != 'confirm' and not image_b64:
                 return _resp(400, {'error': 'Image is required'})
+            if action == 'confirm' and not BLOB_KEY_RE.match(key):
+                return _resp(400, {'error': 'Invalid key'})
+
             try:
-                cover_url = _upload_image_to_s3(image_b64, 'covers', user['id'])
+                if action == 'confirm':
+                    sha, url, variants = _confirm_uploaded(cur, key)
+                else:
+                    sha, url, variants = _store_image(cur, image_b64)
+            except ValueError as e:
+                conn.rollback()
+                return _resp(400, {'error': str(e)})
+            except LookupError as e:
+                conn.rollback()
+                return _resp(409, {'error': str(e)})
             except Exception as e:
+                conn.rollback()
                 return _resp(500, {'error': f'Upload failed: {str(e)}'})
 
             cur.execute(
-                "UPDATE t_p35405502_model_agency_website.users SET cover_url = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
-                (cover_url, user['id']),
+                f"UPDATE t_p35405502_model_agency_website.users SET {col}_url = %s, {col}_variants = %s, "
+                f"{col}_hash = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                (url, json.dumps(variants), sha, user['id']),
             )
+            # Ссылка на прежнюю картинку снимается; для того же файла это просто возврат ref_count
+            orphaned = _release_blob(cur, user[f'{col}_hash'])
             conn.commit()
-            return _resp(200, {'success': True, 'cover_url': cover_url})
+            _delete_objects(cur, conn, user[f'{col}_hash'], orphaned)
+            return _resp(200, {
+                'success': True,
+                f'{col}_url': url,
+                f'{col}_variants': variants,
+                f'{col}_srcset': _srcset(variants),
+            })
 
-        if action == 'upload_avatar':
-            image_b64 = body.get('image')
-            if not image_b64:
-                return _resp(400, {'error': 'Image is required'})
+        if action == 'presign':
+            if (body.get('kind') or 'avatar') not in UPLOAD_KINDS:
+                return _resp(400, {'error': 'Unknown kind'})
+            error, result = _presign_blob(cur, body)
+            if error:
+                return _resp(400, {'error': error})
+            return _resp(200, {'success': True, **result})
+
+        if action == 'backfill_variants':
+            if user['role'] != 'director':
+                return _resp(403, {'error': 'Доступно только директору'})
             try:
-                photo_url = _upload_avatar_to_s3(image_b64, user['id'])
-            except Exception as e:
-                return _resp(500, {'error': f'Upload failed: {str(e)}'})
-
-            cur.execute(
-                "UPDATE t_p35405502_model_agency_website.users SET photo_url = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
-                (photo_url, user['id']),
-            )
-            conn.commit()
-            return _resp(200, {'success': True, 'photo_url': photo_url})
+                after_id = int(body.get('after_id') or 0)
+                limit = max(1, min(int(body.get('limit') or BACKFILL_BATCH), 100))
+            except (TypeError, ValueError):
+                return _resp(400, {'error': 'after_id and limit must be integers'})
+            return _resp(200, _backfill_variants(cur, conn, after_id, limit))
 
         if action == 'change_password':
             old_password = body.get('old_password') or ''
@@ -1,20 +1,92 @@
 # updated
 '''
 Business: Save and load model financial data from database
-Args: event with httpMethod, body (JSON array of daily finance records for POST), queryStringParameters (modelId, startDate, endDate for GET)
+Args: event with httpMethod, body (JSON array of daily finance records for POST, or action "backfill_operators" with after_id/limit), queryStringParameters (modelId, startDate, endDate for GET)
 Returns: HTTP response with success status or financial data
 '''
+import base64
+import gzip
 import json
 import os
 from typing import Dict, Any, List
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 import psycopg2
 from psycopg2.extras import execute_values, RealDictCursor
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 SCHEMA = 't_p35405502_model_agency_website'
 ALLOWED_ROLES = ('director', 'producer', 'operator', 'solo_maker')
+BACKFILL_BATCH = 1000
+COMPRESS_MIN_BYTES = 1024
+
+# operator_name хранит email или ФИО; email приоритетнее совпадения по имени
+RESOLVE_OPERATORS_SQL = f'''
+    SELECT DISTINCT ON (n.name) n.name, u.id
+    FROM unnest(%s::text[]) AS n(name)
+    JOIN {SCHEMA}.users u ON LOWER(u.email) = LOWER(n.name) OR u.full_name = n.name
+    ORDER BY n.name, (LOWER(u.email) = LOWER(n.name)) DESC, u.id
+'''
+
+
+def json_default(value):
+    '''Decimal -> число, date/datetime -> ISO 8601; общий для orjson и stdlib json'''
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
 
+def dumps(obj) -> str:
+    '''JSON-тело ответа; orjson, если установлен, иначе stdlib json'''
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, default=json_default)
+
+
+def accepted_encodings(event) -> set:
+    '''Кодировки из Accept-Encoding, кроме явно запрещённых через q=0'''
+    headers = event.get('headers') or {}
+    value = next((v for k, v in headers.items() if k.lower() == 'accept-encoding'), '') or ''
+    accepted = set()
+    for part in value.split(','):
+        name, _, params = part.partition(';')
+        try:
+            q = float(params.split('=', 1)[1]) if '=' in params else 1.0
+        except ValueError:
+            q = 1.0
+        if name.strip() and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress_response(event, response):
+    '''Сжимает тело больше COMPRESS_MIN_BYTES в br или gzip, если клиент их принимает'''
+    body = response.get('body') or ''
+    if response.get('isBase64Encoded') or len(body) < COMPRESS_MIN_BYTES:
+        return response
+    accepted = accepted_encodings(event)
+    raw = body.encode('utf-8')
+    encoding, payload = None, None
+    if 'br' in accepted:
+        try:
+            import brotli
+            encoding, payload = 'br', brotli.compress(raw, quality=4)
+        except ImportError:
+            pass
+    if encoding is None and ('gzip' in accepted or '*' in accepted):
+        encoding, payload = 'gzip', gzip.compress(raw, compresslevel=5, mtime=0)
+    if encoding is None:
+        return response
+    headers = dict(response.get('headers') or {})
+    headers['Content-Encoding'] = encoding
+    headers['Vary'] = 'Accept-Encoding'
+    return {**response, 'headers': headers, 'body': base64.b64encode(payload).decode('ascii'), 'isBase64Encoded': True}
 
 def extract_token(headers):
     h = {k.lower(): v for k, v in headers.items()}
@@ -54,6 +126,43 @@ def get_user_info(database_url, headers):
         conn.close()
 
 
+def resolve_operator_ids(cursor, names) -> Dict[str, int]:
+    '''Сопоставляет значения operator_name с users.id одним запросом'''
+    unique = sorted({(n or '').strip() for n in names} - {''})
+    if not unique:
+        return {}
+    cursor.execute(RESOLVE_OPERATORS_SQL, (unique,))
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def backfill_operators(conn, cursor, after_id: int, limit: int) -> Dict[str, Any]:
+    '''Проставляет operator_user_id историческим записям пачками по id'''
+    cursor.execute(f'''
+        SELECT id, operator_name
+        FROM {SCHEMA}.model_finances
+        WHERE id > %s AND operator_user_id IS NULL
+          AND operator_name IS NOT NULL AND operator_name <> ''
+        ORDER BY id LIMIT %s
+    ''', (after_id, limit))
+    rows = cursor.fetchall()
+    resolved = resolve_operator_ids(cursor, [r[1] for r in rows])
+    pairs = [(r[0], resolved[r[1].strip()]) for r in rows if r[1].strip() in resolved]
+    if pairs:
+        execute_values(cursor, f'''
+            UPDATE {SCHEMA}.model_finances mf SET operator_user_id = v.user_id
+            FROM (VALUES %s) AS v(id, user_id)
+            WHERE mf.id = v.id
+        ''', pairs)
+    conn.commit()
+    return {
+        'success': True,
+        'processed': len(rows),
+        'resolved': len(pairs),
+        'last_id': rows[-1][0] if rows else after_id,
+        'has_more': len(rows) == limit
+    }
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -150,45 +259,36 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         cursor.close()
         conn.close()
         
-        # Convert to frontend format
-        data = []
-        for row in rows:
-            date_obj = row['date']
-            # Explicitly convert Decimal to float for JSON serialization
-            def to_float(val):
-                if val is None:
-                    return 0
-                return float(val) if isinstance(val, Decimal) else float(val or 0)
-            
-            data.append({
-                'date': f"{date_obj.year}-{date_obj.month:02d}-{date_obj.day:02d}",
-                'cbTokens': to_float(row['cb_tokens']),
-                'spTokens': to_float(row['sp_tokens']),
-                'sodaTokens': to_float(row['soda_tokens']),
-                'cbIncome': to_float(row['cb_income']),
-                'spIncome': to_float(row['sp_income']),
-                'sodaIncome': to_float(row['soda_income']),
-                'cb': to_float(row['cb_online']),
-                'sp': to_float(row['sp_online']),
-                'soda': to_float(row['soda_online']),
-                'stripchatTokens': to_float(row['stripchat_tokens']),
-                'cam4Tokens': to_float(row['cam4_tokens']),
-                'cam4Income': to_float(row['cam4_income']),
-                'transfers': to_float(row['transfers']),
-                'operator': row['operator_name'] or '',
-                'shift': row['has_shift'] or False
-            })
+        # Convert to frontend format; Decimal и date сериализует dumps()
+        data = [{
+            'date': row['date'],
+            'cbTokens': row['cb_tokens'] or 0,
+            'spTokens': row['sp_tokens'] or 0,
+            'sodaTokens': row['soda_tokens'] or 0,
+            'cbIncome': row['cb_income'] or 0,
+            'spIncome': row['sp_income'] or 0,
+            'sodaIncome': row['soda_income'] or 0,
+            'cb': row['cb_online'] or 0,
+            'sp': row['sp_online'] or 0,
+            'soda': row['soda_online'] or 0,
+            'stripchatTokens': row['stripchat_tokens'] or 0,
+            'cam4Tokens': row['cam4_tokens'] or 0,
+            'cam4Income': row['cam4_income'] or 0,
+            'transfers': row['transfers'] or 0,
+            'operator': row['operator_name'] or '',
+            'shift': row['has_shift'] or False
+        } for row in rows]
         
-        return {
+        return compress_response(event, {
             'statusCode': 200,
             'headers': {
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': origin,
                 'Access-Control-Allow-Credentials': 'true'
             },
-            'body': json.dumps(data),
+            'body': dumps(data),
             'isBase64Encoded': False
-        }
+        })
     
     # POST: Save financial data
     if method != 'POST':
@@ -204,6 +304,39 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
     
     body_data = json.loads(event.get('body', '{}'))
+
+    if isinstance(body_data, dict) and body_data.get('action') == 'backfill_operators':
+        if user_role != 'director':
+            return {
+                'statusCode': 403,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': origin,
+                    'Access-Control-Allow-Credentials': 'true'
+                },
+                'body': json.dumps({'error': 'Доступно только директору'}),
+                'isBase64Encoded': False
+            }
+        after_id = int(body_data.get('after_id') or 0)
+        limit = max(1, min(int(body_data.get('limit') or BACKFILL_BATCH), 5000))
+        conn = psycopg2.connect(database_url)
+        cursor = conn.cursor()
+        try:
+            result = backfill_operators(conn, cursor, after_id, limit)
+        finally:
+            cursor.close()
+            conn.close()
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': origin,
+                'Access-Control-Allow-Credentials': 'true'
+            },
+            'body': json.dumps(result),
+            'isBase64Encoded': False
+        }
+
     model_id: int = body_data.get('modelId')
     finance_data: List[Dict[str, Any]] = body_data.get('data', [])
     
@@ -224,7 +357,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     conn = psycopg2.connect(database_url)
     cursor = conn.cursor()
-    
+
+    operator_ids = resolve_operator_ids(cursor, [r.get('operator', '') for r in finance_data])
+
     # Prepare data for bulk upsert
     values = []
     for record in finance_data:
@@ -252,6 +387,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             r2(record.get('cam4Income', 0)),
             r2(record.get('transfers', 0)),
             record.get('operator', ''),
+            operator_ids.get((record.get('operator') or '').strip()),
             bool(record.get('shift', False))
         ))
     
@@ -260,7 +396,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         INSERT INTO t_p35405502_model_agency_website.model_finances 
         (model_id, date, cb_tokens, sp_tokens, soda_tokens, 
          cb_income, sp_income, soda_income, cb_online, sp_online, soda_online,
-         stripchat_tokens, cam4_tokens, cam4_income, transfers, operator_name, has_shift, updated_at)
+         stripchat_tokens, cam4_tokens, cam4_income, transfers, operator_name, operator_user_id, has_shift, updated_at)
         VALUES %s
         ON CONFLICT (model_id, date) 
         DO UPDATE SET
@@ -278,11 +414,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             cam4_income = EXCLUDED.cam4_income,
             transfers = EXCLUDED.transfers,
             operator_name = EXCLUDED.operator_name,
+            operator_user_id = EXCLUDED.operator_user_id,
             has_shift = EXCLUDED.has_shift,
             updated_at = CURRENT_TIMESTAMP
     '''
     
-    execute_values(cursor, query, values, template='(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)')
+    execute_values(cursor, query, values, template='(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)')
     conn.commit()
 
     try:
@@ -292,6 +429,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         print(f'MV refresh failed (non-critical): {refresh_err}')
         conn.rollback()
 
+    # Сбрасываем кэш дашборда после обновления MV, чтобы statistics пересчитал свежие данные
+    cursor.execute(f'DELETE FROM {SCHEMA}.statistics_cache')
+    conn.commit()
+
     cursor.close()
     conn.close()
     
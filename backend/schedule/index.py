@@ -6,6 +6,8 @@ Args: event with httpMethod (GET/POST/PUT), body, queryStringParameters
 Returns: HTTP response with schedule data
 '''
 
+import base64
+import gzip
 import json
 import os
 from typing import Dict, Any
@@ -13,6 +15,47 @@ from datetime import datetime, timedelta
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+COMPRESS_MIN_BYTES = 1024
+
+def accepted_encodings(event) -> set:
+    '''Кодировки из Accept-Encoding, кроме явно запрещённых через q=0'''
+    headers = event.get('headers') or {}
+    value = next((v for k, v in headers.items() if k.lower() == 'accept-encoding'), '') or ''
+    accepted = set()
+    for part in value.split(','):
+        name, _, params = part.partition(';')
+        try:
+            q = float(params.split('=', 1)[1]) if '=' in params else 1.0
+        except ValueError:
+            q = 1.0
+        if name.strip() and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress_response(event, response):
+    '''Сжимает тело больше COMPRESS_MIN_BYTES в br или gzip, если клиент их принимает'''
+    body = response.get('body') or ''
+    if response.get('isBase64Encoded') or len(body) < COMPRESS_MIN_BYTES:
+        return response
+    accepted = accepted_encodings(event)
+    raw = body.encode('utf-8')
+    encoding, payload = None, None
+    if 'br' in accepted:
+        try:
+            import brotli
+            encoding, payload = 'br', brotli.compress(raw, quality=4)
+        except ImportError:
+            pass
+    if encoding is None and ('gzip' in accepted or '*' in accepted):
+        encoding, payload = 'gzip', gzip.compress(raw, compresslevel=5, mtime=0)
+    if encoding is None:
+        return response
+    headers = dict(response.get('headers') or {})
+    headers['Content-Encoding'] = encoding
+    headers['Vary'] = 'Accept-Encoding'
+    return {**response, 'headers': headers, 'body': base64.b64encode(payload).decode('ascii'), 'isBase64Encoded': True}
+
 def get_db_connection():
     dsn = os.environ.get('DATABASE_URL')
     return psycopg2.connect(dsn, cursor_factory=RealDictCursor)
@@ -175,12 +218,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     }
                 })
             
-            return {
+            return compress_response(event, {
                 'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
                 'isBase64Encoded': False,
                 'body': json.dumps(schedule_dict)
-            }
+            })
         
         elif method == 'POST':
             cleanup_old_schedules(cur)
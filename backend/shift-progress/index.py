@@ -79,6 +79,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         conn.close()
         return {'statusCode': 403, 'headers': cors_headers, 'body': json.dumps({'error': 'Нет доступа к данным другого сотрудника'})}
 
+    cur.execute(f"SELECT id FROM {schema}.users WHERE LOWER(email) = LOWER(%s) LIMIT 1", (user_email,))
+    target = cur.fetchone()
+    user_id = target['id'] if target else None
+
     def lock_bonus(email: str, role: str, amount: float, reason: str):
         try:
             cur.execute(
@@ -137,9 +141,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             f"""SELECT COUNT(*) AS c
                 FROM {schema}.model_finances
                 WHERE has_shift = true
-                  AND LOWER(operator_name) = LOWER(%s)
+                  AND operator_user_id = %s
                   AND date >= %s AND date <= %s""",
-            (user_email, period_start, period_end)
+            (user_id, period_start, period_end)
         )
         shifts_count = int(cur.fetchone()['c'] or 0)
 
@@ -326,9 +330,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     + COALESCE(cam4_income,0) + COALESCE(transfers,0)
                 ), 0) AS total
                 FROM {schema}.model_finances
-                WHERE LOWER(operator_name) = LOWER(%s)
+                WHERE operator_user_id = %s
                   AND date >= %s AND date <= %s""",
-            (user_email, period_start, period_end)
+            (user_id, period_start, period_end)
         )
         income_fact = float(cur.fetchone()['total'] or 0.0)
     else:
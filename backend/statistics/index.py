@@ -12,10 +12,72 @@ from typing import Dict, Any
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+SCHEMA = 't_p35405502_model_agency_website'
+CACHE_KEY = 'dashboard'
+CACHE_TTL_SECONDS = 60
+
 def get_db_connection():
     dsn = os.environ.get('DATABASE_URL')
     return psycopg2.connect(dsn, cursor_factory=RealDictCursor)
 
+def build_statistics(cur) -> Dict[str, Any]:
+    '''Собирает payload дашборда; рейтинг берётся из model_earnings_totals'''
+    cur.execute(f"""
+        SELECT 
+            u.id,
+            u.full_name as name,
+            COALESCE(t.earnings, 0) as earnings
+        FROM {SCHEMA}.users u
+        LEFT JOIN {SCHEMA}.model_earnings_totals t ON t.model_id = u.id
+        WHERE u.role = 'content_maker'
+        ORDER BY earnings DESC
+        LIMIT 10
+    """)
+    model_performance = [dict(row) for row in cur.fetchall()]
+    
+    cur.execute(f"""
+        SELECT 
+            TO_CHAR(month_start, 'Mon') as month,
+            COALESCE(total_revenue, 0) as revenue,
+            COALESCE(shift_count, 0) as bookings
+        FROM {SCHEMA}.mv_model_finances_monthly
+        WHERE month_start >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '6 months')
+        ORDER BY month_start ASC
+    """)
+    monthly_revenue = [dict(row) for row in cur.fetchall()]
+    
+    cur.execute(f"""
+        SELECT 
+            mf.date::text as date,
+            u.full_name as model,
+            'Смена' as project,
+            COALESCE((mf.cb_income::numeric + mf.sp_income::numeric + mf.soda_income::numeric + mf.cam4_income::numeric), 0) as amount,
+            CASE WHEN mf.has_shift THEN 'Paid' ELSE 'Pending' END as status
+        FROM {SCHEMA}.model_finances mf
+        JOIN {SCHEMA}.users u ON u.id = mf.model_id
+        WHERE mf.date >= CURRENT_DATE - INTERVAL '30 days'
+        AND (mf.cb_income::numeric + mf.sp_income::numeric + mf.soda_income::numeric + mf.cam4_income::numeric) > 0
+        ORDER BY mf.date DESC
+        LIMIT 20
+    """)
+    transactions = [dict(row) for row in cur.fetchall()]
+    
+    for t in transactions:
+        t['id'] = hash(t['date'] + t['model'])
+        t['amount'] = float(t['amount'])
+    
+    for mp in model_performance:
+        mp['earnings'] = float(mp['earnings'])
+    
+    for mr in monthly_revenue:
+        mr['revenue'] = float(mr['revenue'])
+    
+    return {
+        'modelPerformance': model_performance,
+        'monthlyRevenue': monthly_revenue,
+        'transactions': transactions
+    }
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -46,65 +108,32 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     cur = conn.cursor()
     
     try:
-        cur.execute("""
-            SELECT 
-                u.id,
-                u.full_name as name,
-                COALESCE(SUM((mf.cb_income::numeric + mf.sp_income::numeric + mf.soda_income::numeric + mf.cam4_income::numeric)), 0) as earnings
-            FROM t_p35405502_model_agency_website.users u
-            LEFT JOIN t_p35405502_model_agency_website.model_finances mf ON u.id = mf.model_id
-            WHERE u.role = 'content_maker'
-            GROUP BY u.id, u.full_name
-            ORDER BY earnings DESC
-            LIMIT 10
-        """)
-        model_performance = [dict(row) for row in cur.fetchall()]
-        
-        cur.execute("""
-            SELECT 
-                TO_CHAR(month_start, 'Mon') as month,
-                COALESCE(total_revenue, 0) as revenue,
-                COALESCE(shift_count, 0) as bookings
-            FROM t_p35405502_model_agency_website.mv_model_finances_monthly
-            WHERE month_start >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '6 months')
-            ORDER BY month_start ASC
-        """)
-        monthly_revenue = [dict(row) for row in cur.fetchall()]
-        
-        cur.execute("""
-            SELECT 
-                mf.date::text as date,
-                u.full_name as model,
-                'Смена' as project,
-                COALESCE((mf.cb_income::numeric + mf.sp_income::numeric + mf.soda_income::numeric + mf.cam4_income::numeric), 0) as amount,
-                CASE WHEN mf.has_shift THEN 'Paid' ELSE 'Pending' END as status
-            FROM t_p35405502_model_agency_website.model_finances mf
-            JOIN t_p35405502_model_agency_website.users u ON u.id = mf.model_id
-            WHERE mf.date >= CURRENT_DATE - INTERVAL '30 days'
-            AND (mf.cb_income::numeric + mf.sp_income::numeric + mf.soda_income::numeric + mf.cam4_income::numeric) > 0
-            ORDER BY mf.date DESC
-            LIMIT 20
-        """)
-        transactions = [dict(row) for row in cur.fetchall()]
-        
-        for t in transactions:
-            t['id'] = hash(t['date'] + t['model'])
-            t['amount'] = float(t['amount'])
-        
-        for mp in model_performance:
-            mp['earnings'] = float(mp['earnings'])
-        
-        for mr in monthly_revenue:
-            mr['revenue'] = float(mr['revenue'])
-        
+        cur.execute(f"""
+            SELECT payload
+            FROM {SCHEMA}.statistics_cache
+            WHERE cache_key = %s AND computed_at > NOW() - make_interval(secs => %s)
+        """, (CACHE_KEY, CACHE_TTL_SECONDS))
+        cached = cur.fetchone()
+        if cached:
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true', 'X-Cache': 'HIT'},
+                'body': json.dumps(cached['payload'])
+            }
+
+        payload = build_statistics(cur)
+
+        cur.execute(f"""
+            INSERT INTO {SCHEMA}.statistics_cache (cache_key, payload, computed_at)
+            VALUES (%s, %s, NOW())
+            ON CONFLICT (cache_key) DO UPDATE SET payload = EXCLUDED.payload, computed_at = EXCLUDED.computed_at
+        """, (CACHE_KEY, json.dumps(payload)))
+        conn.commit()
+
         return {
             'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true'},
-            'body': json.dumps({
-                'modelPerformance': model_performance,
-                'monthlyRevenue': monthly_revenue,
-                'transactions': transactions
-            })
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Credentials': 'true', 'X-Cache': 'MISS'},
+            'body': json.dumps(payload)
         }
     
     except Exception as e:
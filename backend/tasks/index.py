@@ -1,12 +1,44 @@
 # updated
 '''Управление задачами и комментариями — директор назначает всем, продюсер только своим операторам'''
 
+import base64
+import gzip
 import json
 import os
 import psycopg2
+from datetime import datetime
 from typing import Dict, Any
 
 SCHEMA = 't_p35405502_model_agency_website'
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Параметр запроса -> колонка фильтра списка
+LIST_FILTERS = {
+    'status': 't.status',
+    'priority': 't.priority',
+    'assignee': 't.assigned_to_email',
+}
+COMPRESS_MIN_BYTES = 1024
+PURGE_BATCH = 500
+PURGE_MAX_BATCHES = 40
+
+# Пачка выполненных задач выбирается и удаляется вместе с комментариями одним оператором на сервере;
+# olderThanDays (NULL — без ограничения) считает от completed_at, а у старых записей без него — от updated_at
+PURGE_COMPLETED_SQL = f'''
+    WITH batch AS (
+        SELECT id FROM {SCHEMA}.tasks
+        WHERE status = 'completed'
+          AND (%(older_than_days)s::int IS NULL
+               OR COALESCE(completed_at, updated_at) < NOW() - make_interval(days => %(older_than_days)s::int))
+        ORDER BY id
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    ),
+    d_comments AS (
+        DELETE FROM {SCHEMA}.task_comments c USING batch b WHERE c.task_id = b.id
+    )
+    DELETE FROM {SCHEMA}.tasks t USING batch b WHERE t.id = b.id
+'''
 
 
 def get_cors_headers(event):
@@ -22,11 +54,51 @@ def get_cors_headers(event):
 
 
 def resp(event, status, body):
-    return {
+    return compress_response(event, {
         'statusCode': status,
         'headers': get_cors_headers(event),
         'body': json.dumps(body, default=str)
-    }
+    })
+
+
+def accepted_encodings(event) -> set:
+    '''Кодировки из Accept-Encoding, кроме явно запрещённых через q=0'''
+    headers = event.get('headers') or {}
+    value = next((v for k, v in headers.items() if k.lower() == 'accept-encoding'), '') or ''
+    accepted = set()
+    for part in value.split(','):
+        name, _, params = part.partition(';')
+        try:
+            q = float(params.split('=', 1)[1]) if '=' in params else 1.0
+        except ValueError:
+            q = 1.0
+        if name.strip() and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress_response(event, response):
+    '''Сжимает тело больше COMPRESS_MIN_BYTES в br или gzip, если клиент их принимает'''
+    body = response.get('body') or ''
+    if response.get('isBase64Encoded') or len(body) < COMPRESS_MIN_BYTES:
+        return response
+    accepted = accepted_encodings(event)
+    raw = body.encode('utf-8')
+    encoding, payload = None, None
+    if 'br' in accepted:
+        try:
+            import brotli
+            encoding, payload = 'br', brotli.compress(raw, quality=4)
+        except ImportError:
+            pass
+    if encoding is None and ('gzip' in accepted or '*' in accepted):
+        encoding, payload = 'gzip', gzip.compress(raw, compresslevel=5, mtime=0)
+    if encoding is None:
+        return response
+    headers = dict(response.get('headers') or {})
+    headers['Content-Encoding'] = encoding
+    headers['Vary'] = 'Accept-Encoding'
+    return {**response, 'headers': headers, 'body': base64.b64encode(payload).decode('ascii'), 'isBase64Encoded': True}
 
 
 def extract_token(headers):
@@ -61,6 +133,19 @@ def get_user_info(cur, headers):
     return row[0], row[1]
 
 
+def make_cursor(created_at, task_id):
+    return f'{created_at.isoformat()}_{task_id}'
+
+
+def parse_cursor(value):
+    '''Курсор страницы "<created_at ISO>_<id>" -> (datetime, id) или None'''
+    created_at, _, task_id = value.rpartition('_')
+    try:
+        return datetime.fromisoformat(created_at), int(task_id)
+    except ValueError:
+        return None
+
+
 def get_producer_operators(cur, producer_email):
     cur.execute(f"""
         SELECT operator_email FROM {SCHEMA}.producer_assignments 
@@ -75,7 +160,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     if method == 'OPTIONS':
         return {
             'statusCode': 200,
-            'headers': get_cors_headers(event),
+            'headers': {**get_cors_headers(event), 'Access-Control-Max-Age': '86400'},
             'body': ''
         }
 
@@ -116,71 +201,78 @@ def handle_get(event, cur, user_email, user_role):
     if action == 'comments':
         return get_comments(event, cur, qp)
 
-    if user_role == 'director':
-        cur.execute(f"""
-            SELECT t.id, t.title, t.description, t.status, t.priority, 
-                   t.assigned_to_email, t.assigned_by_email, t.due_date, 
-                   t.created_at, t.updated_at, t.completed_at,
-                   u1.full_name as assigned_to_name, u2.full_name as assigned_by_name
-            FROM {SCHEMA}.tasks t
-            LEFT JOIN {SCHEMA}.users u1 ON u1.email = t.assigned_to_email
-            LEFT JOIN {SCHEMA}.users u2 ON u2.email = t.assigned_by_email
-            ORDER BY t.created_at DESC
-        """)
-    elif user_role == 'producer':
+    conditions = []
+    values = []
+
+    if user_role == 'producer':
         operator_emails = get_producer_operators(cur, user_email)
         if not operator_emails:
-            return resp(event, 200, [])
-        placeholders = ','.join(['%s'] * len(operator_emails))
-        all_emails = operator_emails + [user_email, user_email]
-        cur.execute(f"""
-            SELECT t.id, t.title, t.description, t.status, t.priority, 
-                   t.assigned_to_email, t.assigned_by_email, t.due_date, 
-                   t.created_at, t.updated_at, t.completed_at,
-                   u1.full_name as assigned_to_name, u2.full_name as assigned_by_name
-            FROM {SCHEMA}.tasks t
-            LEFT JOIN {SCHEMA}.users u1 ON u1.email = t.assigned_to_email
-            LEFT JOIN {SCHEMA}.users u2 ON u2.email = t.assigned_by_email
-            WHERE t.assigned_to_email IN ({placeholders})
-               OR t.assigned_by_email = %s
-               OR t.assigned_to_email = %s
-            ORDER BY t.created_at DESC
-        """, all_emails)
-    else:
-        cur.execute(f"""
-            SELECT t.id, t.title, t.description, t.status, t.priority, 
-                   t.assigned_to_email, t.assigned_by_email, t.due_date, 
-                   t.created_at, t.updated_at, t.completed_at,
-                   u1.full_name as assigned_to_name, u2.full_name as assigned_by_name
-            FROM {SCHEMA}.tasks t
-            LEFT JOIN {SCHEMA}.users u1 ON u1.email = t.assigned_to_email
-            LEFT JOIN {SCHEMA}.users u2 ON u2.email = t.assigned_by_email
-            WHERE t.assigned_to_email = %s
-            ORDER BY t.created_at DESC
-        """, (user_email,))
+            return resp(event, 200, [] if 'limit' not in qp else {'tasks': [], 'nextCursor': None})
+        conditions.append('(t.assigned_to_email = ANY(%s) OR t.assigned_by_email = %s OR t.assigned_to_email = %s)')
+        values += [operator_emails, user_email, user_email]
+    elif user_role != 'director':
+        conditions.append('t.assigned_to_email = %s')
+        values.append(user_email)
+
+    for param, column in LIST_FILTERS.items():
+        if qp.get(param):
+            conditions.append(f'{column} = %s')
+            values.append(qp[param])
+
+    limit = None
+    if 'limit' in qp:
+        try:
+            limit = min(max(int(qp.get('limit') or PAGE_SIZE), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            return resp(event, 400, {'error': 'limit must be a number'})
+        if qp.get('cursor'):
+            cursor = parse_cursor(qp['cursor'])
+            if cursor is None:
+                return resp(event, 400, {'error': 'Invalid cursor'})
+            conditions.append('(t.created_at, t.id) < (%s, %s)')
+            values += list(cursor)
+
+    where_sql = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+    limit_sql = ''
+    if limit is not None:
+        limit_sql = 'LIMIT %s'
+        values.append(limit + 1)
 
-    rows = cur.fetchall()
-    task_ids = [r[0] for r in rows]
+    cur.execute(f"""
+        SELECT t.id, t.title, t.description, t.status, t.priority,
+               t.assigned_to_email, t.assigned_by_email, t.due_date,
+               t.created_at, t.updated_at, t.completed_at,
+               u1.full_name as assigned_to_name, u2.full_name as assigned_by_name,
+               cc.comment_count
+        FROM {SCHEMA}.tasks t
+        LEFT JOIN {SCHEMA}.users u1 ON u1.id = t.assigned_to_user_id
+        LEFT JOIN {SCHEMA}.users u2 ON u2.id = t.assigned_by_user_id
+        LEFT JOIN LATERAL (
+            SELECT COUNT(*) AS comment_count FROM {SCHEMA}.task_comments c WHERE c.task_id = t.id
+        ) cc ON true
+        {where_sql}
+        ORDER BY t.created_at DESC, t.id DESC
+        {limit_sql}
+    """, values)
 
-    comment_counts = {}
-    if task_ids:
-        placeholders = ','.join(['%s'] * len(task_ids))
-        cur.execute(f"""
-            SELECT task_id, COUNT(*) FROM {SCHEMA}.task_comments 
-            WHERE task_id IN ({placeholders}) GROUP BY task_id
-        """, task_ids)
-        for r in cur.fetchall():
-            comment_counts[r[0]] = r[1]
+    rows = cur.fetchall()
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
 
     tasks = [{
         'id': r[0], 'title': r[1], 'description': r[2], 'status': r[3],
         'priority': r[4], 'assignedToEmail': r[5], 'assignedByEmail': r[6],
         'dueDate': r[7], 'createdAt': r[8], 'updatedAt': r[9],
         'completedAt': r[10], 'assignedToName': r[11], 'assignedByName': r[12],
-        'commentCount': comment_counts.get(r[0], 0)
+        'commentCount': r[13]
     } for r in rows]
 
-    return resp(event, 200, tasks)
+    # Без limit — прежний ответ списком; с limit — страница и курсор следующей
+    if limit is None:
+        return resp(event, 200, tasks)
+    next_cursor = make_cursor(rows[-1][8], rows[-1][0]) if has_more else None
+    return resp(event, 200, {'tasks': tasks, 'nextCursor': next_cursor})
 
 
 def get_comments(event, cur, qp):
@@ -354,20 +446,34 @@ def handle_put(event, cur, conn, user_email, user_role):
     return resp(event, 200, {'message': 'Updated'})
 
 
+def purge_completed(cur, conn, older_than_days=None):
+    '''Удаляет выполненные задачи с комментариями пачками по PURGE_BATCH, каждая в своей транзакции.
+    Возвращает (удалено, остались ли ещё после PURGE_MAX_BATCHES пачек)'''
+    deleted = 0
+    for _ in range(PURGE_MAX_BATCHES):
+        cur.execute(PURGE_COMPLETED_SQL, {'older_than_days': older_than_days, 'limit': PURGE_BATCH})
+        count = cur.rowcount
+        conn.commit()
+        deleted += count
+        if count < PURGE_BATCH:
+            return deleted, False
+    return deleted, True
+
+
 def handle_delete(event, cur, conn, user_email, user_role):
     body = json.loads(event.get('body', '{}'))
 
     if body.get('deleteAllCompleted'):
         if user_role != 'director':
             return resp(event, 403, {'error': 'Only director can bulk delete completed tasks'})
-        cur.execute(f"SELECT id FROM {SCHEMA}.tasks WHERE status = 'completed'")
-        ids = [r[0] for r in cur.fetchall()]
-        if ids:
-            placeholders = ','.join(['%s'] * len(ids))
-            cur.execute(f"DELETE FROM {SCHEMA}.task_comments WHERE task_id IN ({placeholders})", ids)
-            cur.execute(f"DELETE FROM {SCHEMA}.tasks WHERE id IN ({placeholders})", ids)
-            conn.commit()
-        return resp(event, 200, {'deleted': len(ids)})
+        older_than_days = body.get('olderThanDays')
+        if older_than_days is not None:
+            try:
+                older_than_days = max(int(older_than_days), 0)
+            except (TypeError, ValueError):
+                return resp(event, 400, {'error': 'olderThanDays must be a number'})
+        deleted, has_more = purge_completed(cur, conn, older_than_days)
+        return resp(event, 200, {'deleted': deleted, 'has_more': has_more})
 
     task_id = body.get('id')
 
@@ -1,20 +1,33 @@
 '''
 Управление галереей фотографий пользователя: список, загрузка, удаление, обновление подписи.
-Args: event с httpMethod (GET для списка по email, POST для действий), body action ("add" | "delete" | "update_comment").
+Args: event с httpMethod (GET для списка по email, POST для действий), body action ("add" | "presign" | "confirm" | "delete" | "update_comment" | "backfill_variants").
+      "presign" выдаёт подписанный PUT-URL для прямой загрузки в хранилище, "confirm" фиксирует загруженный объект.
+      Файлы хранятся по SHA-256 содержимого: повторная загрузка только добавляет ссылку (ref_count).
 Returns: HTTP response со списком фото или результатом действия.
 '''
 
+import io
 import json
 import os
 import base64
-import uuid
-from typing import Dict, Any
+import hashlib
+import re
+from typing import Dict, Any, List, Optional, Tuple
 import psycopg2
 from psycopg2.extras import RealDictCursor
-import boto3
 
 
 MAX_PHOTOS = 6
+VARIANT_SIZES = (64, 256, 1024)
+BACKFILL_BATCH = 20
+
+# Endpoint и bucket переопределяются для локального S3 (MinIO, moto server)
+S3_ENDPOINT = os.environ.get('S3_ENDPOINT_URL', 'https://bucket.poehali.dev')
+S3_BUCKET = os.environ.get('S3_BUCKET', 'files')
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+PRESIGN_TTL = 600
+ALLOWED_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp'}
+BLOB_KEY_RE = re.compile(r'^images/([0-9a-f]{64})\.(jpg|png|webp)$')
 SCHEMA = 't_p35405502_model_agency_website'
 
 CORS_HEADERS = {
@@ -33,31 +46,339 @@ def _resp(status: int, body: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _upload_to_s3(image_b64: str, owner_email: str) -> str:
+_s3 = None
+
+
+def _s3_client():
+    '''Клиент создаётся один раз и переиспользуется тёплыми вызовами'''
+    global _s3
+    if _s3 is None:
+        # boto3 тяжёлый: импортируем только на путях, которые реально ходят в S3
+        import boto3
+        from botocore.config import Config
+        _s3 = boto3.client(
+            's3',
+            endpoint_url=S3_ENDPOINT,
+            aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
+            aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
+            config=Config(signature_version='s3v4'),
+        )
+    return _s3
+
+
+def _cdn_base() -> str:
+    return os.environ.get('S3_PUBLIC_URL') or f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket"
+
+
+def _cdn_url(key: str) -> str:
+    return f"{_cdn_base()}/{key}"
+
+
+def _key_from_url(url: str) -> Optional[str]:
+    base = _cdn_base() + '/'
+    if url and url.startswith(base):
+        return url[len(base):]
+    if not url or '/bucket/' not in url:
+        return None
+    return url.split('/bucket/', 1)[1]
+
+
+def _presign_put(s3, key: str, content_type: str, size: int) -> Dict[str, Any]:
+    '''Подписанный PUT: тип и точный размер входят в подпись, иначе хранилище отклонит запрос'''
+    url = s3.generate_presigned_url(
+        'put_object',
+        Params={'Bucket': S3_BUCKET, 'Key': key, 'ContentType': content_type, 'ContentLength': size},
+        ExpiresIn=PRESIGN_TTL,
+    )
+    return {
+        'upload_url': url,
+        'key': key,
+        'method': 'PUT',
+        'headers': {'Content-Type': content_type},
+        'expires_in': PRESIGN_TTL,
+        'max_bytes': MAX_UPLOAD_BYTES,
+    }
+
+
+def _validate_upload_request(body: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], int]:
+    '''Возвращает (ошибка, content_type, size) для запроса на подписанную ссылку'''
+    content_type = (body.get('content_type') or '').strip().lower()
+    try:
+        size = int(body.get('size') or 0)
+    except (TypeError, ValueError):
+        size = 0
+    if content_type not in ALLOWED_TYPES:
+        return 'Допустимы только JPEG, PNG и WebP', None, 0
+    if size <= 0 or size > MAX_UPLOAD_BYTES:
+        return f'Размер файла должен быть от 1 байта до {MAX_UPLOAD_BYTES // (1024 * 1024)} МБ', None, 0
+    return None, content_type, size
+
+
+def _read_uploaded(s3, key: str) -> bytes:
+    '''Проверяет загруженный по ссылке объект и читает его для генерации вариантов'''
+    head = s3.head_object(Bucket=S3_BUCKET, Key=key)
+    if head.get('ContentLength', 0) > MAX_UPLOAD_BYTES:
+        raise ValueError('Файл превышает допустимый размер')
+    if (head.get('ContentType') or '').lower() not in ALLOWED_TYPES:
+        raise ValueError('Недопустимый тип файла')
+    return s3.get_object(Bucket=S3_BUCKET, Key=key)['Body'].read()
+
+
+def _render_variants(data: bytes) -> Dict[int, bytes]:
+    '''Уменьшенные копии в WebP по длинной стороне; больше оригинала не растягиваем'''
+    from PIL import Image, ImageOps
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+
+    result: Dict[int, bytes] = {}
+    longest = max(img.size)
+    for size in VARIANT_SIZES:
+        if size > longest and size != VARIANT_SIZES[0]:
+            break
+        copy = img.copy()
+        copy.thumbnail((size, size), Image.LANCZOS)
+        buf = io.BytesIO()
+        copy.save(buf, 'WEBP', quality=82, method=4)
+        result[size] = buf.getvalue()
+    return result
+
+
+def _store_variants(s3, data: bytes, key: str) -> Dict[str, str]:
+    '''Кладёт варианты рядом с оригиналом: gallery/x.jpg -> gallery/x_w256.webp'''
+    base = key.rsplit('.', 1)[0]
+    variants: Dict[str, str] = {}
+    for size, blob in _render_variants(data).items():
+        variant_key = f'{base}_w{size}.webp'
+        s3.put_object(Bucket=S3_BUCKET, Key=variant_key, Body=blob, ContentType='image/webp')
+        variants[str(size)] = _cdn_url(variant_key)
+    return variants
+
+
+def _srcset(variants: Optional[Dict[str, str]]) -> str:
+    if not variants:
+        return ''
+    return ', '.join(f'{url} {size}w' for size, url in sorted(variants.items(), key=lambda kv: int(kv[0])))
+
+
+def _blob_key(sha: str, ext: str) -> str:
+    return f'images/{sha}.{ext}'
+
+
+def _detect_ext(data: bytes) -> str:
+    if data[:3] == b'\xff\xd8\xff':
+        return 'jpg'
+    if data[:4] == b'RIFF':
+        return 'webp'
+    return 'png'
+
+
+def _lock_blob(cur, sha: str) -> None:
+    '''Захват, освобождение и удаление объектов одного хэша идут по очереди до конца транзакции'''
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (sha,))
+
+
+def _reuse_blob(cur, sha: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    '''ref_count + 1 у существующего изображения; None, если строки нет'''
+    cur.execute(
+        f"UPDATE {SCHEMA}.image_blobs SET ref_count = ref_count + 1 "
+        f"WHERE sha256 = %s RETURNING object_key, variants",
+        (sha,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    return _cdn_url(row['object_key']), row['variants'] or {}
+
+
+def _acquire_blob(cur, s3, sha: str, key: str, data: bytes, content_type: str,
+                  uploaded: bool) -> Tuple[str, Dict[str, str]]:
+    '''Берёт ссылку на изображение по хэшу: существующее — только ref_count + 1, новое — кладёт в хранилище'''
+    _lock_blob(cur, sha)
+    reused = _reuse_blob(cur, sha)
+    if reused:
+        return reused
+
+    if not uploaded:
+        s3.put_object(Bucket=S3_BUCKET, Key=key, Body=data, ContentType=content_type)
+    # Без вариантов изображение всё равно доступно — фронт откатится на оригинал
+    try:
+        variants = _store_variants(s3, data, key)
+    except Exception:
+        variants = {}
+
+    cur.execute(
+        f"INSERT INTO {SCHEMA}.image_blobs (sha256, object_key, content_type, size_bytes, variants, ref_count) "
+        f"VALUES (%s, %s, %s, %s, %s, 1) "
+        f"ON CONFLICT (sha256) DO UPDATE SET ref_count = {SCHEMA}.image_blobs.ref_count + 1 "
+        f"RETURNING object_key, variants",
+        (sha, key, content_type, len(data), json.dumps(variants)),
+    )
+    row = cur.fetchone()
+    return _cdn_url(row['object_key']), row['variants'] or {}
+
+
+def _release_blob(cur, sha: Optional[str]) -> List[str]:
+    '''Снимает ссылку; возвращает ключи объектов, которые можно удалить после коммита'''
+    if not sha:
+        return []
+    _lock_blob(cur, sha)
+    cur.execute(
+        f"UPDATE {SCHEMA}.image_blobs SET ref_count = ref_count - 1 WHERE sha256 = %s",
+        (sha,),
+    )
+    cur.execute(
+        f"DELETE FROM {SCHEMA}.image_blobs WHERE sha256 = %s AND ref_count <= 0 "
+        f"RETURNING object_key, variants",
+        (sha,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return []
+    keys = [row['object_key']]
+    keys.extend(k for k in (_key_from_url(u) for u in (row['variants'] or {}).values()) if k)
+    return keys
+
+
+def _delete_objects(cur, conn, sha: Optional[str], keys: List[str]) -> None:
+    '''Удаляет объекты после коммита, если за это время тот же хэш не был загружен заново'''
+    if not keys:
+        return
+    # Блокировка держится до конца удаления: параллельный захват хэша дождётся его и загрузит файл снова
+    _lock_blob(cur, sha)
+    cur.execute(f"SELECT 1 FROM {SCHEMA}.image_blobs WHERE sha256 = %s", (sha,))
+    if not cur.fetchone():
+        try:
+            _s3_client().delete_objects(
+                Bucket=S3_BUCKET,
+                Delete={'Objects': [{'Key': k} for k in keys], 'Quiet': True},
+            )
+        except Exception:
+            pass
+    conn.commit()
+
+
+def _store_image(cur, image_b64: str) -> Tuple[str, str, Dict[str, str]]:
+    '''Загрузка из base64: (sha256, url, variants)'''
     if ',' in image_b64:
         image_b64 = image_b64.split(',', 1)[1]
     data = base64.b64decode(image_b64)
+    ext = _detect_ext(data)
+    content_type = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp'}[ext]
+    sha = hashlib.sha256(data).hexdigest()
+    url, variants = _acquire_blob(cur, _s3_client(), sha, _blob_key(sha, ext), data, content_type, False)
+    return sha, url, variants
 
-    ext = 'png'
-    if data[:3] == b'\xff\xd8\xff':
-        ext = 'jpg'
-    elif data[:4] == b'\x89PNG':
-        ext = 'png'
-    elif data[:4] == b'RIFF':
-        ext = 'webp'
-
-    safe = ''.join(c if c.isalnum() else '_' for c in owner_email)[:40]
-    key = f'gallery/{safe}_{uuid.uuid4().hex}.{ext}'
-
-    s3 = boto3.client(
-        's3',
-        endpoint_url='https://bucket.poehali.dev',
-        aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-    )
+
+def _confirm_uploaded(cur, key: str) -> Tuple[str, str, Dict[str, str]]:
+    '''Фиксирует объект, загруженный по подписанной ссылке; содержимое обязано совпасть с хэшем в ключе'''
+    m = BLOB_KEY_RE.match(key)
+    if not m:
+        raise ValueError('Invalid key')
+    sha, ext = m.group(1), m.group(2)
     content_type = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp'}[ext]
-    s3.put_object(Bucket='files', Key=key, Body=data, ContentType=content_type)
-    return f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{key}"
+    s3 = _s3_client()
+
+    # Проверка и захват под одной блокировкой: строку не удалят между ними
+    _lock_blob(cur, sha)
+    reused = _reuse_blob(cur, sha)
+    if reused:
+        url, variants = reused
+        return sha, url, variants
+
+    try:
+        data = _read_uploaded(s3, key)
+    except ValueError:
+        s3.delete_object(Bucket=S3_BUCKET, Key=key)
+        raise
+    except Exception:
+        # Файл мог быть удалён вместе с последней ссылкой после presign — клиент загрузит его заново
+        raise LookupError('Файл не найден, загрузите его заново')
+    if hashlib.sha256(data).hexdigest() != sha:
+        s3.delete_object(Bucket=S3_BUCKET, Key=key)
+        raise ValueError('Содержимое не совпадает с хэшем')
+    url, variants = _acquire_blob(cur, s3, sha, key, data, content_type, True)
+    return sha, url, variants
+
+
+def _presign_blob(cur, body: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+    '''Подписанная ссылка на images/<sha256>.<ext>; если такой файл уже есть — загрузка не нужна'''
+    error, content_type, size = _validate_upload_request(body)
+    if error:
+        return error, {}
+    sha = (body.get('sha256') or '').strip().lower()
+    if not re.fullmatch(r'[0-9a-f]{64}', sha):
+        return 'sha256 is required', {}
+
+    cur.execute(f"SELECT object_key FROM {SCHEMA}.image_blobs WHERE sha256 = %s", (sha,))
+    row = cur.fetchone()
+    if row:
+        return None, {'exists': True, 'key': row['object_key']}
+    key = _blob_key(sha, ALLOWED_TYPES[content_type])
+    return None, {'exists': False, **_presign_put(_s3_client(), key, content_type, size)}
+
+
+def _photo_json(r: Dict[str, Any]) -> Dict[str, Any]:
+    variants = r.get('variants') or {}
+    return {
+        'id': r['id'],
+        'photo_url': r['photo_url'],
+        'variants': variants,
+        'srcset': _srcset(variants),
+        'comment': r['comment'] or '',
+        'position': r['position'],
+        'created_at': r['created_at'].isoformat() if r['created_at'] else None,
+    }
+
+
+def _backfill_variants(cur, conn, after_id: int, limit: int) -> Dict[str, Any]:
+    '''Догенерация вариантов для старых фото пачками по id; ошибки помечаются пустым {} и
+    подбираются следующим проходом с after_id = 0. Фото с content_hash берут готовые варианты
+    из image_blobs, новые варианты пишутся и туда'''
+    cur.execute(
+        f"SELECT p.id, p.photo_url, p.content_hash, b.variants AS blob_variants "
+        f"FROM {SCHEMA}.user_photos p "
+        f"LEFT JOIN {SCHEMA}.image_blobs b ON b.sha256 = p.content_hash "
+        f"WHERE (p.variants IS NULL OR p.variants = '{{}}'::jsonb) AND p.id > %s "
+        f"ORDER BY p.id LIMIT %s",
+        (after_id, limit),
+    )
+    rows = cur.fetchall()
+    s3 = _s3_client() if rows else None
+    done = failed = 0
+    last_id = after_id
+    for r in rows:
+        last_id = r['id']
+        variants = r['blob_variants']
+        if variants:
+            done += 1
+        else:
+            key = _key_from_url(r['photo_url'])
+            try:
+                data = s3.get_object(Bucket=S3_BUCKET, Key=key)['Body'].read()
+                variants = _store_variants(s3, data, key)
+                done += 1
+            except Exception:
+                variants = {}
+                failed += 1
+            # Иначе повторное использование блоба через _acquire_blob вернёт фото без вариантов
+            if variants and r['content_hash']:
+                cur.execute(
+                    f"UPDATE {SCHEMA}.image_blobs SET variants = %s WHERE sha256 = %s",
+                    (json.dumps(variants), r['content_hash']),
+                )
+        cur.execute(
+            f"UPDATE {SCHEMA}.user_photos SET variants = %s WHERE id = %s",
+            (json.dumps(variants), r['id']),
+        )
+        conn.commit()
+    return {
+        'success': True,
+        'processed': done,
+        'failed': failed,
+        'last_id': last_id,
+        'has_more': len(rows) == limit,
+    }
 
 
 def _can_edit(actor_email: str, actor_role: str, target_email: str) -> bool:
@@ -84,21 +405,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             if not email:
                 return _resp(400, {'error': 'email is required'})
             cur.execute(
-                f"SELECT id, photo_url, comment, position, created_at FROM {SCHEMA}.user_photos "
+                f"SELECT id, photo_url, variants, comment, position, created_at FROM {SCHEMA}.user_photos "
                 f"WHERE LOWER(user_email) = %s ORDER BY position ASC, id ASC",
                 (email,),
             )
             rows = cur.fetchall()
-            photos = [
-                {
-                    'id': r['id'],
-                    'photo_url': r['photo_url'],
-                    'comment': r['comment'] or '',
-                    'position': r['position'],
-                    'created_at': r['created_at'].isoformat() if r['created_at'] else None,
-                }
-                for r in rows
-            ]
+            photos = [_photo_json(r) for r in rows]
             return _resp(200, {'success': True, 'photos': photos, 'max': MAX_PHOTOS})
 
         if method != 'POST':
@@ -114,16 +426,29 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         actor_email = (body.get('actor_email') or '').strip().lower()
         actor_role = (body.get('actor_role') or '').strip().lower()
 
+        if action == 'backfill_variants':
+            if actor_role != 'director':
+                return _resp(403, {'error': 'Forbidden'})
+            try:
+                after_id = int(body.get('after_id') or 0)
+                limit = max(1, min(int(body.get('limit') or BACKFILL_BATCH), 100))
+            except (TypeError, ValueError):
+                return _resp(400, {'error': 'after_id and limit must be integers'})
+            return _resp(200, _backfill_variants(cur, conn, after_id, limit))
+
         if not target_email:
             return _resp(400, {'error': 'target_email is required'})
         if not _can_edit(actor_email, actor_role, target_email):
             return _resp(403, {'error': 'Forbidden'})
 
-        if action == 'add':
-            image_b64 = body.get('image')
+        if action in ('add', 'confirm'):
             comment = (body.get('comment') or '').strip()[:200]
-            if not image_b64:
+            image_b64 = body.get('image')
+            key = (body.get('key') or '').strip()
+            if action == 'add' and not image_b64:
                 return _resp(400, {'error': 'image is required'})
+            if action == 'confirm' and not BLOB_KEY_RE.match(key):
+                return _resp(400, {'error': 'Invalid key'})
 
             cur.execute(
                 f"SELECT COUNT(*) AS c FROM {SCHEMA}.user_photos WHERE LOWER(user_email) = %s",
@@ -135,37 +460,57 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 return _resp(400, {'error': f'Достигнут лимит {MAX_PHOTOS} фото'})
 
             try:
-                photo_url = _upload_to_s3(image_b64, target_email)
+                if action == 'add':
+                    sha, photo_url, variants = _store_image(cur, image_b64)
+                else:
+                    sha, photo_url, variants = _confirm_uploaded(cur, key)
+            except ValueError as e:
+                conn.rollback()
+                return _resp(400, {'error': str(e)})
+            except LookupError as e:
+                conn.rollback()
+                return _resp(409, {'error': str(e)})
             except Exception as e:
+                conn.rollback()
                 return _resp(500, {'error': f'Upload failed: {str(e)}'})
 
             cur.execute(
-                f"INSERT INTO {SCHEMA}.user_photos (user_email, photo_url, comment, position) "
-                f"VALUES (%s, %s, %s, %s) RETURNING id, photo_url, comment, position, created_at",
-                (target_email, photo_url, comment, count),
+                f"INSERT INTO {SCHEMA}.user_photos (user_email, photo_url, variants, content_hash, comment, position) "
+                f"VALUES (%s, %s, %s, %s, %s, %s) RETURNING id, photo_url, variants, comment, position, created_at",
+                (target_email, photo_url, json.dumps(variants), sha, comment, count),
             )
             row = cur.fetchone()
             conn.commit()
-            return _resp(200, {
-                'success': True,
-                'photo': {
-                    'id': row['id'],
-                    'photo_url': row['photo_url'],
-                    'comment': row['comment'] or '',
-                    'position': row['position'],
-                    'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                },
-            })
+            return _resp(200, {'success': True, 'photo': _photo_json(row)})
+
+        if action == 'presign':
+            cur.execute(
+                f"SELECT COUNT(*) AS c FROM {SCHEMA}.user_photos WHERE LOWER(user_email) = %s",
+                (target_email,),
+            )
+            count_row = cur.fetchone()
+            if count_row and count_row['c'] >= MAX_PHOTOS:
+                return _resp(400, {'error': f'Достигнут лимит {MAX_PHOTOS} фото'})
+            error, result = _presign_blob(cur, body)
+            if error:
+                return _resp(400, {'error': error})
+            return _resp(200, {'success': True, **result})
 
         if action == 'delete':
             photo_id = body.get('photo_id')
             if not photo_id:
                 return _resp(400, {'error': 'photo_id is required'})
             cur.execute(
-                f"DELETE FROM {SCHEMA}.user_photos WHERE id = %s AND LOWER(user_email) = %s",
+                f"DELETE FROM {SCHEMA}.user_photos WHERE id = %s AND LOWER(user_email) = %s "
+                f"RETURNING content_hash",
                 (int(photo_id), target_email),
             )
+            row = cur.fetchone()
+            released = row['content_hash'] if row else None
+            orphaned = _release_blob(cur, released)
             conn.commit()
+            # Объекты удаляются только когда на них не осталось ни одной ссылки
+            _delete_objects(cur, conn, released, orphaned)
             return _resp(200, {'success': True})
 
         if action == 'update_comment':
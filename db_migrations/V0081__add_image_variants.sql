@@ -0,0 +1,9 @@
+-- Уменьшенные копии изображений (64/256/1024 px, WebP): {"64": url, "256": url, ...}
+ALTER TABLE t_p35405502_model_agency_website.user_photos
+ADD COLUMN IF NOT EXISTS variants JSONB;
+
+ALTER TABLE t_p35405502_model_agency_website.users
+ADD COLUMN IF NOT EXISTS photo_variants JSONB;
+
+ALTER TABLE t_p35405502_model_agency_website.users
+ADD COLUMN IF NOT EXISTS cover_variants JSONB;
@@ -0,0 +1,20 @@
+-- Контентно-адресуемое хранение изображений: ключ объекта = SHA-256 содержимого,
+-- повторная загрузка того же файла только увеличивает ref_count
+CREATE TABLE IF NOT EXISTS t_p35405502_model_agency_website.image_blobs (
+    sha256 CHAR(64) PRIMARY KEY,
+    object_key TEXT NOT NULL,
+    content_type VARCHAR(50) NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    variants JSONB,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE t_p35405502_model_agency_website.user_photos
+ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+
+ALTER TABLE t_p35405502_model_agency_website.users
+ADD COLUMN IF NOT EXISTS photo_hash CHAR(64);
+
+ALTER TABLE t_p35405502_model_agency_website.users
+ADD COLUMN IF NOT EXISTS cover_hash CHAR(64);
@@ -0,0 +1,2 @@
+-- HMAC-SHA256 от пароля: позволяет понять, изменился ли пароль, без расшифровки
+ALTER TABLE model_accounts ADD COLUMN IF NOT EXISTS password_digest VARCHAR(64);
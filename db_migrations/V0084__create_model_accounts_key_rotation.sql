@@ -0,0 +1,10 @@
+-- Прогресс перешифровки model_accounts при смене ключа; строка на каждый новый основной ключ
+CREATE TABLE IF NOT EXISTS model_accounts_key_rotation (
+    key_fingerprint VARCHAR(16) PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    rotated_count INTEGER NOT NULL DEFAULT 0,
+    failed_count INTEGER NOT NULL DEFAULT 0,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
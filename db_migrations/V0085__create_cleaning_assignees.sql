@@ -0,0 +1,29 @@
+-- Нормализованные исполнители уборки вместо строк operator_emails/producer_emails/notified_emails.
+-- Строковые колонки остаются для совместимости и обновляются вместе с таблицей.
+CREATE TABLE IF NOT EXISTS t_p35405502_model_agency_website.cleaning_assignees (
+    cleaning_id INTEGER NOT NULL REFERENCES t_p35405502_model_agency_website.cleaning_schedule(id) ON DELETE CASCADE,
+    email VARCHAR(255) NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    notified_at TIMESTAMP,
+    PRIMARY KEY (cleaning_id, email, role)
+);
+
+-- pending_for: LOWER(email) = %s AND notified_at IS NULL
+CREATE INDEX IF NOT EXISTS idx_cleaning_assignees_email_notified
+    ON t_p35405502_model_agency_website.cleaning_assignees (LOWER(email), notified_at);
+
+INSERT INTO t_p35405502_model_agency_website.cleaning_assignees (cleaning_id, email, role, notified_at)
+SELECT cs.id, a.email, a.role,
+       CASE WHEN a.email = ANY (string_to_array(LOWER(REPLACE(cs.notified_emails, ' ', '')), ','))
+            THEN cs.updated_at END
+FROM t_p35405502_model_agency_website.cleaning_schedule cs
+CROSS JOIN LATERAL (
+    SELECT DISTINCT LOWER(TRIM(e)) AS email, 'operator' AS role
+    FROM unnest(string_to_array(cs.operator_emails, ',')) AS e
+    WHERE TRIM(e) <> ''
+    UNION
+    SELECT DISTINCT LOWER(TRIM(e)), 'producer'
+    FROM unnest(string_to_array(cs.producer_emails, ',')) AS e
+    WHERE TRIM(e) <> ''
+) a
+ON CONFLICT (cleaning_id, email, role) DO NOTHING;
@@ -0,0 +1,7 @@
+-- unseen / mark_seen фильтруют по LOWER(user_email): индекс V0061 по user_email для них не подходит
+CREATE INDEX IF NOT EXISTS idx_user_achievements_unseen_lower
+ON t_p35405502_model_agency_website.user_achievements (LOWER(user_email))
+WHERE seen_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_user_achievements_lower_email
+ON t_p35405502_model_agency_website.user_achievements (LOWER(user_email), granted_at DESC);
@@ -0,0 +1,19 @@
+-- Мягкое удаление: пользователь скрывается сразу, данные вычищаются позже пачками
+ALTER TABLE t_p35405502_model_agency_website.users
+ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_users_deleted_at
+    ON t_p35405502_model_agency_website.users (deleted_at)
+    WHERE deleted_at IS NOT NULL;
+
+-- Индексы под каскадное удаление пользователя по email
+CREATE INDEX IF NOT EXISTS idx_producer_assignments_model_email
+    ON t_p35405502_model_agency_website.producer_assignments (model_email);
+CREATE INDEX IF NOT EXISTS idx_producer_assignments_operator_email
+    ON t_p35405502_model_agency_website.producer_assignments (operator_email);
+CREATE INDEX IF NOT EXISTS idx_operator_model_assignments_model_email
+    ON t_p35405502_model_agency_website.operator_model_assignments (model_email);
+CREATE INDEX IF NOT EXISTS idx_blocked_dates_created_by
+    ON t_p35405502_model_agency_website.blocked_dates (created_by);
+CREATE INDEX IF NOT EXISTS idx_task_comments_author_email
+    ON t_p35405502_model_agency_website.task_comments (author_email);
@@ -0,0 +1,155 @@
+-- Целочисленные ссылки на users(id) рядом с email-колонками.
+-- Миграция аддитивная: email-колонки остаются, *_user_id заполняются триггером при записи,
+-- поэтому существующие функции продолжают писать только email.
+
+CREATE OR REPLACE FUNCTION t_p35405502_model_agency_website.resolve_user_ids() RETURNS trigger AS $$
+DECLARE
+    i INTEGER := 0;
+    resolved JSONB := '{}'::jsonb;
+BEGIN
+    -- Аргументы триггера парами: email-колонка, id-колонка
+    WHILE i < TG_NARGS LOOP
+        resolved := resolved || jsonb_build_object(
+            TG_ARGV[i + 1],
+            (SELECT u.id FROM t_p35405502_model_agency_website.users u
+             WHERE LOWER(u.email) = LOWER(to_jsonb(NEW) ->> TG_ARGV[i])
+             ORDER BY u.id LIMIT 1)
+        );
+        i := i + 2;
+    END LOOP;
+    NEW := jsonb_populate_record(NEW, resolved);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- operator_model_assignments
+ALTER TABLE t_p35405502_model_agency_website.operator_model_assignments
+    ADD COLUMN IF NOT EXISTS operator_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+ALTER TABLE t_p35405502_model_agency_website.operator_model_assignments
+    ADD COLUMN IF NOT EXISTS model_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+UPDATE t_p35405502_model_agency_website.operator_model_assignments x SET operator_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.operator_email) AND x.operator_user_id IS NULL;
+UPDATE t_p35405502_model_agency_website.operator_model_assignments x SET model_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.model_email) AND x.model_user_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_operator_model_assignments_operator_user_id
+    ON t_p35405502_model_agency_website.operator_model_assignments (operator_user_id);
+CREATE INDEX IF NOT EXISTS idx_operator_model_assignments_model_user_id
+    ON t_p35405502_model_agency_website.operator_model_assignments (model_user_id);
+DROP TRIGGER IF EXISTS trg_operator_model_assignments_user_ids ON t_p35405502_model_agency_website.operator_model_assignments;
+CREATE TRIGGER trg_operator_model_assignments_user_ids
+    BEFORE INSERT OR UPDATE OF operator_email, model_email ON t_p35405502_model_agency_website.operator_model_assignments
+    FOR EACH ROW EXECUTE FUNCTION t_p35405502_model_agency_website.resolve_user_ids('operator_email', 'operator_user_id', 'model_email', 'model_user_id');
+
+-- producer_assignments
+ALTER TABLE t_p35405502_model_agency_website.producer_assignments
+    ADD COLUMN IF NOT EXISTS producer_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+ALTER TABLE t_p35405502_model_agency_website.producer_assignments
+    ADD COLUMN IF NOT EXISTS model_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+ALTER TABLE t_p35405502_model_agency_website.producer_assignments
+    ADD COLUMN IF NOT EXISTS operator_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+UPDATE t_p35405502_model_agency_website.producer_assignments x SET producer_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.producer_email) AND x.producer_user_id IS NULL;
+UPDATE t_p35405502_model_agency_website.producer_assignments x SET model_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.model_email) AND x.model_user_id IS NULL;
+UPDATE t_p35405502_model_agency_website.producer_assignments x SET operator_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.operator_email) AND x.operator_user_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_producer_assignments_producer_user_id
+    ON t_p35405502_model_agency_website.producer_assignments (producer_user_id);
+CREATE INDEX IF NOT EXISTS idx_producer_assignments_model_user_id
+    ON t_p35405502_model_agency_website.producer_assignments (model_user_id);
+CREATE INDEX IF NOT EXISTS idx_producer_assignments_operator_user_id
+    ON t_p35405502_model_agency_website.producer_assignments (operator_user_id);
+DROP TRIGGER IF EXISTS trg_producer_assignments_user_ids ON t_p35405502_model_agency_website.producer_assignments;
+CREATE TRIGGER trg_producer_assignments_user_ids
+    BEFORE INSERT OR UPDATE OF producer_email, model_email, operator_email ON t_p35405502_model_agency_website.producer_assignments
+    FOR EACH ROW EXECUTE FUNCTION t_p35405502_model_agency_website.resolve_user_ids('producer_email', 'producer_user_id', 'model_email', 'model_user_id', 'operator_email', 'operator_user_id');
+
+-- model_pairs
+ALTER TABLE t_p35405502_model_agency_website.model_pairs
+    ADD COLUMN IF NOT EXISTS model1_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+ALTER TABLE t_p35405502_model_agency_website.model_pairs
+    ADD COLUMN IF NOT EXISTS model2_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+ALTER TABLE t_p35405502_model_agency_website.model_pairs
+    ADD COLUMN IF NOT EXISTS operator_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+UPDATE t_p35405502_model_agency_website.model_pairs x SET model1_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.model1_email) AND x.model1_user_id IS NULL;
+UPDATE t_p35405502_model_agency_website.model_pairs x SET model2_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.model2_email) AND x.model2_user_id IS NULL;
+UPDATE t_p35405502_model_agency_website.model_pairs x SET operator_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.operator_email) AND x.operator_user_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_model_pairs_model1_user_id
+    ON t_p35405502_model_agency_website.model_pairs (model1_user_id);
+CREATE INDEX IF NOT EXISTS idx_model_pairs_model2_user_id
+    ON t_p35405502_model_agency_website.model_pairs (model2_user_id);
+CREATE INDEX IF NOT EXISTS idx_model_pairs_operator_user_id
+    ON t_p35405502_model_agency_website.model_pairs (operator_user_id);
+DROP TRIGGER IF EXISTS trg_model_pairs_user_ids ON t_p35405502_model_agency_website.model_pairs;
+CREATE TRIGGER trg_model_pairs_user_ids
+    BEFORE INSERT OR UPDATE OF model1_email, model2_email, operator_email ON t_p35405502_model_agency_website.model_pairs
+    FOR EACH ROW EXECUTE FUNCTION t_p35405502_model_agency_website.resolve_user_ids('model1_email', 'model1_user_id', 'model2_email', 'model2_user_id', 'operator_email', 'operator_user_id');
+
+-- tasks
+ALTER TABLE t_p35405502_model_agency_website.tasks
+    ADD COLUMN IF NOT EXISTS assigned_to_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+ALTER TABLE t_p35405502_model_agency_website.tasks
+    ADD COLUMN IF NOT EXISTS assigned_by_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+UPDATE t_p35405502_model_agency_website.tasks x SET assigned_to_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.assigned_to_email) AND x.assigned_to_user_id IS NULL;
+UPDATE t_p35405502_model_agency_website.tasks x SET assigned_by_user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.assigned_by_email) AND x.assigned_by_user_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_to_user_id
+    ON t_p35405502_model_agency_website.tasks (assigned_to_user_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_by_user_id
+    ON t_p35405502_model_agency_website.tasks (assigned_by_user_id);
+DROP TRIGGER IF EXISTS trg_tasks_user_ids ON t_p35405502_model_agency_website.tasks;
+CREATE TRIGGER trg_tasks_user_ids
+    BEFORE INSERT OR UPDATE OF assigned_to_email, assigned_by_email ON t_p35405502_model_agency_website.tasks
+    FOR EACH ROW EXECUTE FUNCTION t_p35405502_model_agency_website.resolve_user_ids('assigned_to_email', 'assigned_to_user_id', 'assigned_by_email', 'assigned_by_user_id');
+
+-- salary_adjustments
+ALTER TABLE t_p35405502_model_agency_website.salary_adjustments
+    ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+UPDATE t_p35405502_model_agency_website.salary_adjustments x SET user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.email) AND x.user_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_salary_adjustments_user_id
+    ON t_p35405502_model_agency_website.salary_adjustments (user_id);
+DROP TRIGGER IF EXISTS trg_salary_adjustments_user_ids ON t_p35405502_model_agency_website.salary_adjustments;
+CREATE TRIGGER trg_salary_adjustments_user_ids
+    BEFORE INSERT OR UPDATE OF email ON t_p35405502_model_agency_website.salary_adjustments
+    FOR EACH ROW EXECUTE FUNCTION t_p35405502_model_agency_website.resolve_user_ids('email', 'user_id');
+
+-- earned_bonuses
+ALTER TABLE t_p35405502_model_agency_website.earned_bonuses
+    ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+UPDATE t_p35405502_model_agency_website.earned_bonuses x SET user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.user_email) AND x.user_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_earned_bonuses_user_id
+    ON t_p35405502_model_agency_website.earned_bonuses (user_id);
+DROP TRIGGER IF EXISTS trg_earned_bonuses_user_ids ON t_p35405502_model_agency_website.earned_bonuses;
+CREATE TRIGGER trg_earned_bonuses_user_ids
+    BEFORE INSERT OR UPDATE OF user_email ON t_p35405502_model_agency_website.earned_bonuses
+    FOR EACH ROW EXECUTE FUNCTION t_p35405502_model_agency_website.resolve_user_ids('user_email', 'user_id');
+
+-- employee_plans
+ALTER TABLE t_p35405502_model_agency_website.employee_plans
+    ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+UPDATE t_p35405502_model_agency_website.employee_plans x SET user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.user_email) AND x.user_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_employee_plans_user_id
+    ON t_p35405502_model_agency_website.employee_plans (user_id);
+DROP TRIGGER IF EXISTS trg_employee_plans_user_ids ON t_p35405502_model_agency_website.employee_plans;
+CREATE TRIGGER trg_employee_plans_user_ids
+    BEFORE INSERT OR UPDATE OF user_email ON t_p35405502_model_agency_website.employee_plans
+    FOR EACH ROW EXECUTE FUNCTION t_p35405502_model_agency_website.resolve_user_ids('user_email', 'user_id');
+
+-- user_achievements
+ALTER TABLE t_p35405502_model_agency_website.user_achievements
+    ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+UPDATE t_p35405502_model_agency_website.user_achievements x SET user_id = u.id
+    FROM t_p35405502_model_agency_website.users u WHERE LOWER(u.email) = LOWER(x.user_email) AND x.user_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_user_achievements_user_id
+    ON t_p35405502_model_agency_website.user_achievements (user_id);
+DROP TRIGGER IF EXISTS trg_user_achievements_user_ids ON t_p35405502_model_agency_website.user_achievements;
+CREATE TRIGGER trg_user_achievements_user_ids
+    BEFORE INSERT OR UPDATE OF user_email ON t_p35405502_model_agency_website.user_achievements
+    FOR EACH ROW EXECUTE FUNCTION t_p35405502_model_agency_website.resolve_user_ids('user_email', 'user_id');
@@ -0,0 +1,43 @@
+-- Оператор смены как ссылка на users(id) вместо сравнения operator_name (email или ФИО).
+-- save-finances заполняет operator_user_id при записи; история заполняется здесь же,
+-- до того как читатели переходят на operator_user_id.
+
+ALTER TABLE t_p35405502_model_agency_website.model_finances
+    ADD COLUMN IF NOT EXISTS operator_user_id INTEGER REFERENCES t_p35405502_model_agency_website.users(id) ON DELETE SET NULL;
+
+-- Снимки backup-finances хранят ссылку вместе с operator_name (без FK: снимок переживает удаление пользователя)
+ALTER TABLE t_p35405502_model_agency_website.model_finances_archive
+    ADD COLUMN IF NOT EXISTS operator_user_id INTEGER;
+
+-- Проставляет operator_user_id записям, где он пуст; email приоритетнее совпадения по ФИО
+-- (то же правило, что RESOLVE_OPERATORS_SQL в save-finances). Вызывается и после восстановления снимка.
+CREATE OR REPLACE FUNCTION t_p35405502_model_agency_website.resolve_model_finances_operators() RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE t_p35405502_model_agency_website.model_finances mf
+    SET operator_user_id = r.user_id
+    FROM (
+        SELECT DISTINCT ON (n.name) n.name, u.id AS user_id
+        FROM (
+            SELECT DISTINCT TRIM(operator_name) AS name
+            FROM t_p35405502_model_agency_website.model_finances
+            WHERE operator_user_id IS NULL AND TRIM(COALESCE(operator_name, '')) <> ''
+        ) n
+        JOIN t_p35405502_model_agency_website.users u
+          ON LOWER(u.email) = LOWER(n.name) OR u.full_name = n.name
+        ORDER BY n.name, (LOWER(u.email) = LOWER(n.name)) DESC, u.id
+    ) r
+    WHERE mf.operator_user_id IS NULL AND TRIM(mf.operator_name) = r.name;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT t_p35405502_model_agency_website.resolve_model_finances_operators();
+
+CREATE INDEX IF NOT EXISTS idx_model_finances_operator_user_date
+    ON t_p35405502_model_agency_website.model_finances (operator_user_id, date);
+
+-- Индекс по LOWER(operator_name) больше не используется читателями
+DROP INDEX IF EXISTS t_p35405502_model_agency_website.idx_model_finances_operator_date;
@@ -0,0 +1,64 @@
+-- Накопительные заработки моделей за всё время: поддерживаются триггером на model_finances,
+-- чтобы рейтинг в statistics не агрегировал всю историю на каждый запрос.
+CREATE TABLE IF NOT EXISTS t_p35405502_model_agency_website.model_earnings_totals (
+    model_id INTEGER PRIMARY KEY,
+    earnings NUMERIC(14,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_model_earnings_totals_earnings
+    ON t_p35405502_model_agency_website.model_earnings_totals (earnings DESC);
+
+CREATE OR REPLACE FUNCTION t_p35405502_model_agency_website.apply_model_earnings_delta() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE t_p35405502_model_agency_website.model_earnings_totals
+        SET earnings = earnings - (COALESCE(OLD.cb_income, 0) + COALESCE(OLD.sp_income, 0)
+                                   + COALESCE(OLD.soda_income, 0) + COALESCE(OLD.cam4_income, 0)),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE model_id = OLD.model_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO t_p35405502_model_agency_website.model_earnings_totals (model_id, earnings)
+        VALUES (NEW.model_id, COALESCE(NEW.cb_income, 0) + COALESCE(NEW.sp_income, 0)
+                              + COALESCE(NEW.soda_income, 0) + COALESCE(NEW.cam4_income, 0))
+        ON CONFLICT (model_id) DO UPDATE
+        SET earnings = t_p35405502_model_agency_website.model_earnings_totals.earnings + EXCLUDED.earnings,
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_model_finances_earnings_totals ON t_p35405502_model_agency_website.model_finances;
+CREATE TRIGGER trg_model_finances_earnings_totals
+    AFTER INSERT OR UPDATE OF model_id, cb_income, sp_income, soda_income, cam4_income OR DELETE
+    ON t_p35405502_model_agency_website.model_finances
+    FOR EACH ROW EXECUTE FUNCTION t_p35405502_model_agency_website.apply_model_earnings_delta();
+
+-- TRUNCATE не вызывает построчный триггер (восстановление из backup-finances), поэтому итоги
+-- обнуляются отдельным триггером на уровне оператора и заново набираются вставками
+CREATE OR REPLACE FUNCTION t_p35405502_model_agency_website.reset_model_earnings_totals() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM t_p35405502_model_agency_website.model_earnings_totals;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_model_finances_earnings_reset ON t_p35405502_model_agency_website.model_finances;
+CREATE TRIGGER trg_model_finances_earnings_reset
+    AFTER TRUNCATE ON t_p35405502_model_agency_website.model_finances
+    FOR EACH STATEMENT EXECUTE FUNCTION t_p35405502_model_agency_website.reset_model_earnings_totals();
+
+INSERT INTO t_p35405502_model_agency_website.model_earnings_totals (model_id, earnings)
+SELECT model_id, SUM(COALESCE(cb_income, 0) + COALESCE(sp_income, 0) + COALESCE(soda_income, 0) + COALESCE(cam4_income, 0))
+FROM t_p35405502_model_agency_website.model_finances
+GROUP BY model_id
+ON CONFLICT (model_id) DO UPDATE SET earnings = EXCLUDED.earnings, updated_at = CURRENT_TIMESTAMP;
+
+-- Кэш готовых ответов дашборда; save-finances удаляет запись после сохранения финансов
+CREATE TABLE IF NOT EXISTS t_p35405502_model_agency_website.statistics_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,
+    payload JSONB NOT NULL,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,24 @@
+-- users.permissions: JSON-строка -> нативный TEXT[], чтобы не парсить JSON на каждой проверке прав
+CREATE OR REPLACE FUNCTION t_p35405502_model_agency_website.permissions_json_to_array(raw TEXT) RETURNS TEXT[] AS $$
+    SELECT COALESCE(array_agg(DISTINCT p ORDER BY p), '{}')
+    FROM jsonb_array_elements_text(COALESCE(NULLIF(raw, ''), '[]')::jsonb) AS p
+$$ LANGUAGE sql IMMUTABLE;
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 't_p35405502_model_agency_website'
+          AND table_name = 'users' AND column_name = 'permissions' AND data_type = 'text'
+    ) THEN
+        ALTER TABLE t_p35405502_model_agency_website.users ALTER COLUMN permissions DROP DEFAULT;
+        ALTER TABLE t_p35405502_model_agency_website.users
+            ALTER COLUMN permissions TYPE TEXT[]
+            USING t_p35405502_model_agency_website.permissions_json_to_array(permissions);
+        ALTER TABLE t_p35405502_model_agency_website.users ALTER COLUMN permissions SET DEFAULT '{}';
+        UPDATE t_p35405502_model_agency_website.users SET permissions = '{}' WHERE permissions IS NULL;
+        ALTER TABLE t_p35405502_model_agency_website.users ALTER COLUMN permissions SET NOT NULL;
+    END IF;
+END $$;
+
+DROP FUNCTION IF EXISTS t_p35405502_model_agency_website.permissions_json_to_array(TEXT);
@@ -0,0 +1,22 @@
+-- Постраничный список задач: курсор по (created_at, id), порядок created_at DESC, id DESC.
+-- created_at участвует в курсоре, поэтому NULL в нём недопустим.
+
+UPDATE t_p35405502_model_agency_website.tasks
+SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+WHERE created_at IS NULL;
+
+ALTER TABLE t_p35405502_model_agency_website.tasks
+    ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_tasks_created_id
+    ON t_p35405502_model_agency_website.tasks (created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_to_created
+    ON t_p35405502_model_agency_website.tasks (assigned_to_email, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_by_created
+    ON t_p35405502_model_agency_website.tasks (assigned_by_email, created_at DESC, id DESC);
+
+-- Составные индексы покрывают поиск по email, одиночные больше не нужны
+DROP INDEX IF EXISTS t_p35405502_model_agency_website.idx_tasks_assigned_to;
+DROP INDEX IF EXISTS t_p35405502_model_agency_website.idx_tasks_assigned_by;
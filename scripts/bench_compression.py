@@ -0,0 +1,77 @@
+'''
+Бенчмарк сжатия ответов: те же сценарии, что в bench_endpoints.py, с Accept-Encoding identity, gzip и br.
+Для каждого сценария и кодировки: байты на проводе (после base64-декодирования), экономия
+относительно identity и медиана времени вызова handler; разница с identity — цена сжатия по CPU.
+
+Использование:
+    python scripts/bench_compression.py
+    python scripts/bench_compression.py --only salary_month --iterations 20
+'''
+
+import argparse
+import base64
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bench_endpoints  # noqa: E402
+import local_db  # noqa: E402
+from local_gateway import FunctionRegistry, build_context, build_event  # noqa: E402
+
+ITERATIONS = 15
+ENCODINGS = ('identity', 'gzip', 'br')
+# Сценарии с крупными JSON-ответами
+DEFAULT_SCENARIOS = ('salary_month', 'schedule_get', 'tasks_list', 'aggregated_month')
+
+
+def measure(registry: FunctionRegistry, s: bench_endpoints.Scenario, encoding: str, iterations: int) -> Dict[str, Any]:
+    headers = {'Origin': 'http://localhost:5173', 'User-Agent': 'bench', 'Accept-Encoding': encoding}
+    if s.token:
+        headers['X-Auth-Token'] = s.token
+    timings: List[float] = []
+    response: Dict[str, Any] = {}
+    for _ in range(iterations + 1):
+        event = build_event(s.method, '/', s.query, headers, s.body)
+        started = time.perf_counter()
+        response = registry.handler(s.function)(event, build_context(s.function))
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.get('statusCode') != s.expect:
+            raise RuntimeError(f"{s.name}: status {response.get('statusCode')}")
+    body = response.get('body') or ''
+    wire = base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+    return {
+        'bytes': len(wire),
+        'p50_ms': statistics.median(timings[1:]),
+        'encoding': (response.get('headers') or {}).get('Content-Encoding', 'identity'),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Response compression benchmark')
+    parser.add_argument('--only', action='append', help='имя сценария из bench_endpoints (можно несколько раз)')
+    parser.add_argument('--iterations', type=int, default=ITERATIONS)
+    args = parser.parse_args()
+
+    dsn = local_db.configure_env()
+    registry = FunctionRegistry()
+    names = args.only or DEFAULT_SCENARIOS
+    scenarios = [s for s in bench_endpoints.build_scenarios(dsn) if s.name in names]
+
+    print(f"{'scenario':<22} {'encoding':<9} {'bytes':>9} {'saved':>7} {'p50':>8} {'cpu +ms':>8}")
+    for s in scenarios:
+        plain = None
+        for encoding in ENCODINGS:
+            result = measure(registry, s, encoding, args.iterations)
+            plain = plain or result
+            saved = 1 - result['bytes'] / plain['bytes'] if plain['bytes'] else 0.0
+            label = encoding if result['encoding'] == encoding else f"{encoding}->{result['encoding']}"
+            print(f"{s.name:<22} {label:<9} {result['bytes']:>9} {saved:>6.0%} "
+                  f"{result['p50_ms']:>8.1f} {result['p50_ms'] - plain['p50_ms']:>+8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+'''
+Бенчмарк задержек backend-функций: вызовы handler в процессе (через local_gateway) против
+датасета из seed_dataset.py. Для каждого сценария: p50/p95/p99, число запросов к БД и размер ответа;
+результат сравнивается с bench_baseline.json. Запросы считает db_trace; повторяющиеся
+(N+1) выводятся под таблицей.
+
+Использование:
+    python scripts/local_db.py migrate && python scripts/seed_dataset.py --preset medium
+    python scripts/bench_endpoints.py                      # exit 1 при регрессии
+    python scripts/bench_endpoints.py --only salary_month --iterations 50
+    python scripts/bench_endpoints.py --update-baseline    # записать текущие цифры как базовые
+
+Регрессия: p95 выше базового на P95_TOLERANCE (и не меньше чем на P95_MIN_DELTA_MS), больше запросов к БД или ответ больше на BYTES_TOLERANCE.
+Без bench_baseline.json или без записи для сценария проверка тоже завершается с exit 1 —
+базовый файл генерируется через --update-baseline на пресете medium и коммитится.
+'''
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import db_trace  # noqa: E402
+import local_db  # noqa: E402
+import seed_dataset  # noqa: E402
+from local_gateway import FunctionRegistry, build_context, build_event  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+ITERATIONS = 30
+WARMUP = 3
+P95_TOLERANCE = 0.25
+# Эндпоинты по несколько мс шумят сильнее 25%: регрессией считается ещё и прирост не меньше этого
+P95_MIN_DELTA_MS = 5.0
+BYTES_TOLERANCE = 0.10
+
+PERIOD_MONTH = ('2026-01-01', '2026-01-31')
+PERIOD_HALF = ('2026-01-16', '2026-01-31')
+
+
+@dataclass
+class Scenario:
+    name: str
+    function: str
+    method: str
+    query: Dict[str, str] = field(default_factory=dict)
+    body: Any = None
+    token: Optional[str] = None
+    expect: int = 200
+
+
+def finance_days(model_id: int) -> Dict[str, Any]:
+    start = date(2026, 1, 1)
+    data = []
+    for d in range(31):
+        data.append({
+            'date': (start + timedelta(days=d)).isoformat(),
+            'cbTokens': 900 + d, 'spTokens': 700, 'sodaTokens': 0, 'cam4Tokens': 0,
+            'cbIncome': round((900 + d) * 0.045, 2), 'spIncome': 35.0, 'sodaIncome': 0, 'cam4Income': 0,
+            'cb': 6, 'sp': 4, 'soda': 0, 'stripchatTokens': 700, 'transfers': 0,
+            'operator': 'operator-0001@bench.local', 'shift': True,
+        })
+    return {'modelId': model_id, 'data': data}
+
+
+def build_scenarios(dsn: str) -> List[Scenario]:
+    conn = psycopg2.connect(dsn, options=f'-c search_path={local_db.SCHEMA},public')
+    cur = conn.cursor()
+    cur.execute("SELECT email, id FROM users WHERE email IN ('content-maker-0005@bench.local')")
+    ids = dict(cur.fetchall())
+    cur.close()
+    conn.close()
+    if not ids:
+        raise SystemExit('bench dataset not found: run scripts/seed_dataset.py first')
+
+    director = seed_dataset.bench_token('director', 1)
+    producer = seed_dataset.bench_token('producer', 1)
+    operator = seed_dataset.bench_token('operator', 1)
+    return [
+        Scenario('salary_month', 'calculate-salaries', 'GET',
+                 {'period_start': PERIOD_MONTH[0], 'period_end': PERIOD_MONTH[1]}, token=director),
+        Scenario('producer_stats', 'producer-stats', 'GET',
+                 {'user_email': 'producer-0001@bench.local', 'role': 'producer',
+                  'period_start': PERIOD_HALF[0], 'period_end': PERIOD_HALF[1]}, token=producer),
+        Scenario('director_production_stats', 'producer-stats', 'GET',
+                 {'user_email': 'director-0001@bench.local', 'role': 'director',
+                  'period_start': PERIOD_HALF[0], 'period_end': PERIOD_HALF[1]}, token=director),
+        Scenario('aggregated_month', 'aggregated-finances', 'GET',
+                 {'period_start': PERIOD_MONTH[0], 'period_end': PERIOD_MONTH[1]}, token=director),
+        Scenario('shift_progress_operator', 'shift-progress', 'GET',
+                 {'user_email': 'operator-0001@bench.local', 'role': 'operator',
+                  'period_start': PERIOD_HALF[0], 'period_end': PERIOD_HALF[1]}, token=operator),
+        Scenario('finance_save_31_days', 'save-finances', 'POST',
+                 body=finance_days(ids['content-maker-0005@bench.local']), token=director),
+        Scenario('schedule_get', 'schedule', 'GET', token=director),
+        Scenario('tasks_list', 'tasks', 'GET', token=director),
+        Scenario('tasks_page', 'tasks', 'GET', {'limit': '50'}, token=director),
+        Scenario('tasks_operator_open', 'tasks', 'GET', {'limit': '50', 'status': 'pending'}, token=operator),
+        Scenario('statistics', 'statistics', 'GET', token=director),
+        Scenario('login', 'auth', 'POST',
+                 body={'action': 'login', 'email': 'operator-0001@bench.local',
+                       'password': seed_dataset.BENCH_PASSWORD}),
+    ]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run_scenario(registry: FunctionRegistry, s: Scenario, iterations: int, warmup: int) -> Dict[str, Any]:
+    headers = {'Origin': 'http://localhost:5173', 'User-Agent': 'bench'}
+    if s.token:
+        headers['X-Auth-Token'] = s.token
+
+    def call() -> Dict[str, Any]:
+        response = registry.handler(s.function)(build_event(s.method, '/', s.query, headers, s.body),
+                                                build_context(s.function))
+        if response.get('statusCode') != s.expect:
+            raise RuntimeError(f"{s.name}: status {response.get('statusCode')}: {str(response.get('body'))[:200]}")
+        return response
+
+    for _ in range(warmup):
+        call()
+
+    timings: List[float] = []
+    trips: List[int] = []
+    repeated: Dict[str, int] = {}
+    size = 0
+    for _ in range(iterations):
+        with db_trace.trace(s.function, log=None) as t:
+            started = time.perf_counter()
+            response = call()
+            timings.append((time.perf_counter() - started) * 1000)
+        trips.append(t.count)
+        repeated.update(t.repeated())
+        size = len((response.get('body') or '').encode('utf-8'))
+    return {
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'p99_ms': round(percentile(timings, 0.99), 2),
+        'queries': max(trips),
+        'bytes': size,
+        'repeated': repeated,
+    }
+
+
+def regressions(result: Dict[str, Any], base: Optional[Dict[str, Any]]) -> List[str]:
+    if not base:
+        return []
+    problems = []
+    if (result['p95_ms'] > base['p95_ms'] * (1 + P95_TOLERANCE)
+            and result['p95_ms'] - base['p95_ms'] >= P95_MIN_DELTA_MS):
+        problems.append(f"p95 {result['p95_ms']} > {base['p95_ms']}")
+    if result['queries'] > base['queries']:
+        problems.append(f"queries {result['queries']} > {base['queries']}")
+    if result['bytes'] > base['bytes'] * (1 + BYTES_TOLERANCE):
+        problems.append(f"bytes {result['bytes']} > {base['bytes']}")
+    return problems
+
+
+def load_baseline() -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Endpoint latency benchmark')
+    parser.add_argument('--only', action='append', help='имя сценария (можно несколько раз)')
+    parser.add_argument('--iterations', type=int, default=ITERATIONS)
+    parser.add_argument('--warmup', type=int, default=WARMUP)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--json', help='сохранить результаты в файл')
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    if not baseline and not args.update_baseline:
+        print(f'{os.path.relpath(BASELINE_FILE, local_db.ROOT)} not found: '
+              'run with --update-baseline on the medium preset and commit it', file=sys.stderr)
+        return 1
+
+    dsn = local_db.configure_env()
+    db_trace.install()
+    registry = FunctionRegistry()
+    scenarios = [s for s in build_scenarios(dsn) if not args.only or s.name in args.only]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    failed = False
+    print(f"{'scenario':<28} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'bytes':>9}")
+    for s in scenarios:
+        result = results[s.name] = run_scenario(registry, s, args.iterations, args.warmup)
+        problems = regressions(result, baseline.get(s.name))
+        missing = s.name not in baseline
+        failed = failed or bool(problems) or missing
+        flag = ('  REGRESSION: ' + '; '.join(problems)) if problems else ('  (no baseline)' if missing else '')
+        print(f"{s.name:<28} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+              f"{result['queries']:>8} {result['bytes']:>9}{flag}")
+        for sql, count in sorted(result['repeated'].items(), key=lambda item: -item[1]):
+            print(f'    N+1 x{count}: {sql[:db_trace.TOP_SQL_LENGTH]}')
+
+    for result in results.values():
+        result.pop('repeated')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        baseline.update(results)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+            f.write('\n')
+        print(f'baseline written to {os.path.relpath(BASELINE_FILE, local_db.ROOT)}')
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+'''
+Микробенчмарк JSON-сериализации ответа save-finances GET на синтетических строках
+(как их отдаёт RealDictCursor: Decimal и date): прежний путь с to_float/f-строкой и json.dumps
+против dumps() из функции — на stdlib json и на orjson.
+
+Использование:
+    python scripts/bench_json.py
+    python scripts/bench_json.py --rows 50000 --repeat 7
+'''
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTION = os.path.join(ROOT, 'backend', 'save-finances', 'index.py')
+
+ROWS = 10000
+REPEAT = 5
+
+
+def load_function():
+    spec = importlib.util.spec_from_file_location('fn_save_finances', FUNCTION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_rows(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    start = date(2024, 1, 1)
+    money = lambda: Decimal(rnd.randint(0, 500000)) / 100  # noqa: E731
+    return [{
+        'date': start + timedelta(days=n % 1000),
+        'cb_tokens': rnd.randint(0, 5000), 'sp_tokens': rnd.randint(0, 5000), 'soda_tokens': 0,
+        'cb_income': money(), 'sp_income': money(), 'soda_income': Decimal('0.00'),
+        'cb_online': rnd.randint(0, 12), 'sp_online': rnd.randint(0, 12), 'soda_online': None,
+        'stripchat_tokens': rnd.randint(0, 5000), 'cam4_tokens': Decimal('0'), 'cam4_income': money(),
+        'operator_name': f'operator-{n % 50:04d}@bench.local', 'has_shift': n % 3 != 0, 'transfers': None,
+    } for n in range(count)]
+
+
+def legacy(rows: List[Dict[str, Any]]) -> str:
+    '''Прежняя реализация: to_float на каждую колонку и f-строка для даты'''
+    data = []
+    for row in rows:
+        date_obj = row['date']
+
+        def to_float(val):
+            if val is None:
+                return 0
+            return float(val) if isinstance(val, Decimal) else float(val or 0)
+
+        data.append({
+            'date': f"{date_obj.year}-{date_obj.month:02d}-{date_obj.day:02d}",
+            'cbTokens': to_float(row['cb_tokens']), 'spTokens': to_float(row['sp_tokens']),
+            'sodaTokens': to_float(row['soda_tokens']), 'cbIncome': to_float(row['cb_income']),
+            'spIncome': to_float(row['sp_income']), 'sodaIncome': to_float(row['soda_income']),
+            'cb': to_float(row['cb_online']), 'sp': to_float(row['sp_online']), 'soda': to_float(row['soda_online']),
+            'stripchatTokens': to_float(row['stripchat_tokens']), 'cam4Tokens': to_float(row['cam4_tokens']),
+            'cam4Income': to_float(row['cam4_income']), 'transfers': to_float(row['transfers']),
+            'operator': row['operator_name'] or '', 'shift': row['has_shift'] or False,
+        })
+    return json.dumps(data)
+
+
+def current(module) -> Callable[[List[Dict[str, Any]]], str]:
+    def run(rows: List[Dict[str, Any]]) -> str:
+        return module.dumps([{
+            'date': row['date'],
+            'cbTokens': row['cb_tokens'] or 0, 'spTokens': row['sp_tokens'] or 0,
+            'sodaTokens': row['soda_tokens'] or 0, 'cbIncome': row['cb_income'] or 0,
+            'spIncome': row['sp_income'] or 0, 'sodaIncome': row['soda_income'] or 0,
+            'cb': row['cb_online'] or 0, 'sp': row['sp_online'] or 0, 'soda': row['soda_online'] or 0,
+            'stripchatTokens': row['stripchat_tokens'] or 0, 'cam4Tokens': row['cam4_tokens'] or 0,
+            'cam4Income': row['cam4_income'] or 0, 'transfers': row['transfers'] or 0,
+            'operator': row['operator_name'] or '', 'shift': row['has_shift'] or False,
+        } for row in rows])
+    return run
+
+
+def timeit(fn: Callable[[List[Dict[str, Any]]], str], rows: List[Dict[str, Any]], repeat: int):
+    timings = []
+    body = ''
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), body
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='JSON serialization microbenchmark')
+    parser.add_argument('--rows', type=int, default=ROWS)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    module = load_function()
+    rows = make_rows(args.rows)
+    orjson = module.orjson
+
+    variants = [('legacy to_float + json', legacy)]
+    module.orjson = None
+    variants.append(('dumps (stdlib json)', current(module)))
+    results = [(name, *timeit(fn, rows, args.repeat)) for name, fn in variants]
+    module.orjson = orjson
+    if orjson is not None:
+        results.append(('dumps (orjson)', *timeit(current(module), rows, args.repeat)))
+    else:
+        print('orjson not installed: only the stdlib fallback is measured')
+
+    reference = json.loads(results[0][2])
+    base_ms = results[0][1]
+    print(f"{'variant':<26} {'ms':>9} {'speedup':>8} {'bytes':>10}")
+    for name, ms, body in results:
+        if json.loads(body) != reference:
+            raise SystemExit(f'{name}: output differs from the legacy serializer')
+        print(f'{name:<26} {ms:>9.1f} {base_ms / ms:>7.2f}x {len(body.encode("utf-8")):>10}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
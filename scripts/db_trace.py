@@ -0,0 +1,159 @@
+'''
+Трассировка запросов к БД на один вызов функции и детектор N+1.
+
+install() подменяет psycopg2.connect так, что все соединения получают TracingConnection,
+а курсоры (любой cursor_factory, включая RealDictCursor) замеряют каждый execute/executemany/copy.
+Внутри trace(function) статистика копится по нормализованному SQL (литералы и параметры -> ?),
+на выходе печатается одна строка:
+
+    db function=producer-stats statements=63 db_ms=41.2 distinct=6 top="SELECT ... WHERE model_id = ?" x40 22.8ms
+
+и предупреждение, если один и тот же нормализованный запрос выполнен больше REPEAT_WARN раз.
+
+Используется local_gateway.py (--trace) и bench_endpoints.py.
+'''
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+
+REPEAT_WARN = int(os.environ.get('DB_TRACE_REPEAT_WARN', '5'))
+TOP_SQL_LENGTH = 120
+
+_local = threading.local()
+_installed = False
+
+_COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM_RE = re.compile(r'%\(\w+\)s|%s')
+_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_RE = re.compile(r'(VALUES\s*)\(\?[^)]*\)(?:\s*,\s*\(\?[^)]*\))*', re.I)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize(sql) -> str:
+    '''Приводит SQL к форме, по которой одинаковые запросы с разными параметрами совпадают'''
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    elif not isinstance(sql, str):
+        sql = str(sql)
+    sql = _COMMENT_RE.sub(' ', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _PARAM_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _LIST_RE.sub('(?...)', sql)
+    sql = _VALUES_RE.sub(r'\1(?...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class Trace:
+    def __init__(self, function: str):
+        self.function = function
+        self.statements: Dict[str, List[float]] = {}
+        self.count = 0
+        self.db_ms = 0.0
+
+    def record(self, sql, elapsed_ms: float):
+        key = normalize(sql)
+        entry = self.statements.setdefault(key, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed_ms
+        self.count += 1
+        self.db_ms += elapsed_ms
+
+    def top(self) -> Optional[Tuple[str, int, float]]:
+        if not self.statements:
+            return None
+        sql, (count, ms) = max(self.statements.items(), key=lambda item: item[1][1])
+        return sql, count, ms
+
+    def repeated(self, threshold: int = REPEAT_WARN) -> List[Tuple[str, int]]:
+        return sorted(
+            ((sql, int(count)) for sql, (count, _) in self.statements.items() if count > threshold),
+            key=lambda item: -item[1],
+        )
+
+    def summary(self) -> str:
+        line = (f'db function={self.function} statements={self.count} '
+                f'db_ms={self.db_ms:.1f} distinct={len(self.statements)}')
+        top = self.top()
+        if top:
+            sql, count, ms = top
+            line += f' top="{sql[:TOP_SQL_LENGTH]}" x{count} {ms:.1f}ms'
+        return line
+
+
+def current() -> Optional[Trace]:
+    return getattr(_local, 'trace', None)
+
+
+def _timed(method):
+    def wrapper(self, sql, *args, **kwargs):
+        trace = current()
+        if trace is None:
+            return method(self, sql, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, sql, *args, **kwargs)
+        finally:
+            trace.record(sql, (time.perf_counter() - started) * 1000)
+    return wrapper
+
+
+_cursor_classes: Dict[type, type] = {}
+
+
+def _tracing_cursor(base: type) -> type:
+    cls = _cursor_classes.get(base)
+    if cls is None:
+        cls = _cursor_classes[base] = type(f'Tracing{base.__name__}', (base,), {
+            'execute': _timed(base.execute),
+            'executemany': _timed(base.executemany),
+            'copy_expert': _timed(base.copy_expert),
+        })
+    return cls
+
+
+class TracingConnection(psycopg2.extensions.connection):
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _tracing_cursor(base)
+        return super().cursor(*args, **kwargs)
+
+
+def install():
+    '''Подключает трассировку ко всем последующим psycopg2.connect; повторный вызов ничего не делает'''
+    global _installed
+    if _installed:
+        return
+    original = psycopg2.connect
+
+    def connect(*args, **kwargs):
+        kwargs.setdefault('connection_factory', TracingConnection)
+        return original(*args, **kwargs)
+
+    psycopg2.connect = connect
+    _installed = True
+
+
+@contextmanager
+def trace(function: str, log: Optional[Callable[[str], None]] = print,
+          repeat_warn: int = REPEAT_WARN) -> Iterator[Trace]:
+    '''Собирает статистику запросов одного вызова; log=None — без вывода (для бенчмарков)'''
+    previous = current()
+    t = _local.trace = Trace(function)
+    try:
+        yield t
+    finally:
+        _local.trace = previous
+        if log is not None and _installed:
+            log(t.summary())
+            for sql, count in t.repeated(repeat_warn):
+                log(f'db N+1 function={function} x{count} "{sql[:TOP_SQL_LENGTH]}"')
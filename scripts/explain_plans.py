@@ -0,0 +1,257 @@
+'''
+Снимки планов горячих запросов: EXPLAIN (FORMAT JSON) на датасете из seed_dataset.py
+и проверка формы плана. Ловит удалённый индекс или изменённый предикат, из-за которых
+запрос уходит в Seq Scan, и резкий сдвиг оценки строк.
+
+Использование:
+    python scripts/local_db.py migrate && python scripts/seed_dataset.py --preset medium
+    python scripts/explain_plans.py                 # exit 1, если план разошёлся с ожиданием или снимком
+    python scripts/explain_plans.py --only tasks_operator_page --verbose
+    python scripts/explain_plans.py --update        # записать текущие планы в plan_snapshots.json
+
+Проверки для каждого запроса:
+    - используются индексы из indexes (Index Scan / Index Only Scan / Bitmap Index Scan);
+    - нет Seq Scan по таблицам из no_seq_scan;
+    - относительно снимка: таблица, читавшаяся по индексу, не стала Seq Scan,
+      оценка строк на корне плана не сдвинулась больше чем в ROWS_FACTOR раз.
+SQL повторяет запросы функций; при изменении запроса в index.py нужно поправить его и здесь.
+'''
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import local_db  # noqa: E402
+
+SCHEMA = local_db.SCHEMA
+SNAPSHOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plan_snapshots.json')
+
+ROWS_FACTOR = 10.0
+INDEX_NODES = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+PERIOD_MONTH = ('2026-01-01', '2026-01-31')
+PERIOD_HALF = ('2026-01-16', '2026-01-31')
+OPERATOR_EMAIL = 'operator-0001@bench.local'
+MODEL_EMAIL = 'content-maker-0005@bench.local'
+TASKS_PAGE = 50
+
+
+@dataclass
+class HotQuery:
+    name: str
+    function: str
+    sql: str
+    params: Sequence[Any] = ()
+    indexes: Sequence[str] = ()
+    no_seq_scan: Sequence[str] = ()
+
+
+@dataclass
+class PlanShape:
+    root_rows: float
+    total_cost: float
+    scans: List[Tuple[str, str, str]] = field(default_factory=list)
+
+    def indexes(self) -> List[str]:
+        return sorted({index for node, _, index in self.scans if node in INDEX_NODES and index})
+
+    def seq_scans(self) -> List[str]:
+        return sorted({relation for node, relation, _ in self.scans if node == 'Seq Scan'})
+
+    def indexed_relations(self) -> List[str]:
+        return sorted({relation for node, relation, _ in self.scans if node in INDEX_NODES and relation})
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'root_rows': self.root_rows,
+            'indexes': self.indexes(),
+            'indexed_relations': self.indexed_relations(),
+            'seq_scans': self.seq_scans(),
+        }
+
+
+def hot_queries(ids: Dict[str, int]) -> List[HotQuery]:
+    operator_id = ids[OPERATOR_EMAIL]
+    model_id = ids[MODEL_EMAIL]
+    return [
+        HotQuery('salary_finances', 'calculate-salaries', f'''
+            SELECT mf.model_id, mf.date, mf.cb_tokens, mf.sp_tokens, mf.soda_tokens, mf.cam4_tokens,
+                   mf.cb_income, mf.sp_income, mf.soda_income, mf.cam4_income, mf.transfers,
+                   mf.operator_name, mf.operator_user_id
+            FROM {SCHEMA}.model_finances mf
+            WHERE mf.date BETWEEN %s AND %s
+        ''', PERIOD_MONTH, indexes=['idx_model_finances_date'], no_seq_scan=['model_finances']),
+        HotQuery('aggregated_daily', 'aggregated-finances', f'''
+            SELECT date, SUM(cb_tokens), SUM(stripchat_tokens), SUM(soda_tokens), SUM(cam4_tokens),
+                   SUM(cb_income), SUM(sp_income), SUM(soda_income), SUM(cam4_income), SUM(transfers)
+            FROM {SCHEMA}.model_finances
+            WHERE date BETWEEN %s AND %s
+            GROUP BY date
+            ORDER BY date ASC
+        ''', PERIOD_MONTH, indexes=['idx_model_finances_date'], no_seq_scan=['model_finances']),
+        HotQuery('aggregated_summary', 'aggregated-finances', f'''
+            SELECT SUM(cb_tokens), SUM(stripchat_tokens), SUM(soda_tokens), SUM(cam4_tokens),
+                   SUM(cb_income), SUM(sp_income), SUM(soda_income), SUM(cam4_income), SUM(transfers)
+            FROM {SCHEMA}.model_finances
+            WHERE date BETWEEN %s AND %s
+        ''', PERIOD_MONTH, indexes=['idx_model_finances_date'], no_seq_scan=['model_finances']),
+        HotQuery('shift_progress_operator', 'shift-progress', f'''
+            SELECT COUNT(DISTINCT date) as c
+            FROM {SCHEMA}.model_finances
+            WHERE has_shift = true
+              AND operator_user_id = %s
+              AND date >= %s AND date <= %s
+        ''', (operator_id, *PERIOD_HALF),
+            indexes=['idx_model_finances_operator_user_date'], no_seq_scan=['model_finances']),
+        HotQuery('producer_model_stats', 'producer-stats', f'''
+            SELECT COALESCE(SUM((cb_income + sp_income + soda_income + cam4_income + transfers) * 0.6), 0),
+                   COALESCE(SUM(cb_income + sp_income + soda_income + cam4_income + transfers), 0),
+                   COUNT(CASE WHEN has_shift = true THEN 1 END)
+            FROM {SCHEMA}.model_finances
+            WHERE model_id = %s AND date >= %s AND date <= %s
+        ''', (model_id, *PERIOD_HALF),
+            indexes=['idx_model_finances_model_date'], no_seq_scan=['model_finances']),
+        HotQuery('producer_operator_stats', 'producer-stats', f'''
+            SELECT COUNT(DISTINCT date) as shift_count
+            FROM {SCHEMA}.model_finances
+            WHERE operator_user_id = %s AND has_shift = true AND date >= %s AND date <= %s
+        ''', (operator_id, *PERIOD_HALF),
+            indexes=['idx_model_finances_operator_user_date'], no_seq_scan=['model_finances']),
+        HotQuery('tasks_operator_page', 'tasks', f'''
+            SELECT t.id, t.title, t.description, t.status, t.priority,
+                   t.assigned_to_email, t.assigned_by_email, t.due_date,
+                   t.created_at, t.updated_at, t.completed_at,
+                   u1.full_name as assigned_to_name, u2.full_name as assigned_by_name,
+                   cc.comment_count
+            FROM {SCHEMA}.tasks t
+            LEFT JOIN {SCHEMA}.users u1 ON u1.id = t.assigned_to_user_id
+            LEFT JOIN {SCHEMA}.users u2 ON u2.id = t.assigned_by_user_id
+            LEFT JOIN LATERAL (
+                SELECT COUNT(*) AS comment_count FROM {SCHEMA}.task_comments c WHERE c.task_id = t.id
+            ) cc ON true
+            WHERE t.assigned_to_email = %s
+            ORDER BY t.created_at DESC, t.id DESC
+            LIMIT %s
+        ''', (OPERATOR_EMAIL, TASKS_PAGE + 1),
+            indexes=['idx_tasks_assigned_to_created', 'idx_task_comments_task_id'],
+            no_seq_scan=['tasks', 'task_comments']),
+        HotQuery('tasks_director_page', 'tasks', f'''
+            SELECT t.id, t.created_at, cc.comment_count
+            FROM {SCHEMA}.tasks t
+            LEFT JOIN LATERAL (
+                SELECT COUNT(*) AS comment_count FROM {SCHEMA}.task_comments c WHERE c.task_id = t.id
+            ) cc ON true
+            ORDER BY t.created_at DESC, t.id DESC
+            LIMIT %s
+        ''', (TASKS_PAGE + 1,),
+            indexes=['idx_tasks_created_id', 'idx_task_comments_task_id'],
+            no_seq_scan=['tasks', 'task_comments']),
+    ]
+
+
+def collect(node: Dict[str, Any], scans: List[Tuple[str, str, str]], heap_relation: str = ''):
+    node_type = node.get('Node Type', '')
+    relation = node.get('Relation Name', '')
+    if node_type in INDEX_NODES or node_type == 'Seq Scan':
+        # Bitmap Index Scan не несёт имени таблицы — берём его из родительского Bitmap Heap Scan
+        scans.append((node_type, relation or heap_relation, node.get('Index Name', '')))
+    if node_type == 'Bitmap Heap Scan':
+        heap_relation = relation
+    for child in node.get('Plans', []):
+        collect(child, scans, heap_relation)
+
+
+def explain(cur, query: HotQuery) -> Tuple[PlanShape, Any]:
+    cur.execute('EXPLAIN (FORMAT JSON) ' + query.sql, list(query.params))
+    raw = cur.fetchone()[0]
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    root = raw[0]['Plan']
+    shape = PlanShape(root_rows=float(root.get('Plan Rows', 0)), total_cost=float(root.get('Total Cost', 0)))
+    collect(root, shape.scans)
+    return shape, raw
+
+
+def check(query: HotQuery, shape: PlanShape, snapshot: Dict[str, Any]) -> List[str]:
+    problems = []
+    used = shape.indexes()
+    for index in query.indexes:
+        if index not in used:
+            problems.append(f'index {index} not used')
+    seq = shape.seq_scans()
+    for relation in query.no_seq_scan:
+        if relation in seq:
+            problems.append(f'Seq Scan on {relation}')
+    if snapshot:
+        for relation in snapshot.get('indexed_relations', []):
+            if relation in seq and relation not in snapshot.get('seq_scans', []):
+                problems.append(f'{relation}: index scan in snapshot, Seq Scan now')
+        base_rows = max(float(snapshot.get('root_rows') or 0), 1.0)
+        rows = max(shape.root_rows, 1.0)
+        if rows > base_rows * ROWS_FACTOR or rows * ROWS_FACTOR < base_rows:
+            problems.append(f'estimated rows {shape.root_rows:g} vs snapshot {snapshot["root_rows"]:g}')
+    return problems
+
+
+def load_fixture_ids(cur) -> Dict[str, int]:
+    cur.execute(f'SELECT email, id FROM {SCHEMA}.users WHERE email IN (%s, %s)', (OPERATOR_EMAIL, MODEL_EMAIL))
+    ids = dict(cur.fetchall())
+    if len(ids) < 2:
+        raise SystemExit('bench dataset not found: run scripts/seed_dataset.py first')
+    return ids
+
+
+def load_snapshots() -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(SNAPSHOT_FILE):
+        return {}
+    with open(SNAPSHOT_FILE) as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='EXPLAIN plan snapshot checks for hot queries')
+    parser.add_argument('--only', action='append', help='имя запроса (можно несколько раз)')
+    parser.add_argument('--update', action='store_true', help='записать текущие планы как снимок')
+    parser.add_argument('--verbose', action='store_true', help='печатать полный JSON плана')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(local_db.local_dsn(), options=f'-c search_path={SCHEMA},public')
+    cur = conn.cursor()
+    try:
+        ids = load_fixture_ids(cur)
+        queries = [q for q in hot_queries(ids) if not args.only or q.name in args.only]
+        snapshots = load_snapshots()
+
+        failed = False
+        for query in queries:
+            shape, raw = explain(cur, query)
+            problems = check(query, shape, snapshots.get(query.name, {}))
+            failed = failed or bool(problems)
+            status = 'FAIL ' + '; '.join(problems) if problems else ('ok' if query.name in snapshots else 'ok (no snapshot)')
+            print(f'{query.name:<26} {query.function:<20} rows={shape.root_rows:<8g} '
+                  f'cost={shape.total_cost:<10.1f} indexes={",".join(shape.indexes()) or "-"}  {status}')
+            if args.verbose:
+                print(json.dumps(raw, indent=2, ensure_ascii=False))
+            if args.update:
+                snapshots[query.name] = shape.snapshot()
+    finally:
+        cur.close()
+        conn.close()
+
+    if args.update:
+        with open(SNAPSHOT_FILE, 'w') as f:
+            json.dump(dict(sorted(snapshots.items())), f, indent=2)
+            f.write('\n')
+        print(f'snapshots written to {os.path.relpath(SNAPSHOT_FILE, local_db.ROOT)}')
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+'''
+Замер холодного импорта backend-функций через python -X importtime.
+Каждая функция импортируется в отдельном процессе (как при холодном старте),
+берётся медиана нескольких прогонов и сравнивается с бюджетом из import_budget.json.
+
+Использование:
+    python scripts/import_budget.py                 # проверить все функции, exit 1 при превышении
+    python scripts/import_budget.py auth cbr-rate   # только перечисленные
+    python scripts/import_budget.py --update        # переписать бюджет по текущим замерам (+запас)
+'''
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, 'backend')
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_budget.json')
+
+RUNS = 5
+HEADROOM = 2.0
+MIN_BUDGET_MS = 100.0
+
+# import time:       123 |       4567 | index
+LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.+)$')
+
+
+def list_functions() -> List[str]:
+    return sorted(
+        name for name in os.listdir(BACKEND)
+        if os.path.isfile(os.path.join(BACKEND, name, 'index.py'))
+    )
+
+
+def measure_once(function: str) -> Tuple[Optional[float], Optional[str]]:
+    '''Кумулятивное время импорта модуля index в миллисекундах или текст ошибки'''
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import index'],
+        cwd=os.path.join(BACKEND, function),
+        capture_output=True,
+        text=True,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1]
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m and m.group(3).strip() == 'index':
+            return int(m.group(2)) / 1000.0, None
+    return None, 'importtime output has no entry for index'
+
+
+def measure(function: str, runs: int) -> Tuple[Optional[float], Optional[str]]:
+    samples = []
+    for _ in range(runs):
+        value, error = measure_once(function)
+        if error:
+            return None, error
+        samples.append(value)
+    return statistics.median(samples), None
+
+
+def load_budget() -> Dict[str, float]:
+    if not os.path.exists(BUDGET_FILE):
+        return {}
+    with open(BUDGET_FILE) as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Cold import budget for backend functions')
+    parser.add_argument('functions', nargs='*', help='имена функций (по умолчанию все)')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument('--update', action='store_true', help='записать текущие замеры как новый бюджет')
+    args = parser.parse_args()
+
+    functions = args.functions or list_functions()
+    budget = load_budget()
+    failed = False
+    measured: Dict[str, float] = {}
+
+    print(f"{'function':<30} {'median ms':>10} {'budget ms':>10}")
+    for function in functions:
+        value, error = measure(function, args.runs)
+        if error:
+            print(f'{function:<30} {"ERROR":>10} {"":>10}  {error}')
+            failed = True
+            continue
+        measured[function] = value
+        limit = budget.get(function)
+        status = ''
+        if limit is not None and value > limit:
+            status = '  OVER BUDGET'
+            failed = True
+        limit_text = f'{limit:.1f}' if limit is not None else '-'
+        print(f'{function:<30} {value:>10.1f} {limit_text:>10}{status}')
+
+    if args.update:
+        for function, value in measured.items():
+            budget[function] = round(max(value * HEADROOM, MIN_BUDGET_MS), 1)
+        with open(BUDGET_FILE, 'w') as f:
+            json.dump(dict(sorted(budget.items())), f, indent=2)
+            f.write('\n')
+        print(f'budget written to {os.path.relpath(BUDGET_FILE, ROOT)}')
+        return 0
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+'''
+Локальный шлюз: все backend-функции в одном процессе за одним HTTP-сервером.
+Маршрут /<имя-функции>/... или /<uuid из func2url.json>/... передаётся в handler(event, context)
+с событием в формате платформы (headers, queryStringParameters, requestContext.identity.sourceIp).
+
+Использование:
+    python scripts/local_gateway.py                    # http://127.0.0.1:8000
+    python scripts/local_gateway.py --port 9000 --migrate
+    python scripts/local_gateway.py --trace            # строка статистики БД и N+1 на каждый вызов
+
+Фронтенд можно направить на шлюз, заменив https://functions.poehali.dev на http://127.0.0.1:8000.
+Модули функций загружаются один раз и живут как «тёплый» контейнер.
+'''
+
+import argparse
+import base64
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import db_trace  # noqa: E402
+import local_db  # noqa: E402
+
+ROOT = local_db.ROOT
+BACKEND = os.path.join(ROOT, 'backend')
+FUNC2URL = os.path.join(BACKEND, 'func2url.json')
+
+TEXT_TYPES = ('application/json', 'text/', 'application/x-www-form-urlencoded')
+
+
+class FunctionRegistry:
+    '''Имя функции или uuid её URL -> handler; модули грузятся лениво и кэшируются'''
+
+    def __init__(self, backend_dir: str = BACKEND):
+        self.backend_dir = backend_dir
+        self.names = sorted(
+            name for name in os.listdir(backend_dir)
+            if os.path.isfile(os.path.join(backend_dir, name, 'index.py'))
+        )
+        self.aliases: Dict[str, str] = {name: name for name in self.names}
+        if os.path.exists(FUNC2URL):
+            with open(FUNC2URL) as f:
+                for name, url in json.load(f).items():
+                    self.aliases[url.rstrip('/').rsplit('/', 1)[-1]] = name
+        self._handlers: Dict[str, Callable] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, path: str) -> Tuple[Optional[str], str]:
+        '''/<alias>/rest -> (имя функции, /rest)'''
+        parts = path.lstrip('/').split('/', 1)
+        name = self.aliases.get(parts[0])
+        rest = '/' + (parts[1] if len(parts) > 1 else '')
+        return name, rest
+
+    def handler(self, name: str) -> Callable:
+        with self._lock:
+            if name not in self._handlers:
+                path = os.path.join(self.backend_dir, name, 'index.py')
+                spec = importlib.util.spec_from_file_location(f'fn_{name.replace("-", "_")}', path)
+                module = importlib.util.module_from_spec(spec)
+                sys.path.insert(0, os.path.dirname(path))
+                try:
+                    spec.loader.exec_module(module)
+                finally:
+                    sys.path.pop(0)
+                self._handlers[name] = module.handler
+            return self._handlers[name]
+
+
+def build_event(method: str, path: str, query: Optional[Dict[str, str]] = None,
+                headers: Optional[Dict[str, str]] = None, body: Any = None,
+                source_ip: str = '127.0.0.1') -> Dict[str, Any]:
+    '''Событие в том виде, в каком его получает функция на платформе'''
+    headers = dict(headers or {})
+    # Платформа прокидывает cookie в функцию как X-Cookie
+    if 'Cookie' in headers and 'X-Cookie' not in headers:
+        headers['X-Cookie'] = headers['Cookie']
+    is_base64 = False
+    if body is None:
+        body_text = ''
+    elif isinstance(body, (bytes, bytearray)):
+        content_type = headers.get('Content-Type', '')
+        if not content_type or content_type.startswith(TEXT_TYPES):
+            body_text = body.decode('utf-8')
+        else:
+            body_text = base64.b64encode(body).decode('ascii')
+            is_base64 = True
+    elif isinstance(body, str):
+        body_text = body
+    else:
+        body_text = json.dumps(body)
+        headers.setdefault('Content-Type', 'application/json')
+    return {
+        'httpMethod': method,
+        'path': path,
+        'headers': headers,
+        'queryStringParameters': dict(query or {}),
+        'body': body_text,
+        'isBase64Encoded': is_base64,
+        'requestContext': {
+            'requestId': uuid.uuid4().hex,
+            'identity': {'sourceIp': source_ip, 'userAgent': headers.get('User-Agent', '')},
+            'httpMethod': method,
+        },
+    }
+
+
+def build_context(name: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        request_id=uuid.uuid4().hex,
+        function_name=name,
+        function_version='local',
+        memory_limit_in_mb=128,
+    )
+
+
+def invoke(registry: FunctionRegistry, name: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    handler = registry.handler(name)
+    with db_trace.trace(name):
+        return handler(event, build_context(name))
+
+
+def make_request_handler(registry: FunctionRegistry, quiet: bool = False):
+    class GatewayHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _dispatch(self):
+            url = urlsplit(self.path)
+            name, rest = registry.resolve(url.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else None
+            if name is None:
+                return self._send(404, {'Content-Type': 'application/json'},
+                                  json.dumps({'error': f'Unknown function: {url.path}'}).encode())
+
+            event = build_event(
+                self.command, rest, dict(parse_qsl(url.query, keep_blank_values=True)),
+                dict(self.headers.items()), raw, self.client_address[0],
+            )
+            started = time.perf_counter()
+            try:
+                response = invoke(registry, name, event)
+            except Exception as e:
+                return self._send(502, {'Content-Type': 'application/json'},
+                                  json.dumps({'error': f'{type(e).__name__}: {e}'}).encode())
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            headers = dict(response.get('headers') or {})
+            if 'X-Set-Cookie' in headers:
+                headers['Set-Cookie'] = headers['X-Set-Cookie']
+            headers['X-Gateway-Function'] = name
+            headers['X-Gateway-Duration-Ms'] = f'{elapsed_ms:.1f}'
+            body = response.get('body') or ''
+            payload = base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+            self._send(int(response.get('statusCode', 200)), headers, payload)
+
+        def _send(self, status: int, headers: Dict[str, str], payload: bytes):
+            self.send_response(status)
+            for key, value in headers.items():
+                if key.lower() not in ('content-length', 'transfer-encoding'):
+                    self.send_header(key, str(value))
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_OPTIONS = _dispatch
+
+        def log_message(self, format, *args):
+            if not quiet:
+                super().log_message(format, *args)
+
+    return GatewayHandler
+
+
+def serve(host: str, port: int, registry: Optional[FunctionRegistry] = None, quiet: bool = False) -> ThreadingHTTPServer:
+    registry = registry or FunctionRegistry()
+    return ThreadingHTTPServer((host, port), make_request_handler(registry, quiet))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Local gateway for backend functions')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--migrate', action='store_true', help='применить db_migrations перед стартом')
+    parser.add_argument('--quiet', action='store_true')
+    parser.add_argument('--trace', action='store_true', help='статистика запросов к БД на каждый вызов')
+    args = parser.parse_args()
+
+    if args.trace:
+        db_trace.install()
+
+    dsn = local_db.configure_env()
+    if args.migrate:
+        applied = local_db.apply_migrations(dsn)
+        print(f'{len(applied)} migration(s) applied')
+
+    registry = FunctionRegistry()
+    server = serve(args.host, args.port, registry, args.quiet)
+    print(f'{len(registry.names)} functions on http://{args.host}:{args.port}/<function>/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+'''
+Проверка CORS preflight для всех backend-функций.
+Каждая функция получает OPTIONS-запрос с подменённым psycopg2.connect, который считает
+подключения; preflight должен вернуть 200, Access-Control-Max-Age = PREFLIGHT_MAX_AGE
+и не открыть ни одного соединения с БД.
+
+Функции не могут импортировать общий модуль, поэтому хелперы из SHARED_HELPERS скопированы
+в несколько index.py; при полном прогоне их исходники во всех копиях должны совпадать байт в байт.
+
+Использование:
+    python scripts/preflight_check.py            # все функции, exit 1 при нарушениях
+    python scripts/preflight_check.py auth tasks
+'''
+
+import ast
+import importlib.util
+import os
+import sys
+from typing import Any, Dict, List, Tuple
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, 'backend')
+
+PREFLIGHT_MAX_AGE = '86400'
+ORIGIN = 'https://mba-agency.ru'
+
+# Имена верхнего уровня (def или константа), которые копируются между функциями как есть;
+# 'import orjson' — блок try/except с импортом и запасным вариантом
+SHARED_HELPERS = (
+    'COMPRESS_MIN_BYTES', 'accepted_encodings', 'compress_response',
+    'import orjson', 'json_default', 'dumps',
+)
+
+
+class ConnectCounter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        raise RuntimeError('preflight must not open a database connection')
+
+
+def list_functions() -> List[str]:
+    return sorted(
+        name for name in os.listdir(BACKEND)
+        if os.path.isfile(os.path.join(BACKEND, name, 'index.py'))
+    )
+
+
+def load_handler(function: str):
+    path = os.path.join(BACKEND, function, 'index.py')
+    spec = importlib.util.spec_from_file_location(f'fn_{function.replace("-", "_")}', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, os.path.dirname(path))
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.pop(0)
+    return module.handler
+
+
+def check(function: str) -> List[str]:
+    counter = ConnectCounter()
+    original = psycopg2.connect
+    psycopg2.connect = counter
+    try:
+        handler = load_handler(function)
+        event: Dict[str, Any] = {
+            'httpMethod': 'OPTIONS',
+            'headers': {'Origin': ORIGIN, 'Access-Control-Request-Method': 'POST'},
+            'queryStringParameters': {},
+            'body': '',
+        }
+        try:
+            response = handler(event, None)
+        except Exception as e:
+            return [f'handler raised {type(e).__name__}: {e}'] + (
+                [f'{counter.calls} DB connection(s)'] if counter.calls else []
+            )
+    finally:
+        psycopg2.connect = original
+
+    problems = []
+    if counter.calls:
+        problems.append(f'{counter.calls} DB connection(s)')
+    if response.get('statusCode') != 200:
+        problems.append(f"status {response.get('statusCode')}")
+    headers = response.get('headers') or {}
+    if headers.get('Access-Control-Max-Age') != PREFLIGHT_MAX_AGE:
+        problems.append(f"Access-Control-Max-Age={headers.get('Access-Control-Max-Age')!r}")
+    if not headers.get('Access-Control-Allow-Methods'):
+        problems.append('no Access-Control-Allow-Methods')
+    return problems
+
+
+def top_level_sources(function: str) -> Dict[str, str]:
+    path = os.path.join(BACKEND, function, 'index.py')
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    found = {}
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            names = [node.name]
+        elif isinstance(node, ast.Assign):
+            names = [t.id for t in node.targets if isinstance(t, ast.Name)]
+        elif isinstance(node, ast.Try) and any(
+            isinstance(n, ast.Import) and any(a.name == 'orjson' for a in n.names) for n in node.body
+        ):
+            names = ['import orjson']
+        else:
+            continue
+        for name in names:
+            if name in SHARED_HELPERS:
+                found[name] = ast.get_source_segment(source, node)
+    return found
+
+
+def check_shared(functions: List[str]) -> List[Tuple[str, List[str], List[str]]]:
+    '''(хелпер, функции с копией, функции с отличающейся копией); эталон — первая по алфавиту'''
+    copies: Dict[str, Dict[str, str]] = {name: {} for name in SHARED_HELPERS}
+    for function in functions:
+        for name, segment in top_level_sources(function).items():
+            copies[name][function] = segment
+    result = []
+    for name in SHARED_HELPERS:
+        holders = sorted(copies[name])
+        if not holders:
+            continue
+        reference = copies[name][holders[0]]
+        result.append((name, holders, [f for f in holders[1:] if copies[name][f] != reference]))
+    return result
+
+
+def main() -> int:
+    functions = sys.argv[1:] or list_functions()
+    failed = 0
+    for function in functions:
+        problems = check(function)
+        if problems:
+            failed += 1
+            print(f'FAIL {function}: ' + '; '.join(problems))
+        else:
+            print(f'ok   {function}')
+    print(f'{len(functions) - failed}/{len(functions)} preflights passed')
+
+    if sys.argv[1:]:
+        return 1 if failed else 0
+    diverged = 0
+    for name, holders, differing in check_shared(functions):
+        if differing:
+            diverged += 1
+            print(f'FAIL shared {name}: {", ".join(differing)} differ from {holders[0]}')
+        else:
+            print(f'ok   shared {name} ({len(holders)} copies)')
+    return 1 if failed or diverged else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
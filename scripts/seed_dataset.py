@@ -0,0 +1,372 @@
+'''
+Детерминированный синтетический датасет для бенчмарков (локальная Postgres после local_db.py migrate).
+Заполняет согласованно users, назначения операторов и продюсеров, пары, model_finances за несколько лет,
+планы, корректировки, задачи, расписание и токены. Загрузка через COPY в одной транзакции
+с отключёнными триггерами; производные колонки (*_user_id, накопительные суммы, MV) считаются
+множественными запросами в конце.
+
+Использование:
+    python scripts/seed_dataset.py --preset small|medium|large [--seed 42]
+
+Все пользователи получают пароль BENCH_PASSWORD; у директоров, продюсеров, операторов и части моделей
+есть токены вида bench-<role>-<n> (см. bench_token) для запросов к функциям.
+'''
+
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Sequence
+from urllib.parse import urlsplit
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import local_db  # noqa: E402
+
+SCHEMA = local_db.SCHEMA
+BENCH_PASSWORD = 'bench-password'
+EMAIL_DOMAIN = 'bench.local'
+TODAY = date(2026, 1, 31)
+
+PRESETS: Dict[str, Dict[str, int]] = {
+    'small': {'directors': 2, 'producers': 3, 'operators': 10, 'models': 30, 'solo': 5, 'pairs': 3, 'days': 120, 'tasks': 300, 'apartments': 3},
+    'medium': {'directors': 3, 'producers': 10, 'operators': 50, 'models': 150, 'solo': 20, 'pairs': 15, 'days': 730, 'tasks': 5000, 'apartments': 8},
+    'large': {'directors': 3, 'producers': 30, 'operators': 150, 'models': 500, 'solo': 60, 'pairs': 50, 'days': 1095, 'tasks': 30000, 'apartments': 20},
+}
+
+# Таблицы, которые генератор очищает перед загрузкой (порядок важен только для читаемости)
+TABLES = (
+    'task_comments', 'tasks', 'schedule', 'salary_adjustments', 'employee_plans', 'earned_bonuses',
+    'model_earnings_totals', 'statistics_cache', 'model_finances', 'model_pairs', 'producer_assignments',
+    'operator_model_assignments', 'login_history', 'auth_tokens', 'users',
+)
+
+ROLE_PERMISSIONS = {
+    'director': ['view_home', 'view_models', 'view_finances', 'view_checks', 'view_schedule', 'view_dashboard',
+                 'view_files', 'manage_users', 'manage_assignments', 'manage_producers', 'view_audit',
+                 'view_tasks', 'view_production'],
+    'producer': ['view_home', 'view_models', 'view_finances', 'view_checks', 'view_schedule', 'view_files',
+                 'manage_assignments', 'view_tasks', 'view_production'],
+    'operator': ['view_home', 'view_models', 'view_schedule', 'view_files', 'view_tasks'],
+    'solo_maker': ['view_home', 'view_models', 'view_schedule', 'view_files'],
+    'content_maker': ['view_home', 'view_files'],
+}
+
+DAY_NAMES = ('Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс')
+TASK_STATUSES = ('pending', 'in_progress', 'completed', 'completed', 'completed')
+TASK_PRIORITIES = ('low', 'medium', 'high')
+
+
+def bench_token(role: str, n: int) -> str:
+    return f'bench-{role}-{n}'
+
+
+def pg_array(values: Sequence[str]) -> str:
+    return '{' + ','.join(values) + '}'
+
+
+def copy_rows(cur, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    count = 0
+    for row in rows:
+        writer.writerow(['\\N' if v is None else v for v in row])
+        count += 1
+    buf.seek(0)
+    cur.copy_expert(
+        f"COPY {SCHEMA}.{table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        buf,
+    )
+    return count
+
+
+def periods(start: date, end: date) -> List[tuple]:
+    '''Расчётные периоды: 1–15 и 16–конец месяца'''
+    result = []
+    cursor = date(start.year, start.month, 1)
+    while cursor <= end:
+        next_month = (cursor.replace(day=28) + timedelta(days=4)).replace(day=1)
+        result.append((cursor, cursor.replace(day=15)))
+        result.append((cursor.replace(day=16), next_month - timedelta(days=1)))
+        cursor = next_month
+    return [p for p in result if p[1] >= start and p[0] <= end]
+
+
+class Dataset:
+    def __init__(self, preset: Dict[str, int], seed: int, password_hash: str):
+        self.p = preset
+        self.rnd = random.Random(seed)
+        self.password_hash = password_hash
+        self.users: List[Dict[str, Any]] = []
+        self.by_role: Dict[str, List[Dict[str, Any]]] = {}
+        self.model_operator: Dict[int, Dict[str, Any]] = {}
+
+    def build_users(self):
+        plan = [('director', self.p['directors']), ('producer', self.p['producers']),
+                ('operator', self.p['operators']), ('content_maker', self.p['models']),
+                ('solo_maker', self.p['solo'])]
+        created = datetime(2022, 1, 1)
+        for role, count in plan:
+            for n in range(1, count + 1):
+                user = {
+                    'id': len(self.users) + 1,
+                    'email': f'{role.replace("_", "-")}-{n:04d}@{EMAIL_DOMAIN}',
+                    'role': role,
+                    'full_name': f'{role.replace("_", " ").title()} {n:04d}',
+                    'n': n,
+                    'created_at': created + timedelta(days=self.rnd.randint(0, 700)),
+                }
+                self.users.append(user)
+                self.by_role.setdefault(role, []).append(user)
+
+    def user_rows(self):
+        for u in self.users:
+            yield (
+                u['id'], u['email'], self.password_hash, u['role'], u['full_name'], u['created_at'],
+                u['created_at'], True, pg_array(ROLE_PERMISSIONS[u['role']]),
+                str(self.rnd.choice((40, 50, 60))) if u['role'] == 'solo_maker' else '50',
+            )
+
+    def models(self) -> List[Dict[str, Any]]:
+        return self.by_role['content_maker'] + self.by_role['solo_maker']
+
+    def operator_assignment_rows(self):
+        director = self.by_role['director'][0]
+        operators = self.by_role['operator']
+        for i, model in enumerate(self.by_role['content_maker']):
+            op = operators[i % len(operators)]
+            self.model_operator[model['id']] = op
+            yield (i + 1, op['email'], model['id'], director['email'], self.rnd.choice((15, 20, 20, 25)),
+                   model['email'], op['id'], model['id'])
+
+    def producer_assignment_rows(self):
+        director = self.by_role['director'][0]
+        producers = self.by_role['producer']
+        row_id = 0
+        for i, model in enumerate(self.by_role['content_maker']):
+            producer = producers[i % len(producers)]
+            row_id += 1
+            pct = self.rnd.choice((None, None, 5, 10))
+            yield (row_id, producer['email'], model['id'], None, director['email'], 'model', model['email'], pct,
+                   producer['id'], model['id'], None)
+        for i, op in enumerate(self.by_role['operator']):
+            producer = producers[i % len(producers)]
+            row_id += 1
+            yield (row_id, producer['email'], None, op['email'], director['email'], 'operator', None, None,
+                   producer['id'], None, op['id'])
+
+    def pair_rows(self):
+        director = self.by_role['director'][0]
+        makers = self.by_role['content_maker'][:self.p['pairs'] * 2]
+        for i in range(0, len(makers) - 1, 2):
+            m1, m2 = makers[i], makers[i + 1]
+            op = self.model_operator[m1['id']]
+            yield (i // 2 + 1, m1['email'], m2['email'], director['email'], True, 17.5, 15.0, 10.0,
+                   op['email'], m1['id'], m2['id'], op['id'])
+
+    def finance_rows(self):
+        start = TODAY - timedelta(days=self.p['days'] - 1)
+        row_id = 0
+        for model in self.models():
+            activity = self.rnd.uniform(0.45, 0.9)
+            scale = self.rnd.uniform(0.5, 2.5)
+            op = self.model_operator.get(model['id'])
+            for d in range(self.p['days']):
+                day = start + timedelta(days=d)
+                if self.rnd.random() > activity:
+                    continue
+                row_id += 1
+                cb = int(self.rnd.gauss(900, 400) * scale) if self.rnd.random() < 0.8 else 0
+                sp = int(self.rnd.gauss(700, 300) * scale) if self.rnd.random() < 0.6 else 0
+                soda = int(self.rnd.gauss(300, 150) * scale) if self.rnd.random() < 0.3 else 0
+                cam4 = round(self.rnd.uniform(0, 60) * scale, 2) if self.rnd.random() < 0.2 else 0
+                cb, sp, soda = max(cb, 0), max(sp, 0), max(soda, 0)
+                transfers = round(self.rnd.uniform(0, 80), 2) if self.rnd.random() < 0.05 else 0
+                on_shift = op is not None and (cb or sp or soda or cam4) and self.rnd.random() < 0.9
+                # Исторически operator_name хранит то email, то ФИО
+                operator_name = ''
+                if on_shift:
+                    operator_name = op['email'] if self.rnd.random() < 0.8 else op['full_name']
+                yield (
+                    row_id, model['id'], day, cb, sp, soda, cam4,
+                    round(cb * 0.045, 2), round(sp * 0.05, 2), round(soda * 0.04, 2), cam4,
+                    sp, round(self.rnd.uniform(2, 10), 2), round(self.rnd.uniform(2, 10), 2), 0,
+                    transfers, operator_name, op['id'] if on_shift else None, bool(on_shift),
+                )
+
+    def plan_rows(self):
+        director = self.by_role['director'][0]
+        row_id = 0
+        for start, end in periods(TODAY - timedelta(days=180), TODAY):
+            for u in self.by_role['operator'] + self.by_role['producer']:
+                row_id += 1
+                shifts = u['role'] == 'operator'
+                yield (row_id, u['email'], u['role'], start, end, 'shifts' if shifts else 'income',
+                       10 if shifts else self.rnd.choice((3000, 5000, 8000)), 5000, director['email'], u['id'])
+
+    def adjustment_rows(self):
+        director = self.by_role['director'][0]
+        row_id = 0
+        staff = self.by_role['operator'] + self.by_role['content_maker'] + self.by_role['producer']
+        for start, end in periods(TODAY - timedelta(days=365), TODAY):
+            for u in staff:
+                if self.rnd.random() > 0.15:
+                    continue
+                row_id += 1
+                yield (row_id, u['email'], u['role'], start, end, self.rnd.choice((0, 50, 100)),
+                       self.rnd.choice((0, 0, 20)), self.rnd.choice((0, 0, 30)), director['email'], u['id'])
+
+    def task_rows(self):
+        assigners = self.by_role['director'] + self.by_role['producer']
+        assignees = self.by_role['operator'] + self.by_role['producer'] + self.by_role['content_maker']
+        base = datetime.combine(TODAY, datetime.min.time())
+        for n in range(1, self.p['tasks'] + 1):
+            by = self.rnd.choice(assigners)
+            to = self.rnd.choice(assignees)
+            created = base - timedelta(minutes=self.rnd.randint(0, self.p['days'] * 24 * 60))
+            status = self.rnd.choice(TASK_STATUSES)
+            completed = created + timedelta(hours=self.rnd.randint(1, 240)) if status == 'completed' else None
+            yield (n, f'Задача {n}', f'Описание задачи {n}', status, self.rnd.choice(TASK_PRIORITIES),
+                   to['email'], by['email'], created + timedelta(days=7), created, completed or created, completed,
+                   to['id'], by['id'])
+
+    def comment_rows(self):
+        people = self.by_role['director'] + self.by_role['producer'] + self.by_role['operator']
+        row_id = 0
+        for task_id in range(1, self.p['tasks'] + 1):
+            for _ in range(self.rnd.choice((0, 0, 1, 2, 4))):
+                row_id += 1
+                yield (row_id, task_id, self.rnd.choice(people)['email'], f'Комментарий {row_id}')
+
+    def schedule_rows(self):
+        start = TODAY - timedelta(days=TODAY.weekday())
+        row_id = 0
+        names = [u['full_name'] for u in self.models()]
+        for a in range(1, self.p['apartments'] + 1):
+            for week in ('1 лк', '2 лк'):
+                for d in range(7):
+                    row_id += 1
+                    day = start + timedelta(days=d)
+                    yield (row_id, f'Квартира {a}', f'Адрес {a}', week, day.strftime('%d.%m'), DAY_NAMES[d],
+                           self.rnd.choice(names), self.rnd.choice(names), self.rnd.choice(names + ['']))
+
+    def token_rows(self):
+        row_id = 0
+        expires = datetime.now() + timedelta(days=30)
+        for role in ('director', 'producer', 'operator', 'content_maker', 'solo_maker'):
+            users = self.by_role[role]
+            if role in ('content_maker', 'solo_maker'):
+                users = users[:10]
+            for u in users:
+                row_id += 1
+                yield (row_id, u['id'], bench_token(role, u['n']), expires, True, '127.0.0.1', 'bench', 'Компьютер', 'bench')
+
+
+def guard_local(dsn: str, force: bool):
+    host = urlsplit(dsn).hostname or 'localhost'
+    if host not in ('localhost', '127.0.0.1', '::1') and not force:
+        raise SystemExit(f'refusing to truncate tables on {host}; pass --force for a non-local database')
+
+
+def load(dsn: str, preset_name: str, seed: int) -> Dict[str, int]:
+    import bcrypt
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(rounds=4)).decode()
+    ds = Dataset(PRESETS[preset_name], seed, password_hash)
+    ds.build_users()
+    counts: Dict[str, int] = {}
+
+    conn = psycopg2.connect(dsn, options=f'-c search_path={SCHEMA},public')
+    cur = conn.cursor()
+    try:
+        # Триггеры (resolve_user_ids, накопительные суммы) и FK на время загрузки отключены,
+        # производные данные пересчитываются одним запросом на таблицу ниже
+        cur.execute("SET session_replication_role = replica")
+        cur.execute('TRUNCATE ' + ', '.join(f'{SCHEMA}.{t}' for t in TABLES) + ' RESTART IDENTITY CASCADE')
+
+        counts['users'] = copy_rows(cur, 'users', (
+            'id', 'email', 'password_hash', 'role', 'full_name', 'created_at', 'updated_at', 'is_active',
+            'permissions', 'solo_percentage'), ds.user_rows())
+        counts['operator_model_assignments'] = copy_rows(cur, 'operator_model_assignments', (
+            'id', 'operator_email', 'model_id', 'assigned_by', 'operator_percentage', 'model_email',
+            'operator_user_id', 'model_user_id'), ds.operator_assignment_rows())
+        counts['producer_assignments'] = copy_rows(cur, 'producer_assignments', (
+            'id', 'producer_email', 'model_id', 'operator_email', 'assigned_by', 'assignment_type', 'model_email',
+            'producer_percentage', 'producer_user_id', 'model_user_id', 'operator_user_id'),
+            ds.producer_assignment_rows())
+        counts['model_pairs'] = copy_rows(cur, 'model_pairs', (
+            'id', 'model1_email', 'model2_email', 'created_by', 'is_active', 'model_percentage',
+            'operator_percentage', 'producer_percentage', 'operator_email', 'model1_user_id', 'model2_user_id',
+            'operator_user_id'), ds.pair_rows())
+        counts['model_finances'] = copy_rows(cur, 'model_finances', (
+            'id', 'model_id', 'date', 'cb_tokens', 'sp_tokens', 'soda_tokens', 'cam4_tokens',
+            'cb_income', 'sp_income', 'soda_income', 'cam4_income', 'stripchat_tokens', 'cb_online',
+            'sp_online', 'soda_online', 'transfers', 'operator_name', 'operator_user_id', 'has_shift'),
+            ds.finance_rows())
+        counts['employee_plans'] = copy_rows(cur, 'employee_plans', (
+            'id', 'user_email', 'user_role', 'period_start', 'period_end', 'plan_type', 'plan_amount',
+            'bonus_amount', 'set_by_email', 'user_id'), ds.plan_rows())
+        counts['salary_adjustments'] = copy_rows(cur, 'salary_adjustments', (
+            'id', 'email', 'role', 'period_start', 'period_end', 'advance', 'penalty', 'expenses', 'updated_by',
+            'user_id'), ds.adjustment_rows())
+        counts['tasks'] = copy_rows(cur, 'tasks', (
+            'id', 'title', 'description', 'status', 'priority', 'assigned_to_email', 'assigned_by_email',
+            'due_date', 'created_at', 'updated_at', 'completed_at', 'assigned_to_user_id', 'assigned_by_user_id'),
+            ds.task_rows())
+        counts['task_comments'] = copy_rows(cur, 'task_comments', (
+            'id', 'task_id', 'author_email', 'text'), ds.comment_rows())
+        counts['schedule'] = copy_rows(cur, 'schedule', (
+            'id', 'apartment_name', 'apartment_address', 'week_number', 'date', 'day_name', 'time_10',
+            'time_17', 'time_00'), ds.schedule_rows())
+        counts['auth_tokens'] = copy_rows(cur, 'auth_tokens', (
+            'id', 'user_id', 'token', 'expires_at', 'is_active', 'ip_address', 'user_agent', 'device',
+            'browser'), ds.token_rows())
+
+        cur.execute(f"""
+            INSERT INTO {SCHEMA}.model_earnings_totals (model_id, earnings)
+            SELECT model_id, SUM(COALESCE(cb_income, 0) + COALESCE(sp_income, 0)
+                                 + COALESCE(soda_income, 0) + COALESCE(cam4_income, 0))
+            FROM {SCHEMA}.model_finances
+            GROUP BY model_id
+        """)
+        for table in ('users', 'operator_model_assignments', 'producer_assignments', 'model_pairs',
+                      'model_finances', 'employee_plans', 'salary_adjustments', 'tasks', 'task_comments',
+                      'schedule', 'auth_tokens'):
+            cur.execute(f"SELECT setval(pg_get_serial_sequence('{SCHEMA}.{table}', 'id'), "
+                        f"COALESCE((SELECT MAX(id) FROM {SCHEMA}.{table}), 0) + 1, false)")
+        cur.execute("SET session_replication_role = DEFAULT")
+        conn.commit()
+
+        cur.execute(f'REFRESH MATERIALIZED VIEW {SCHEMA}.mv_model_finances_monthly')
+        conn.commit()
+        conn.autocommit = True
+        cur.execute('ANALYZE')
+    finally:
+        cur.close()
+        conn.close()
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Synthetic benchmark dataset')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='разрешить загрузку в нелокальную базу')
+    args = parser.parse_args()
+
+    dsn = local_db.local_dsn()
+    guard_local(dsn, args.force)
+    started = time.perf_counter()
+    counts = load(dsn, args.preset, args.seed)
+    for table, count in counts.items():
+        print(f'{table:<28} {count:>9}')
+    print(f'preset {args.preset} (seed {args.seed}) loaded in {time.perf_counter() - started:.1f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -64,7 +64,12 @@ export default function AchievementToastWatcher() {
 
     const fetchUnseen = async () => {
       try {
-        const res = await fetch(`${ACHIEVEMENTS_URL}?action=unseen&email=${encodeURIComponent(userEmail)}`);
+        const email = encodeURIComponent(userEmail);
+        const countRes = await fetch(`${ACHIEVEMENTS_URL}?action=unseen&mode=count&email=${email}`);
+        if (!countRes.ok) return;
+        const { count } = await countRes.json();
+        if (!count) return;
+        const res = await fetch(`${ACHIEVEMENTS_URL}?action=unseen&email=${email}`);
         if (!res.ok) return;
         const data = await res.json();
         const list: UnseenAchievement[] = Array.isArray(data.unseen) ? data.unseen : [];
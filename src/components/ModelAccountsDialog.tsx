@@ -5,20 +5,22 @@ import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
 import Icon from '@/components/ui/icon';
 import { Badge } from '@/components/ui/badge';
+import { AccountCredentials, isMasked } from '@/lib/modelAccounts';
 
 interface ModelAccountsDialogProps {
   open: boolean;
   onOpenChange: (open: boolean) => void;
   modelName: string;
   accounts: {
-    stripchat?: { login: string; password: string };
-    chaturbate?: { login: string; password: string };
-    camsoda?: { login: string; password: string };
-    cam4?: { login: string; password: string };
-    email?: { login: string; password: string };
+    stripchat?: AccountCredentials;
+    chaturbate?: AccountCredentials;
+    camsoda?: AccountCredentials;
+    cam4?: AccountCredentials;
+    email?: AccountCredentials;
   };
   userRole?: string;
   onSave?: (accounts: any) => void;
+  onReveal?: (platform: string) => Promise<string>;
 }
 
 const platformConfig = [
@@ -35,7 +37,8 @@ const ModelAccountsDialog = ({
   modelName, 
   accounts: initialAccounts,
   userRole,
-  onSave
+  onSave,
+  onReveal
 }: ModelAccountsDialogProps) => {
   const [isEditing, setIsEditing] = useState(false);
   const [accounts, setAccounts] = useState(initialAccounts);
@@ -53,16 +56,41 @@ const ModelAccountsDialog = ({
     navigator.clipboard.writeText(text);
   };
 
-  const togglePasswordVisibility = (key: string) => {
+  const passwordFor = async (key: string) => {
+    const account = accounts[key as keyof typeof accounts];
+    if (!account || !isMasked(account) || !onReveal) return account?.password || '';
+    const password = await onReveal(key);
+    setAccounts(prev => ({ ...prev, [key]: { ...account, password } }));
+    return password;
+  };
+
+  const togglePasswordVisibility = async (key: string) => {
+    if (!showPasswords[key]) {
+      try {
+        await passwordFor(key);
+      } catch {
+        return;
+      }
+    }
     setShowPasswords(prev => ({ ...prev, [key]: !prev[key] }));
   };
 
+  const copyPassword = async (key: string) => {
+    try {
+      copyToClipboard(await passwordFor(key));
+    } catch {
+      // пароль не получен — копировать нечего
+    }
+  };
+
   const handleInputChange = (platform: string, field: 'login' | 'password', value: string) => {
     setAccounts(prev => ({
       ...prev,
       [platform]: {
         ...(prev[platform as keyof typeof prev] || { login: '', password: '' }),
-        [field]: value
+        [field]: value,
+        // Введённый пароль заменяет сохранённый, в том числе пустой
+        ...(field === 'password' ? { has_password: false } : {})
       }
     }));
   };
@@ -105,7 +133,7 @@ const ModelAccountsDialog = ({
         <div className="space-y-4 py-4">
           {platformConfig.map(({ key, label, icon, color }) => {
             const accountData = accounts[key as keyof typeof accounts];
-            const hasData = accountData?.login || accountData?.password;
+            const hasData = accountData?.login || accountData?.password || accountData?.has_password;
             
             return (
               <div key={key} className="p-4 border rounded-lg space-y-3">
@@ -139,7 +167,7 @@ const ModelAccountsDialog = ({
                           type={showPasswords[key] ? 'text' : 'password'}
                           value={accountData?.password || ''}
                           onChange={(e) => handleInputChange(key, 'password', e.target.value)}
-                          placeholder="Введите пароль"
+                          placeholder={isMasked(accountData) ? 'Сохранён — оставьте пустым, чтобы не менять' : 'Введите пароль'}
                           className="pr-10"
                         />
                         <Button
@@ -188,7 +216,7 @@ const ModelAccountsDialog = ({
                         <Button
                           variant="ghost"
                           size="sm"
-                          onClick={() => copyToClipboard(accountData?.password || '')}
+                          onClick={() => copyPassword(key)}
                           className="gap-2"
                         >
                           <Icon name="Copy" size={14} />
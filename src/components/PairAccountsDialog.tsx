@@ -5,13 +5,14 @@ import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
 import Icon from '@/components/ui/icon';
 import { Badge } from '@/components/ui/badge';
+import { AccountCredentials, isMasked } from '@/lib/modelAccounts';
 
 type PlatformAccounts = {
-  stripchat?: { login: string; password: string };
-  chaturbate?: { login: string; password: string };
-  camsoda?: { login: string; password: string };
-  cam4?: { login: string; password: string };
-  email?: { login: string; password: string };
+  stripchat?: AccountCredentials;
+  chaturbate?: AccountCredentials;
+  camsoda?: AccountCredentials;
+  cam4?: AccountCredentials;
+  email?: AccountCredentials;
 };
 
 interface PairAccountsDialogProps {
@@ -24,6 +25,8 @@ interface PairAccountsDialogProps {
   userRole?: string;
   onSave1?: (accounts: PlatformAccounts) => void;
   onSave2?: (accounts: PlatformAccounts) => void;
+  onReveal1?: (platform: string) => Promise<string>;
+  onReveal2?: (platform: string) => Promise<string>;
 }
 
 const platformConfig = [
@@ -39,11 +42,13 @@ const AccountsPanel = ({
   accounts: initialAccounts,
   userRole,
   onSave,
+  onReveal,
 }: {
   modelName: string;
   accounts: PlatformAccounts;
   userRole?: string;
   onSave?: (accounts: PlatformAccounts) => void;
+  onReveal?: (platform: string) => Promise<string>;
 }) => {
   const [isEditing, setIsEditing] = useState(false);
   const [accounts, setAccounts] = useState<PlatformAccounts>(initialAccounts);
@@ -59,8 +64,32 @@ const AccountsPanel = ({
 
   const copyToClipboard = (text: string) => navigator.clipboard.writeText(text);
 
-  const togglePassword = (key: string) =>
+  const passwordFor = async (key: string) => {
+    const account = accounts[key as keyof PlatformAccounts];
+    if (!account || !isMasked(account) || !onReveal) return account?.password || '';
+    const password = await onReveal(key);
+    setAccounts((prev) => ({ ...prev, [key]: { ...account, password } }));
+    return password;
+  };
+
+  const togglePassword = async (key: string) => {
+    if (!showPasswords[key]) {
+      try {
+        await passwordFor(key);
+      } catch {
+        return;
+      }
+    }
     setShowPasswords((prev) => ({ ...prev, [key]: !prev[key] }));
+  };
+
+  const copyPassword = async (key: string) => {
+    try {
+      copyToClipboard(await passwordFor(key));
+    } catch {
+      // пароль не получен — копировать нечего
+    }
+  };
 
   const handleInputChange = (platform: string, field: 'login' | 'password', value: string) => {
     setAccounts((prev) => ({
@@ -68,6 +97,8 @@ const AccountsPanel = ({
       [platform]: {
         ...(prev[platform as keyof PlatformAccounts] || { login: '', password: '' }),
         [field]: value,
+        // Введённый пароль заменяет сохранённый, в том числе пустой
+        ...(field === 'password' ? { has_password: false } : {}),
       },
     }));
   };
@@ -91,7 +122,7 @@ const AccountsPanel = ({
 
       {platformConfig.map(({ key, label, icon, color }) => {
         const accountData = accounts[key as keyof PlatformAccounts];
-        const hasData = accountData?.login || accountData?.password;
+        const hasData = accountData?.login || accountData?.password || accountData?.has_password;
 
         return (
           <div key={key} className="p-3 border rounded-lg space-y-2">
@@ -123,7 +154,7 @@ const AccountsPanel = ({
                       type={showPasswords[key] ? 'text' : 'password'}
                       value={accountData?.password || ''}
                       onChange={(e) => handleInputChange(key, 'password', e.target.value)}
-                      placeholder="Введите пароль"
+                      placeholder={isMasked(accountData) ? 'Сохранён — оставьте пустым, чтобы не менять' : 'Введите пароль'}
                       className="pr-10 h-8 text-sm"
                     />
                     <Button
@@ -160,7 +191,7 @@ const AccountsPanel = ({
                     <Button variant="ghost" size="sm" onClick={() => togglePassword(key)}>
                       <Icon name={showPasswords[key] ? 'EyeOff' : 'Eye'} size={12} />
                     </Button>
-                    <Button variant="ghost" size="sm" onClick={() => copyToClipboard(accountData?.password || '')}>
+                    <Button variant="ghost" size="sm" onClick={() => copyPassword(key)}>
                       <Icon name="Copy" size={12} />
                     </Button>
                   </div>
@@ -196,6 +227,8 @@ const PairAccountsDialog = ({
   userRole,
   onSave1,
   onSave2,
+  onReveal1,
+  onReveal2,
 }: PairAccountsDialogProps) => {
   return (
     <Dialog open={open} onOpenChange={onOpenChange}>
@@ -213,6 +246,7 @@ const PairAccountsDialog = ({
             accounts={model1Accounts}
             userRole={userRole}
             onSave={onSave1}
+            onReveal={onReveal1}
           />
           <div className="hidden md:block w-px bg-border" />
           <AccountsPanel
@@ -220,6 +254,7 @@ const PairAccountsDialog = ({
             accounts={model2Accounts}
             userRole={userRole}
             onSave={onSave2}
+            onReveal={onReveal2}
           />
         </div>
 
@@ -7,6 +7,7 @@ import { useToast } from '@/hooks/use-toast';
 import { authenticatedFetch } from '@/lib/api';
 import ModelAccountsDialog from '@/components/ModelAccountsDialog';
 import PairAccountsDialog from '@/components/PairAccountsDialog';
+import { AccountsMap, fetchMaskedAccounts, revealPassword, toSavePayload } from '@/lib/modelAccounts';
 import {
   Dialog,
   DialogContent,
@@ -324,11 +325,7 @@ const ModelsTab = ({
 
   const fetchModelAccounts = async (modelId: number) => {
     try {
-      const response = await fetch(`${BACKEND_URL}?model_id=${modelId}`, {
-        headers: { 'X-User-Role': userRole || 'operator' }
-      });
-      const data = await response.json();
-      return data.accounts || {};
+      return await fetchMaskedAccounts(modelId, userRole || 'operator');
     } catch (error) {
       return {};
     }
@@ -340,7 +337,7 @@ const ModelsTab = ({
       const response = await fetch(BACKEND_URL, {
         method: 'PUT',
         headers: { 'Content-Type': 'application/json', 'X-User-Role': userRole || 'operator' },
-        body: JSON.stringify({ model_id: selectedModel.id, model_name: selectedModel.name, accounts })
+        body: JSON.stringify({ model_id: selectedModel.id, model_name: selectedModel.name, accounts: toSavePayload(accounts) })
       });
       if (response.ok) {
         setModelAccounts({ ...modelAccounts, [selectedModel.id]: accounts });
@@ -593,6 +590,7 @@ const ModelsTab = ({
           userRole={userRole}
           accounts={modelAccounts[selectedModel.id] || {}}
           onSave={handleSaveAccounts}
+          onReveal={(platform) => revealPassword(selectedModel.id, platform, userRole || 'operator')}
         />
       )}
 
@@ -605,15 +603,17 @@ const ModelsTab = ({
             onOpenChange={setPairAccountsDialogOpen}
             model1Name={selectedPairForAccounts.model1_name}
             model2Name={selectedPairForAccounts.model2_name}
-            model1Accounts={(modelAccounts[m1?.id ?? -1] || {}) as Record<string, { login: string; password: string }>}
-            model2Accounts={(modelAccounts[m2?.id ?? -1] || {}) as Record<string, { login: string; password: string }>}
+            model1Accounts={(modelAccounts[m1?.id ?? -1] || {}) as AccountsMap}
+            model2Accounts={(modelAccounts[m2?.id ?? -1] || {}) as AccountsMap}
             userRole={userRole}
+            onReveal1={m1 ? (platform) => revealPassword(m1.id, platform, userRole || 'operator') : undefined}
+            onReveal2={m2 ? (platform) => revealPassword(m2.id, platform, userRole || 'operator') : undefined}
             onSave1={async (accounts) => {
               if (!m1) return;
               const response = await fetch('https://functions.poehali.dev/6eb743de-2cae-499d-8e8f-4aa975cb470c', {
                 method: 'PUT',
                 headers: { 'Content-Type': 'application/json', 'X-User-Role': userRole || 'operator' },
-                body: JSON.stringify({ model_id: m1.id, model_name: m1.name, accounts }),
+                body: JSON.stringify({ model_id: m1.id, model_name: m1.name, accounts: toSavePayload(accounts) }),
               });
               if (response.ok) {
                 setModelAccounts(prev => ({ ...prev, [m1.id]: accounts }));
@@ -625,7 +625,7 @@ const ModelsTab = ({
               const response = await fetch('https://functions.poehali.dev/6eb743de-2cae-499d-8e8f-4aa975cb470c', {
                 method: 'PUT',
                 headers: { 'Content-Type': 'application/json', 'X-User-Role': userRole || 'operator' },
-                body: JSON.stringify({ model_id: m2.id, model_name: m2.name, accounts }),
+                body: JSON.stringify({ model_id: m2.id, model_name: m2.name, accounts: toSavePayload(accounts) }),
               });
               if (response.ok) {
                 setModelAccounts(prev => ({ ...prev, [m2.id]: accounts }));
@@ -7,6 +7,7 @@ import { Avatar, AvatarFallback, AvatarImage } from "@/components/ui/avatar";
 import { Tabs, TabsList, TabsTrigger, TabsContent } from "@/components/ui/tabs";
 import { useToast } from "@/hooks/use-toast";
 import Icon from "@/components/ui/icon";
+import { sha256Hex } from "@/lib/utils";
 import funcUrls from "../../../backend/func2url.json";
 
 const PROFILE_URL = (funcUrls as Record<string, string>)["profile"];
@@ -60,6 +61,28 @@ export default function ProfileEditDialog({
   const [confirmPassword, setConfirmPassword] = useState("");
   const [changing, setChanging] = useState(false);
 
+  const uploadDirect = async (file: File, kind: "avatar" | "cover", retry = true): Promise<Response> => {
+    const presignRes = await fetch(PROFILE_URL, {
+      method: "POST",
+      headers: authHeaders(),
+      body: JSON.stringify({ action: "presign", kind, content_type: file.type, size: file.size, sha256: await sha256Hex(file) }),
+    });
+    const presign = await presignRes.json();
+    if (!presignRes.ok || !presign.success) throw new Error(presign.error || "Не удалось загрузить");
+    if (!presign.exists) {
+      const put = await fetch(presign.upload_url, { method: "PUT", headers: presign.headers, body: file });
+      if (!put.ok) throw new Error("Не удалось загрузить файл");
+    }
+    const res = await fetch(PROFILE_URL, {
+      method: "POST",
+      headers: authHeaders(),
+      body: JSON.stringify({ action: "confirm", kind, key: presign.key }),
+    });
+    // 409 — файл удалили вместе с последней ссылкой после presign, загружаем его заново
+    if (res.status === 409 && retry) return uploadDirect(file, kind, false);
+    return res;
+  };
+
   const handlePickFile = () => fileRef.current?.click();
   const handlePickCover = () => coverRef.current?.click();
 
@@ -78,11 +101,7 @@ export default function ProfileEditDialog({
     try {
       const base64 = await fileToBase64(file);
       setCoverPreview(base64);
-      const res = await fetch(PROFILE_URL, {
-        method: "POST",
-        headers: authHeaders(),
-        body: JSON.stringify({ action: "upload_cover", email, image: base64 }),
-      });
+      const res = await uploadDirect(file, "cover");
       const data = await res.json();
       if (!res.ok || !data.success) throw new Error(data.error || "Не удалось загрузить");
       setCoverPreview(data.cover_url);
@@ -114,11 +133,7 @@ export default function ProfileEditDialog({
     try {
       const base64 = await fileToBase64(file);
       setPreview(base64);
-      const res = await fetch(PROFILE_URL, {
-        method: "POST",
-        headers: authHeaders(),
-        body: JSON.stringify({ action: "upload_avatar", email, image: base64 }),
-      });
+      const res = await uploadDirect(file, "avatar");
       const data = await res.json();
       if (!res.ok || !data.success) {
         throw new Error(data.error || "Не удалось загрузить фото");
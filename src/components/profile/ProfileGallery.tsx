@@ -5,6 +5,7 @@ import { Textarea } from "@/components/ui/textarea";
 import { Dialog, DialogContent, DialogHeader, DialogTitle } from "@/components/ui/dialog";
 import { useToast } from "@/hooks/use-toast";
 import Icon from "@/components/ui/icon";
+import { sha256Hex } from "@/lib/utils";
 import funcUrls from "../../../backend/func2url.json";
 
 const PHOTOS_URL = (funcUrls as Record<string, string>)["user-photos"];
@@ -25,14 +26,6 @@ interface Props {
 
 const MAX_PHOTOS = 6;
 
-const fileToBase64 = (file: File): Promise<string> =>
-  new Promise((resolve, reject) => {
-    const reader = new FileReader();
-    reader.onload = () => resolve(String(reader.result || ""));
-    reader.onerror = reject;
-    reader.readAsDataURL(file);
-  });
-
 export default function ProfileGallery({ targetEmail, actorEmail, actorRole, readOnly }: Props) {
   const { toast } = useToast();
   const [photos, setPhotos] = useState<Photo[]>([]);
@@ -80,19 +73,28 @@ export default function ProfileGallery({ targetEmail, actorEmail, actorRole, rea
     }
     setUploading(true);
     try {
-      const base64 = await fileToBase64(file);
-      const res = await fetch(PHOTOS_URL, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          action: "add",
-          target_email: targetEmail,
-          actor_email: actorEmail,
-          actor_role: actorRole,
-          image: base64,
-          comment: "",
-        }),
-      });
+      const actor = { target_email: targetEmail, actor_email: actorEmail, actor_role: actorRole };
+      const upload = async () => {
+        const presignRes = await fetch(PHOTOS_URL, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ action: "presign", ...actor, content_type: file.type, size: file.size, sha256: await sha256Hex(file) }),
+        });
+        const presign = await presignRes.json();
+        if (!presignRes.ok || !presign.success) throw new Error(presign.error || "Ошибка");
+        if (!presign.exists) {
+          const put = await fetch(presign.upload_url, { method: "PUT", headers: presign.headers, body: file });
+          if (!put.ok) throw new Error("Не удалось загрузить файл");
+        }
+        return fetch(PHOTOS_URL, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ action: "confirm", ...actor, key: presign.key, comment: "" }),
+        });
+      };
+      let res = await upload();
+      // 409 — файл удалили вместе с последней ссылкой после presign, загружаем его заново
+      if (res.status === 409) res = await upload();
       const data = await res.json();
       if (!res.ok || !data.success) throw new Error(data.error || "Ошибка");
       setPhotos((p) => [...p, data.photo]);
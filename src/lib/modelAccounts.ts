@@ -0,0 +1,42 @@
+import { API_URLS } from '@/lib/apiUrls';
+
+// Список приходит без паролей (mode=masked): расшифровка только по кнопке «показать»
+export interface AccountCredentials {
+  login: string;
+  password: string;
+  has_password?: boolean;
+}
+
+export type AccountsMap = Record<string, AccountCredentials>;
+
+export const fetchMaskedAccounts = async (modelId: number, role: string): Promise<AccountsMap> => {
+  const response = await fetch(`${API_URLS.modelAccounts}?model_id=${modelId}&mode=masked`, {
+    headers: { 'X-User-Role': role },
+  });
+  const data = await response.json();
+  return data.accounts || {};
+};
+
+export const revealPassword = async (modelId: number, platform: string, role: string): Promise<string> => {
+  const response = await fetch(
+    `${API_URLS.modelAccounts}?model_id=${modelId}&reveal=${encodeURIComponent(platform)}`,
+    { headers: { 'X-User-Role': role } },
+  );
+  const data = await response.json();
+  if (!response.ok) throw new Error(data.error || 'Не удалось получить пароль');
+  return data.password || '';
+};
+
+// Нераскрытый и не изменённый пароль уходит как null — бэкенд оставляет прежний
+export const toSavePayload = (accounts: Partial<AccountsMap>) =>
+  Object.fromEntries(
+    Object.entries(accounts)
+      .filter((entry): entry is [string, AccountCredentials] => Boolean(entry[1]))
+      .map(([platform, { login, password, has_password }]) => [
+        platform,
+        { login, password: has_password && !password ? null : password },
+      ]),
+  );
+
+export const isMasked = (account?: AccountCredentials) =>
+  Boolean(account?.has_password && !account.password);